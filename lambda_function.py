@@ -5,9 +5,18 @@
 
 import json
 import boto3
+from botocore.config import Config
 
-bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+# Created once per container and reused across warm invocations
+client_config = Config(
+    max_pool_connections=10,
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=60,
+    retries={'mode': 'adaptive', 'max_attempts': 4}
+)
+bedrock = boto3.client('bedrock-runtime', region_name='us-east-1', config=client_config)
+dynamodb = boto3.resource('dynamodb', region_name='us-east-1', config=client_config)
 
 def get_google_data():
     """Retrieve Google financial data from DynamoDB"""
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the Financial AI Agent
+Drives AgentOrchestrator.route_query and the /chat route against a fake Bedrock backend
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.agents.hedging import percentile
+from src.services.fake_bedrock import LatencyProfile, install_fake_bedrock
+
+# Queries that take the agent path (they name tools, tickers or user data)
+QUERIES = [
+    "Analyze the latest earnings for AAPL",
+    "Compare MSFT and GOOGL revenue growth",
+    "How risky is my portfolio right now",
+    "Calculate the RSI for NVDA",
+    "Should I rebalance my holdings toward bonds",
+    "What is the current outlook for TSLA",
+    "Forecast AMZN revenue for next quarter",
+    "Screen for high dividend stocks today"
+]
+
+# Regions the API's startup config uses
+API_REGIONS = ("us-east-1", "us-west-2")
+
+# Metrics compared against a baseline, and which direction is better
+COMPARED_METRICS = {
+    "p50_ms": "lower",
+    "p95_ms": "lower",
+    "p99_ms": "lower",
+    "throughput_rps": "higher",
+    "loop_lag_p99_ms": "lower"
+}
+
+async def monitor_loop_lag(samples: List[float], stop: asyncio.Event, interval: float = 0.01):
+    """Record how late the event loop wakes a sleeping task"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+async def run_load(call: Callable[[int], Awaitable[bool]],
+                   requests: int,
+                   concurrency: int) -> Dict[str, Any]:
+    """Issue ``requests`` calls from ``concurrency`` workers and time them"""
+    
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+    lag: List[float] = []
+    stop = asyncio.Event()
+    
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                ok = await call(index)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+                
+    monitor = asyncio.create_task(monitor_loop_lag(lag, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+    
+    ms = [value * 1000 for value in latencies]
+    lag_ms = [value * 1000 for value in lag]
+    return {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(ms) / len(ms), 2) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50) or 0.0, 2),
+        "p95_ms": round(percentile(ms, 95) or 0.0, 2),
+        "p99_ms": round(percentile(ms, 99) or 0.0, 2),
+        "max_ms": round(max(ms), 2) if ms else 0.0,
+        "loop_lag_p50_ms": round(percentile(lag_ms, 50) or 0.0, 3),
+        "loop_lag_p99_ms": round(percentile(lag_ms, 99) or 0.0, 3),
+        "loop_lag_max_ms": round(max(lag_ms), 3) if lag_ms else 0.0
+    }
+
+def simulated_latency_ms(args: argparse.Namespace) -> float:
+    """Mean time the fake model takes, to separate it from our overhead"""
+    chunks = max(1, -(-args.response_chars // args.chunk_size))
+    return (args.first_byte + args.jitter / 2 + (chunks - 1) * args.per_chunk) * 1000
+
+async def bench_orchestrator(args: argparse.Namespace) -> Dict[str, Any]:
+    """route_query straight through the orchestrator, no HTTP layer"""
+    
+    from src.agents.financial_agent import AgentConfig, AgentOrchestrator, FinancialAgent
+    
+    agent = FinancialAgent(AgentConfig(agent_id="bench-agent", max_in_flight=args.concurrency))
+    orchestrator = AgentOrchestrator()
+    for name in ("general", "portfolio", "risk"):
+        orchestrator.register_agent(name, agent)
+        
+    async def call(index: int) -> bool:
+        result = await orchestrator.route_query(
+            query=QUERIES[index % len(QUERIES)],
+            session_id=f"bench_{index}",
+            use_cache=args.cache
+        )
+        return result["success"]
+        
+    return await run_load(call, args.requests, args.concurrency)
+
+async def bench_api(args: argparse.Namespace) -> Dict[str, Any]:
+    """POST /chat through the full FastAPI app, in process over ASGI"""
+    
+    from src.api.main import app
+    
+    async def call(index: int) -> bool:
+        status, body = await asgi_post(app, "/chat", {
+            "query": QUERIES[index % len(QUERIES)],
+            "agent_type": "general",
+            "use_cache": args.cache
+        })
+        return status == 200 and json.loads(body).get("success", False)
+        
+    async with app.router.lifespan_context(app):
+        return await run_load(call, args.requests, args.concurrency)
+
+async def asgi_post(app, path: str, payload: Dict[str, Any]) -> Tuple[int, bytes]:
+    """Minimal in-process ASGI client: one JSON POST, full response body"""
+    
+    body = json.dumps(payload).encode("utf-8")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("ascii"),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii"))
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80)
+    }
+    request_sent = False
+    response_done = asyncio.Event()
+    status = 0
+    chunks: List[bytes] = []
+    
+    async def receive() -> Dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Only report a disconnect once the response is complete
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+        
+    async def send(message: Dict[str, Any]):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+                
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> bool:
+    """Print metric deltas against a saved baseline; False on any regression"""
+    
+    ok = True
+    changed = [
+        key for key, value in results["config"].items()
+        if key != "target" and baseline.get("config", {}).get(key) != value
+    ]
+    if changed:
+        print(f"\n⚠️  Config differs from baseline: {', '.join(changed)}")
+        
+    for target, current in results["targets"].items():
+        previous = baseline.get("targets", {}).get(target)
+        if previous is None:
+            print(f"  {target}: not in baseline")
+            continue
+        print(f"\n  {target} vs baseline ({baseline.get('timestamp', 'unknown')})")
+        for metric, better in COMPARED_METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = change > tolerance if better == "lower" else change < -tolerance
+            ok = ok and not regressed
+            flag = "❌" if regressed else "✅"
+            print(f"    {flag} {metric:<16} {old:>10.2f} -> {new:>10.2f} ({change:+.1%})")
+    return ok
+
+def print_results(results: Dict[str, Any]):
+    for target, stats in results["targets"].items():
+        print(f"\n📊 {target}")
+        print(f"  requests     {stats['requests']} ({stats['errors']} errors) in {stats['elapsed_s']}s")
+        print(f"  throughput   {stats['throughput_rps']} req/s")
+        print(f"  latency ms   p50 {stats['p50_ms']}  p95 {stats['p95_ms']}  p99 {stats['p99_ms']}  max {stats['max_ms']}")
+        print(f"  overhead ms  p50 {stats['overhead_p50_ms']} over the simulated model time")
+        print(f"  loop lag ms  p50 {stats['loop_lag_p50_ms']}  p99 {stats['loop_lag_p99_ms']}  max {stats['loop_lag_max_ms']}")
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    profile = LatencyProfile(
+        first_byte=args.first_byte,
+        jitter=args.jitter,
+        per_chunk=args.per_chunk,
+        stall_rate=args.stall_rate,
+        stall=args.stall,
+        error_rate=args.error_rate
+    )
+    install_fake_bedrock(
+        {region: profile for region in API_REGIONS},
+        response_text=("x" * args.response_chars),
+        chunk_size=args.chunk_size,
+        seed=args.seed
+    )
+    
+    targets = ["orchestrator", "api"] if args.target == "all" else [args.target]
+    benches = {"orchestrator": bench_orchestrator, "api": bench_api}
+    model_ms = simulated_latency_ms(args)
+    
+    results = {}
+    for target in targets:
+        try:
+            stats = await benches[target](args)
+        except ImportError as e:
+            print(f"⚠️  Skipping {target}: {e}")
+            continue
+        stats["overhead_p50_ms"] = round(stats["p50_ms"] - model_ms, 2)
+        results[target] = stats
+        
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "config": {
+            key: value for key, value in vars(args).items()
+            if key not in ("output", "baseline", "fail_on_regression")
+        },
+        "simulated_model_ms": round(model_ms, 2),
+        "targets": results
+    }
+
+def main():
+    """Benchmark entry point"""
+    
+    parser = argparse.ArgumentParser(description="Offline Financial AI Agent benchmark")
+    parser.add_argument("--target", choices=["orchestrator", "api", "all"], default="all",
+                        help="What to drive: route_query, the /chat route, or both")
+    parser.add_argument("--requests", "-n", type=int, default=200, help="Requests per target")
+    parser.add_argument("--concurrency", "-c", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--first-byte", type=float, default=0.05,
+                        help="Simulated model time to first byte (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Uniform extra first-byte delay (seconds)")
+    parser.add_argument("--per-chunk", type=float, default=0.002, help="Delay between streamed chunks (seconds)")
+    parser.add_argument("--chunk-size", type=int, default=24, help="Characters per streamed chunk")
+    parser.add_argument("--response-chars", type=int, default=600, help="Length of each simulated answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls failing with a 503")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Fraction of calls with a long stall")
+    parser.add_argument("--stall", type=float, default=1.0, help="Stall length (seconds)")
+    parser.add_argument("--cache", action="store_true", help="Allow the response cache (off by default)")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for the fake backend")
+    parser.add_argument("--output", "-o", help="Write results JSON here (e.g. to record a baseline)")
+    parser.add_argument("--baseline", "-b", help="Compare against a results JSON saved earlier")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed relative change before a metric counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit non-zero when the baseline comparison finds a regression")
+                        
+    args = parser.parse_args()
+    
+    results = asyncio.run(run(args))
+    print_results(results)
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Results written to {args.output}")
+        
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        ok = compare_to_baseline(results, baseline, args.tolerance)
+        if not ok and args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
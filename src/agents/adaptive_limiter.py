@@ -0,0 +1,141 @@
+"""
+Adaptive Concurrency Limiter
+AIMD control of in-flight Bedrock calls driven by throttling signals
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+    "ServiceUnavailableException",
+    "RequestLimitExceeded"
+}
+
+class LoadShedError(Exception):
+    """Raised when a request is shed instead of queued or its queue deadline passes"""
+
+def is_throttling_error(error: BaseException) -> bool:
+    """True for botocore errors that signal Bedrock throttling"""
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        code = response.get("Error", {}).get("Code")
+        if code in THROTTLING_ERROR_CODES:
+            return True
+    return type(error).__name__ in THROTTLING_ERROR_CODES
+
+class AdaptiveConcurrencyLimiter:
+    """Additive-increase / multiplicative-decrease concurrency limit.
+    
+    Each healthy completion raises the limit by ``increase / limit`` (about
+    +``increase`` per full window). A throttle cuts it by
+    ``decrease_factor``, at most once per window: only requests that
+    started after the last cut can cut again. Requests over the limit wait
+    in FIFO order until ``queue_timeout`` and are then shed.
+    """
+    
+    def __init__(self,
+                 initial_limit: float = 8,
+                 min_limit: float = 1,
+                 max_limit: float = 64,
+                 increase: float = 1.0,
+                 decrease_factor: float = 0.5,
+                 latency_threshold_ms: Optional[float] = None,
+                 queue_timeout: float = 10.0,
+                 max_queue: int = 256):
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_threshold_ms = latency_threshold_ms
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        
+        self.in_flight = 0
+        self.shed = 0
+        self.throttles = 0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        
+    async def acquire(self, timeout: Optional[float] = None) -> float:
+        """Wait for a slot; returns the start time to pass to ``release``"""
+        
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return time.monotonic()
+            
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            raise LoadShedError("Bedrock concurrency queue is full")
+            
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout if timeout is not None else self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            self.shed += 1
+            raise LoadShedError("Timed out waiting for Bedrock capacity")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just as we were cancelled; give it back
+                self._release_slot()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                
+        return time.monotonic()
+        
+    def release(self, started: float, error: Optional[BaseException] = None):
+        """Return a slot and adapt the limit to the call's outcome"""
+        
+        latency_ms = (time.monotonic() - started) * 1000
+        
+        if error is not None and is_throttling_error(error):
+            self.throttles += 1
+            if started >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                self._last_decrease = time.monotonic()
+        elif error is None and (
+            self.latency_threshold_ms is None or latency_ms <= self.latency_threshold_ms
+        ):
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            
+        self._release_slot()
+        
+    def _release_slot(self):
+        self.in_flight -= 1
+        # Hand freed capacity to waiters in arrival order
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+                
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "shed": self.shed,
+            "throttles": self.throttles
+        }
+
+_shared_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+_shared_limiter_lock = threading.Lock()
+
+def get_shared_limiter() -> AdaptiveConcurrencyLimiter:
+    """The limiter shared by every FinancialAgent in the process"""
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AdaptiveConcurrencyLimiter()
+        return _shared_limiter
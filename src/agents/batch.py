@@ -0,0 +1,454 @@
+"""
+Batch Inference Jobs
+Bulk prompts as Bedrock batch-inference JSONL, with job tracking and a local executor
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .context_encoder import ContextEncoder
+from .financial_agent import FinancialAgent
+from .scheduler import BATCH, PriorityScheduler
+from ..services.aws_clients import get_client
+
+ANTHROPIC_VERSION = "bedrock-2023-05-31"
+
+# Bedrock job statuses after which a job never changes again
+TERMINAL_STATUSES = ("Completed", "PartiallyCompleted", "Failed", "Stopped", "Expired")
+# Terminal statuses that have an output file to read
+OUTPUT_STATUSES = ("Completed", "PartiallyCompleted")
+
+# Batch records are answered like the direct path, with its system prompt
+BATCH_SYSTEM_PROMPT = FinancialAgent.DIRECT_SYSTEM_PROMPT
+
+@dataclass
+class BatchItem:
+    """One prompt in a batch job"""
+    query: str
+    record_id: str = ""
+    session_id: Optional[str] = None
+    context: Optional[Dict[str, Any]] = None
+
+@dataclass
+class BatchJob:
+    """A submitted batch and, once finished, its per-item results"""
+    job_id: str
+    model_id: str
+    items: List[BatchItem]
+    status: str = "Submitted"
+    # Executor's reference to the job (ARN for Bedrock)
+    handle: Any = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    completed_at: Optional[str] = None
+    results: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+        
+    def to_dict(self) -> Dict[str, Any]:
+        succeeded = sum(1 for result in self.results.values() if result["success"])
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "model_id": self.model_id,
+            "records": len(self.items),
+            "succeeded": succeeded,
+            "failed": len(self.results) - succeeded,
+            "error": self.error,
+            "created_at": self.created_at,
+            "completed_at": self.completed_at
+        }
+
+def build_model_input(query: str,
+                      context: Optional[Dict[str, Any]] = None,
+                      max_tokens: int = 4000,
+                      temperature: float = 0.1,
+                      system_prompt: str = BATCH_SYSTEM_PROMPT,
+                      encoder: Optional[ContextEncoder] = None) -> Dict[str, Any]:
+    """Anthropic Messages body for one record, as InvokeModel would take it"""
+    
+    text = query
+    if context:
+        text += f"\n\nContext:\n{(encoder or ContextEncoder()).encode(context).text}"
+        
+    return {
+        "anthropic_version": ANTHROPIC_VERSION,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "system": system_prompt,
+        "messages": [{"role": "user", "content": [{"type": "text", "text": text}]}]
+    }
+
+def write_input_jsonl(records: List[Dict[str, Any]]) -> str:
+    """Batch-inference input file: one ``{"recordId", "modelInput"}`` per line"""
+    return "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+
+def parse_output_jsonl(text: str, job: BatchJob) -> Dict[str, Dict[str, Any]]:
+    """Per-item results, shaped like route_query responses, keyed by record id.
+    
+    Records missing from the output (e.g. a partially completed job) come
+    back as failures rather than being dropped.
+    """
+    
+    timestamp = datetime.utcnow().isoformat()
+    outputs: Dict[str, Dict[str, Any]] = {}
+    for line in text.splitlines():
+        if line.strip():
+            record = json.loads(line)
+            outputs[record.get("recordId", "")] = record
+            
+    results = {}
+    for item in job.items:
+        record = outputs.get(item.record_id)
+        result: Dict[str, Any] = {
+            "success": False,
+            "response": "",
+            "session_id": item.session_id or f"batch_{job.job_id}_{item.record_id}",
+            "timestamp": timestamp,
+            "route": {"path": "batch", "job_id": job.job_id, "record_id": item.record_id}
+        }
+        if record is None:
+            result["error"] = "No output for record"
+        elif record.get("error"):
+            error = record["error"]
+            result["error"] = error.get("errorMessage", str(error)) if isinstance(error, dict) else str(error)
+        else:
+            content = record.get("modelOutput", {}).get("content", [])
+            result["success"] = True
+            result["response"] = "".join(
+                block.get("text", "") for block in content if block.get("type") == "text"
+            )
+        results[item.record_id] = result
+    return results
+
+class BedrockBatchExecutor:
+    """Runs jobs with Bedrock batch inference, staging files in S3.
+    
+    Bedrock requires a minimum number of records per job (100 at the time
+    of writing) and usually finishes within hours, so poll sparingly.
+    """
+    
+    poll_interval = 60.0
+    
+    def __init__(self,
+                 bucket: str,
+                 role_arn: str,
+                 region: Optional[str] = None,
+                 prefix: str = "batch-inference"):
+        self.bucket = bucket
+        self.role_arn = role_arn
+        self.region = region
+        self.prefix = prefix.strip("/")
+        
+    def submit(self, job_id: str, model_id: str, input_jsonl: str) -> Dict[str, str]:
+        key = f"{self.prefix}/{job_id}/input.jsonl"
+        get_client("s3", self.region).put_object(
+            Bucket=self.bucket, Key=key, Body=input_jsonl.encode("utf-8")
+        )
+        response = get_client("bedrock", self.region).create_model_invocation_job(
+            jobName=job_id,
+            roleArn=self.role_arn,
+            modelId=model_id,
+            inputDataConfig={"s3InputDataConfig": {"s3Uri": f"s3://{self.bucket}/{key}"}},
+            outputDataConfig={"s3OutputDataConfig": {
+                "s3Uri": f"s3://{self.bucket}/{self.prefix}/{job_id}/output/"
+            }}
+        )
+        return {"job_arn": response["jobArn"], "job_id": job_id}
+        
+    def status(self, handle: Dict[str, str]) -> str:
+        job = get_client("bedrock", self.region).get_model_invocation_job(
+            jobIdentifier=handle["job_arn"]
+        )
+        return job["status"]
+        
+    def fetch_output(self, handle: Dict[str, str]) -> str:
+        # Bedrock writes <output uri>/<job arn id>/<input file name>.out
+        arn_id = handle["job_arn"].rsplit("/", 1)[-1]
+        key = f"{self.prefix}/{handle['job_id']}/output/{arn_id}/input.jsonl.out"
+        response = get_client("s3", self.region).get_object(Bucket=self.bucket, Key=key)
+        return response["Body"].read().decode("utf-8")
+
+def converse_handler(region: Optional[str] = None) -> Callable[[str, Dict[str, Any]], Dict[str, Any]]:
+    """Handler answering an Anthropic Messages body through the Converse API"""
+    
+    def handle(model_id: str, model_input: Dict[str, Any]) -> Dict[str, Any]:
+        response = get_client("bedrock-runtime", region).converse(
+            modelId=model_id,
+            system=[{"text": model_input["system"]}] if model_input.get("system") else [],
+            messages=[
+                {
+                    "role": message["role"],
+                    "content": [{"text": block["text"]} for block in message["content"] if "text" in block]
+                }
+                for message in model_input["messages"]
+            ],
+            inferenceConfig={
+                "maxTokens": model_input.get("max_tokens", 4000),
+                "temperature": model_input.get("temperature", 0.1)
+            }
+        )
+        usage = response.get("usage", {})
+        return {
+            "type": "message",
+            "role": "assistant",
+            "content": [
+                {"type": "text", "text": block["text"]}
+                for block in response["output"]["message"]["content"] if "text" in block
+            ],
+            "stop_reason": response.get("stopReason"),
+            "usage": {
+                "input_tokens": usage.get("inputTokens"),
+                "output_tokens": usage.get("outputTokens")
+            }
+        }
+        
+    return handle
+
+class LocalBatchExecutor:
+    """Processes batch JSONL in process with a worker pool (no S3, no batch API).
+    
+    Produces the same output file format and statuses as Bedrock, so jobs
+    can be exercised end to end without AWS. The pool is separate from the
+    interactive Bedrock pool. With a ``scheduler`` each record also takes a
+    slot in its batch class, so records yield live capacity to interactive
+    and analysis traffic; create the executor on the scheduler's loop.
+    """
+    
+    poll_interval = 0.5
+    
+    def __init__(self,
+                 handler: Optional[Callable[[str, Dict[str, Any]], Dict[str, Any]]] = None,
+                 max_workers: int = 4,
+                 scheduler: Optional[PriorityScheduler] = None):
+        self.handler = handler or converse_handler()
+        self.scheduler = scheduler
+        self._loop = asyncio.get_running_loop() if scheduler is not None else None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch")
+        self._jobs: Dict[str, List[tuple]] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        
+    def submit(self, job_id: str, model_id: str, input_jsonl: str) -> str:
+        futures = []
+        for line in input_jsonl.splitlines():
+            if line.strip():
+                record = json.loads(line)
+                future = self._pool.submit(self._run_record, model_id, record["modelInput"])
+                futures.append((record, future))
+        with self._lock:
+            self._jobs[job_id] = futures
+        return job_id
+        
+    def _run_record(self, model_id: str, model_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer one record, inside a batch-class slot when scheduled"""
+        
+        if self.scheduler is None:
+            return self.handler(model_id, model_input)
+            
+        granted = asyncio.run_coroutine_threadsafe(self.scheduler.acquire(BATCH), self._loop)
+        while True:
+            try:
+                state = granted.result(timeout=1.0)
+                break
+            except concurrent.futures.TimeoutError:
+                # Never outlive the executor waiting for a slot
+                if self._closed:
+                    granted.cancel()
+                    raise RuntimeError("Batch executor shut down")
+        try:
+            return self.handler(model_id, model_input)
+        finally:
+            try:
+                self._loop.call_soon_threadsafe(self.scheduler.release, state)
+            except RuntimeError:
+                # Event loop already closed; nothing left to release into
+                pass
+                
+    def status(self, handle: str) -> str:
+        with self._lock:
+            futures = self._jobs.get(handle)
+        if futures is None:
+            return "Failed"
+        if not all(future.done() for _, future in futures):
+            return "InProgress"
+        failed = sum(1 for _, future in futures if future.exception() is not None)
+        if failed == len(futures) and futures:
+            return "Failed"
+        return "PartiallyCompleted" if failed else "Completed"
+        
+    def fetch_output(self, handle: str) -> str:
+        with self._lock:
+            futures = self._jobs.pop(handle, [])
+        lines = []
+        for record, future in futures:
+            output = {"recordId": record["recordId"], "modelInput": record["modelInput"]}
+            error = future.exception()
+            if error is None:
+                output["modelOutput"] = future.result()
+            else:
+                output["error"] = {"errorCode": 500, "errorMessage": str(error)}
+            lines.append(output)
+        return write_input_jsonl(lines)
+        
+    def shutdown(self):
+        self._closed = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+class BatchJobManager:
+    """Submits batch jobs, tracks their status and collects their results.
+    
+    Each job is followed by a background task that polls the executor until
+    the job reaches a terminal status, then parses the output file into
+    per-item results. Finished jobs are kept up to ``max_jobs``, oldest
+    evicted first.
+    """
+    
+    def __init__(self,
+                 executor,
+                 model_id: str,
+                 max_tokens: int = 4000,
+                 temperature: float = 0.1,
+                 system_prompt: str = BATCH_SYSTEM_PROMPT,
+                 max_jobs: int = 100):
+        self.executor = executor
+        self.model_id = model_id
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.system_prompt = system_prompt
+        self.max_jobs = max_jobs
+        self.encoder = ContextEncoder()
+        self._jobs: "OrderedDict[str, BatchJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        
+    def build_input(self, job: BatchJob) -> str:
+        """Assign record ids where missing and render the job's input JSONL"""
+        
+        records = []
+        for index, item in enumerate(job.items):
+            item.record_id = item.record_id or f"r{index:06d}"
+            records.append({
+                "recordId": item.record_id,
+                "modelInput": build_model_input(
+                    item.query,
+                    item.context,
+                    max_tokens=self.max_tokens,
+                    temperature=self.temperature,
+                    system_prompt=self.system_prompt,
+                    encoder=self.encoder
+                )
+            })
+        return write_input_jsonl(records)
+        
+    async def submit(self, items: List[BatchItem], model_id: Optional[str] = None) -> BatchJob:
+        """Write and submit a job, then track it in the background"""
+        
+        if not items:
+            raise ValueError("A batch job needs at least one item")
+        record_ids = [item.record_id for item in items if item.record_id]
+        if len(record_ids) != len(set(record_ids)):
+            raise ValueError("Record ids must be unique within a job")
+            
+        job = BatchJob(
+            job_id=f"batch-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}",
+            model_id=model_id or self.model_id,
+            items=items
+        )
+        input_jsonl = self.build_input(job)
+        
+        loop = asyncio.get_running_loop()
+        try:
+            job.handle = await loop.run_in_executor(
+                None, self.executor.submit, job.job_id, job.model_id, input_jsonl
+            )
+        except Exception as e:
+            job.status, job.error = "Failed", str(e)
+            job.completed_at = datetime.utcnow().isoformat()
+            self.failed += 1
+            self._store(job)
+            return job
+            
+        self.submitted += 1
+        self._store(job)
+        self._tasks[job.job_id] = asyncio.create_task(self._track(job))
+        return job
+        
+    async def _track(self, job: BatchJob):
+        """Poll until the job finishes, then load its results"""
+        
+        loop = asyncio.get_running_loop()
+        try:
+            while not job.done:
+                job.status = await loop.run_in_executor(None, self.executor.status, job.handle)
+                if not job.done:
+                    await asyncio.sleep(self.executor.poll_interval)
+                    
+            if job.status in OUTPUT_STATUSES:
+                output = await loop.run_in_executor(None, self.executor.fetch_output, job.handle)
+                job.results = parse_output_jsonl(output, job)
+            else:
+                job.error = job.error or f"Job ended with status {job.status}"
+        except Exception as e:
+            job.status, job.error = "Failed", str(e)
+        finally:
+            self._tasks.pop(job.job_id, None)
+            
+        job.completed_at = datetime.utcnow().isoformat()
+        if job.status in OUTPUT_STATUSES:
+            self.completed += 1
+        else:
+            self.failed += 1
+            
+    def _store(self, job: BatchJob):
+        self._jobs[job.job_id] = job
+        # Evict the oldest finished jobs; running ones are never dropped
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].done:
+                del self._jobs[job_id]
+                
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self._jobs.get(job_id)
+        
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        return [job.to_dict() for job in reversed(self._jobs.values())]
+        
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[BatchJob]:
+        """Wait for a job to finish (mainly for scripts and local runs)"""
+        
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.wait_for(asyncio.shield(task), timeout)
+        return self._jobs.get(job_id)
+        
+    async def close(self):
+        """Stop tracking jobs (application shutdown)"""
+        
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if hasattr(self.executor, "shutdown"):
+            self.executor.shutdown()
+            
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "executor": type(self.executor).__name__,
+            "jobs": len(self._jobs),
+            "running": len(self._tasks),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed
+        }
@@ -0,0 +1,141 @@
+"""
+Request Coalescing
+Single-flight sharing of identical concurrent agent invocations
+"""
+
+import asyncio
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+# Sentinel marking the end of a broadcast stream
+_DONE = object()
+
+class _Call:
+    """An in-flight awaitable shared by several waiters"""
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class _Broadcast:
+    """An in-flight stream fanned out to several subscribers"""
+    
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.chunks: list = []
+        self.subscribers: Set[asyncio.Queue] = set()
+        
+    def publish(self, item: Any, error: Optional[BaseException] = None):
+        for queue in self.subscribers:
+            queue.put_nowait((item, error))
+
+class SingleFlight:
+    """Coalesces identical concurrent calls into one execution.
+    
+    The shared work runs in its own task, so a waiter that is cancelled
+    (for example a disconnected client) only stops waiting; the work is
+    cancelled once no waiters remain.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self.coalesced = 0
+        
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``func()``, sharing the result with concurrent callers of ``key``"""
+        
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finish_call(key, call))
+        else:
+            self.coalesced += 1
+            
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self._forget_call(key, call)
+                call.task.cancel()
+                
+    async def stream(self,
+                     key: str,
+                     factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Iterate ``factory()``, fanning chunks out to concurrent callers of ``key``.
+        
+        Subscribers that join late first receive the chunks already produced.
+        """
+        
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.ensure_future(self._pump(key, broadcast, factory))
+        else:
+            self.coalesced += 1
+            
+        queue: asyncio.Queue = asyncio.Queue()
+        for chunk in broadcast.chunks:
+            queue.put_nowait((chunk, None))
+        broadcast.subscribers.add(queue)
+        
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is _DONE:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            broadcast.subscribers.discard(queue)
+            if not broadcast.subscribers and not broadcast.task.done():
+                self._forget_stream(key, broadcast)
+                broadcast.task.cancel()
+                
+    async def _pump(self,
+                    key: str,
+                    broadcast: _Broadcast,
+                    factory: Callable[[], AsyncIterator[Any]]):
+        """Drive the shared stream and publish each chunk"""
+        
+        error = None
+        try:
+            async with aclosing(factory()) as source:
+                async for chunk in source:
+                    broadcast.chunks.append(chunk)
+                    broadcast.publish(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            self._forget_stream(key, broadcast)
+            
+        broadcast.publish(_DONE, error)
+        
+    def _finish_call(self, key: str, call: _Call):
+        self._forget_call(key, call)
+        if not call.task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            call.task.exception()
+            
+    def _forget_call(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+            
+    def _forget_stream(self, key: str, broadcast: _Broadcast):
+        if self._streams.get(key) is broadcast:
+            del self._streams[key]
+            
+    def get_stats(self) -> Dict[str, int]:
+        """Coalescing counters"""
+        return {
+            "in_flight_calls": len(self._calls),
+            "in_flight_streams": len(self._streams),
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,222 @@
+"""
+Compact Context Encoder
+Shrinks prompt context: tables for record lists, rounded floats, token budget
+"""
+
+import json
+import math
+import numbers
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .history import estimate_tokens
+from .telemetry import current_trace
+
+_OMITTED = re.compile(r"\.\.\. (\d+) more")
+
+class _Table(dict):
+    """Marker for record lists encoded as a column header plus rows"""
+
+@dataclass
+class EncodedContext:
+    """Encoded context text and its token accounting"""
+    text: str
+    tokens: int
+    raw_tokens: int
+    truncated: bool = False
+    
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.raw_tokens - self.tokens, 0)
+        
+    def report(self) -> Dict[str, Any]:
+        return {
+            "tokens": self.tokens,
+            "raw_tokens": self.raw_tokens,
+            "tokens_saved": self.tokens_saved,
+            "truncated": self.truncated
+        }
+
+class ContextEncoder:
+    """Encodes prompt context compactly within a token budget.
+    
+    Lists of records become ``{"columns": [...], "rows": [[...], ...]}``,
+    floats are rounded to ``float_precision`` decimals and null or empty
+    fields are dropped. If the result exceeds ``max_tokens`` the largest
+    field is shrunk first: tables keep their leading rows and gain
+    per-column min/max/mean stats, long strings and lists are cut.
+    """
+    
+    MIN_STRING_CHARS = 32
+    
+    def __init__(self, float_precision: int = 4, max_tokens: int = 1500):
+        self.float_precision = float_precision
+        self.max_tokens = max_tokens
+        self.requests = 0
+        self.total_tokens_saved = 0
+        
+    def encode(self, data: Any, max_tokens: Optional[int] = None) -> EncodedContext:
+        """Encode ``data`` and report the tokens saved versus indented JSON.
+        
+        The report is also added to the current request trace, if any.
+        """
+        
+        budget = self.max_tokens if max_tokens is None else max_tokens
+        raw_tokens = estimate_tokens(json.dumps(data, indent=2, default=str))
+        
+        # Held in a container so a top-level table, list or string can be
+        # shrunk like any nested field
+        holder = {"value": self._compact(data)}
+        text = self._dump(holder["value"])
+        truncated = False
+        while estimate_tokens(text) > budget and self._shrink_largest(holder):
+            truncated = True
+            text = self._dump(holder["value"])
+            
+        encoded = EncodedContext(
+            text=text,
+            tokens=estimate_tokens(text),
+            raw_tokens=raw_tokens,
+            truncated=truncated
+        )
+        self.requests += 1
+        self.total_tokens_saved += encoded.tokens_saved
+        # Per-request savings go on the request's trace
+        trace = current_trace()
+        if trace is not None:
+            trace.record_context(encoded.report())
+        return encoded
+        
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "total_tokens_saved": self.total_tokens_saved
+        }
+        
+    def _dump(self, value: Any) -> str:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+        
+    def _compact(self, value: Any) -> Any:
+        """Round, drop nulls and tabulate record lists; None means drop"""
+        
+        if value is None or isinstance(value, (bool, str)):
+            return value
+        if isinstance(value, numbers.Integral):
+            return int(value)
+        if isinstance(value, numbers.Real):
+            return self._round(float(value))
+        if isinstance(value, dict):
+            compacted = {}
+            for key, item in value.items():
+                item = self._compact(item)
+                if not self._is_empty(item):
+                    compacted[str(key)] = item
+            return compacted
+        if isinstance(value, (list, tuple)):
+            if len(value) > 1 and all(isinstance(item, dict) for item in value):
+                return self._tabulate(value)
+            items = [self._compact(item) for item in value]
+            return [item for item in items if not self._is_empty(item)]
+        return str(value)
+        
+    def _round(self, value: float) -> Optional[float]:
+        if math.isnan(value) or math.isinf(value):
+            return None
+        rounded = round(value, self.float_precision)
+        if rounded.is_integer() and abs(rounded) < 2 ** 53:
+            return int(rounded)
+        return rounded
+        
+    def _is_empty(self, value: Any) -> bool:
+        return value is None or (isinstance(value, (dict, list, str)) and not value)
+        
+    def _tabulate(self, records: List[Dict]) -> "_Table":
+        """Header once, then one positional row per record"""
+        
+        rows = [self._compact(record) for record in records]
+        columns: List[str] = []
+        seen = set()
+        for row in rows:
+            for key in row:
+                if key not in seen:
+                    seen.add(key)
+                    columns.append(key)
+                    
+        return _Table(columns=columns, rows=[[row.get(c) for c in columns] for row in rows])
+        
+    def _shrink_largest(self, root: Any) -> bool:
+        """Shrink the largest shrinkable field in place; False if none is left"""
+        
+        candidates: List[Tuple[int, Any, Any]] = []
+        self._collect(root, None, None, candidates)
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        
+        for _, parent, key in candidates:
+            if self._shrink(parent, key):
+                return True
+        return False
+        
+    def _collect(self, node: Any, parent: Any, key: Any, out: List[Tuple[int, Any, Any]]):
+        """Gather shrinkable fields with their encoded sizes"""
+        
+        if parent is not None and isinstance(node, (_Table, list, str)):
+            out.append((len(self._dump(node)), parent, key))
+        if isinstance(node, _Table):
+            return
+        if isinstance(node, dict):
+            for child_key, child in node.items():
+                self._collect(child, node, child_key, out)
+        elif isinstance(node, list):
+            for index, child in enumerate(node):
+                self._collect(child, node, index, out)
+                
+    def _shrink(self, parent: Any, key: Any) -> bool:
+        node = parent[key]
+        
+        if isinstance(node, _Table):
+            rows = node["rows"]
+            if not rows:
+                return False
+            if "stats" not in node:
+                node["stats"] = self._column_stats(node["columns"], rows)
+            keep = len(rows) // 2
+            node["omitted_rows"] = node.get("omitted_rows", 0) + len(rows) - keep
+            node["rows"] = rows[:keep]
+            return True
+            
+        if isinstance(node, list):
+            omitted = 0
+            if node and isinstance(node[-1], str) and _OMITTED.fullmatch(node[-1]):
+                omitted = int(_OMITTED.fullmatch(node[-1]).group(1))
+                node = node[:-1]
+            if len(node) <= 1:
+                return False
+            keep = len(node) // 2
+            parent[key] = node[:keep] + [f"... {omitted + len(node) - keep} more"]
+            return True
+            
+        if isinstance(node, str):
+            if len(node) <= 2 * self.MIN_STRING_CHARS:
+                return False
+            parent[key] = node[:len(node) // 2] + "..."
+            return True
+            
+        return False
+        
+    def _column_stats(self, columns: List[str], rows: List[List[Any]]) -> Dict[str, List[float]]:
+        """min/max/mean for each numeric column, computed before rows are cut"""
+        
+        stats = {}
+        for index, column in enumerate(columns):
+            values = [
+                row[index] for row in rows
+                if isinstance(row[index], (int, float)) and not isinstance(row[index], bool)
+            ]
+            if values:
+                stats[column] = [
+                    min(values),
+                    max(values),
+                    self._round(sum(values) / len(values))
+                ]
+        return stats
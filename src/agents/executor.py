@@ -0,0 +1,210 @@
+"""
+Bedrock Execution Layer
+Runs blocking boto3 calls off the event loop with bounded concurrency
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+from .adaptive_limiter import AdaptiveConcurrencyLimiter, LoadShedError, get_shared_limiter
+from .hedging import Deadline
+from .telemetry import add_span
+
+DEFAULT_POOL_SIZE = 32
+
+_shared_pool: Optional[ThreadPoolExecutor] = None
+_shared_pool_lock = threading.Lock()
+
+# Sentinel marking the end of a drained stream
+_DONE = object()
+
+def get_shared_pool(max_workers: int = DEFAULT_POOL_SIZE) -> ThreadPoolExecutor:
+    """Return the process-wide thread pool used for Bedrock calls"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="bedrock"
+            )
+        return _shared_pool
+
+def shutdown_shared_pool(wait: bool = False):
+    """Shut down the shared pool (called on application shutdown)"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is not None:
+            _shared_pool.shutdown(wait=wait, cancel_futures=True)
+            _shared_pool = None
+
+class BedrockExecutor:
+    """Runs blocking Bedrock calls on a size-bounded thread pool.
+    
+    Each executor caps how many calls it has in flight; callers beyond the
+    cap wait on a semaphore and are counted in ``queue_depth``. Calls then
+    pass through the process-wide adaptive limiter, which backs off when
+    Bedrock throttles.
+    """
+    
+    def __init__(self,
+                 max_in_flight: int = 8,
+                 pool: Optional[ThreadPoolExecutor] = None,
+                 limiter: Optional[AdaptiveConcurrencyLimiter] = None):
+        self.max_in_flight = max_in_flight
+        self._pool = pool
+        self.limiter = limiter if limiter is not None else get_shared_limiter()
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        return self._pool or get_shared_pool()
+        
+    async def _acquire(self, deadline: Optional[Deadline]) -> float:
+        """Take an in-flight slot and a limiter permit within the deadline.
+        
+        Returns the limiter start time; the slot is given back by
+        ``_submit`` once the worker thread finishes.
+        """
+        waiting_since = time.perf_counter()
+        self.queue_depth += 1
+        try:
+            if deadline is None:
+                await self._semaphore.acquire()
+            else:
+                await asyncio.wait_for(self._semaphore.acquire(), deadline.remaining())
+        except asyncio.TimeoutError:
+            raise LoadShedError("Deadline passed waiting for an executor slot")
+        finally:
+            self.queue_depth -= 1
+            
+        try:
+            timeout = None
+            if deadline is not None:
+                timeout = min(deadline.remaining(), self.limiter.queue_timeout)
+            started = await self.limiter.acquire(timeout)
+        except BaseException:
+            self._semaphore.release()
+            raise
+            
+        add_span("executor_wait", time.perf_counter() - waiting_since)
+        self.in_flight += 1
+        return started
+        
+    def _submit(self, started: float, func: Callable[[], Any]) -> concurrent.futures.Future:
+        """Run ``func`` on the pool, releasing the slot when the thread is done.
+        
+        A caller cancelled mid-call (a hedge loser, an expired deadline)
+        stops waiting, but the boto3 call keeps its thread and connection
+        until it returns, so the slot and permit are held until then too.
+        """
+        loop = asyncio.get_running_loop()
+        
+        def finished(future: concurrent.futures.Future):
+            try:
+                loop.call_soon_threadsafe(self._release, started, future)
+            except RuntimeError:
+                # Event loop already closed; nothing left to release into
+                pass
+                
+        try:
+            future = self.pool.submit(func)
+        except BaseException:
+            self._release(started, None)
+            raise
+        future.add_done_callback(finished)
+        return future
+        
+    def _release(self, started: float, future: Optional[concurrent.futures.Future]):
+        error = None
+        if future is not None and not future.cancelled():
+            error = future.exception()
+            if error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+        self.in_flight -= 1
+        self.limiter.release(started, error)
+        self._semaphore.release()
+        
+    async def run(self,
+                  func: Callable[..., Any],
+                  *args,
+                  deadline: Optional[Deadline] = None,
+                  **kwargs) -> Any:
+        """Run a blocking callable in the pool and await its result"""
+        
+        # Carry the caller's context (e.g. its request trace) into the thread
+        context = contextvars.copy_context()
+        started = await self._acquire(deadline)
+        future = self._submit(started, lambda: context.run(func, *args, **kwargs))
+        return await asyncio.wrap_future(future)
+        
+    async def stream(self,
+                     func: Callable[..., Iterable[Any]],
+                     *args,
+                     deadline: Optional[Deadline] = None,
+                     **kwargs) -> AsyncIterator[Any]:
+        """Drain a blocking iterable in the pool, yielding items as they arrive.
+        
+        The slot is held until the stream is exhausted or, if the consumer
+        stops iterating, until the worker thread notices and returns.
+        """
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        
+        def publish(item: Any, error: Optional[BaseException] = None):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+            except RuntimeError:
+                # Event loop already closed; nobody is listening
+                stop.set()
+                
+        def produce():
+            try:
+                for item in func(*args, **kwargs):
+                    if stop.is_set():
+                        return
+                    publish(item)
+            except BaseException as e:
+                publish(_DONE, e)
+                raise
+            else:
+                publish(_DONE)
+                
+        context = contextvars.copy_context()
+        started = await self._acquire(deadline)
+        future = self._submit(started, lambda: context.run(produce))
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is _DONE:
+                    # The thread is returning; its slot is released before
+                    # this resolves, so a drained stream holds no slot
+                    await asyncio.wait([asyncio.wrap_future(future)])
+                    if error is not None:
+                        raise error
+                    break
+                yield item
+        finally:
+            stop.set()
+            
+    def get_metrics(self) -> Dict[str, Any]:
+        """Current concurrency metrics"""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed
+        }
@@ -0,0 +1,76 @@
+"""
+Fast-Path Routing
+Cheap local classifier deciding between direct model calls and the agent
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+
+DIRECT = "direct"
+AGENT = "agent"
+
+# Wording that implies live data, user state or a multi-step tool workflow
+_TOOL_HINTS = re.compile(
+    r"\b(price|prices|quote|current|today|latest|now|live|my|our|portfolio|holdings?|"
+    r"position|chart|rsi|sma|volume|news|earnings|report|analy[sz]e|compare|forecast|"
+    r"predict|backtest|screen|calculate|rebalance|allocate)\b",
+    re.IGNORECASE
+)
+
+# $AAPL style cashtags, or bare upper-case words that are not common acronyms
+_CASHTAG = re.compile(r"\$[A-Za-z]{1,5}\b")
+_UPPER_WORD = re.compile(r"\b[A-Z]{2,5}\b")
+COMMON_ACRONYMS = {
+    "ETF", "ETFS", "IPO", "ROI", "ROE", "EPS", "CEO", "CFO", "GDP", "CPI", "USD",
+    "EUR", "GBP", "APR", "APY", "NAV", "IRA", "ESG", "FX", "PE", "EBIT", "EBITDA",
+    "DCF", "CAPM", "WACC", "REIT", "SEC", "FED", "AI", "US", "UK", "EU"
+}
+
+_DEFINITIONAL = re.compile(
+    r"^\s*(what\s+(is|are|does)|define|explain|meaning\s+of|difference\s+between|"
+    r"how\s+(does|do|is|are)|why\s+(is|are|do|does))\b",
+    re.IGNORECASE
+)
+
+@dataclass
+class RouteDecision:
+    """Which invocation path a query takes, and why"""
+    path: str
+    reason: str
+    
+    def to_dict(self) -> Dict[str, str]:
+        return {"path": self.path, "reason": self.reason}
+
+class QueryPathClassifier:
+    """Sends simple, tool-free queries to the direct model path.
+    
+    Anything that carries context, names a ticker or asks for live data or
+    calculations stays on the agent path, which has the action groups.
+    ``symbols`` are tickers already detected for the query (e.g. from
+    company names), which the patterns here cannot see.
+    """
+    
+    def __init__(self, max_direct_words: int = 40, max_short_words: int = 15):
+        self.max_direct_words = max_direct_words
+        self.max_short_words = max_short_words
+        
+    def classify(self,
+                 query: str,
+                 context: Optional[Dict] = None,
+                 symbols: Optional[Sequence[str]] = None) -> RouteDecision:
+        if context:
+            return RouteDecision(AGENT, "context")
+        if len(query.split()) > self.max_direct_words:
+            return RouteDecision(AGENT, "long_query")
+        if _TOOL_HINTS.search(query):
+            return RouteDecision(AGENT, "tool_keyword")
+        if symbols or _CASHTAG.search(query) or any(
+            word not in COMMON_ACRONYMS for word in _UPPER_WORD.findall(query)
+        ):
+            return RouteDecision(AGENT, "ticker")
+        if _DEFINITIONAL.search(query):
+            return RouteDecision(DIRECT, "definitional")
+        if len(query.split()) <= self.max_short_words:
+            return RouteDecision(DIRECT, "short_no_tools")
+        return RouteDecision(AGENT, "default")
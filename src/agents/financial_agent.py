@@ -3,12 +3,28 @@ Financial AI Agent - Core Implementation
 Amazon Bedrock AgentCore with Claude Sonnet
 """
 
-import boto3
-import json
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+import codecs
+from typing import Dict, List, Any, Optional, AsyncIterator, Callable, Iterable, Iterator, Tuple
+from contextlib import aclosing
+from dataclasses import dataclass, field
 from datetime import datetime
 import asyncio
+import time
+
+from .adaptive_limiter import LoadShedError
+from .executor import BedrockExecutor
+from .coalescing import SingleFlight
+from .context_encoder import ContextEncoder
+from .fast_path import AGENT, DIRECT, QueryPathClassifier, RouteDecision
+from .hedging import Deadline, HedgedCaller, HedgePolicy
+from .history import HISTORY_KEY, HistoryManager
+from .intent_classifier import IntentClassifier
+from .response_cache import DiskCacheBackend, ResponseCache
+from .scheduler import INTERACTIVE, PriorityScheduler
+from .session_store import MemorySessionStore, SessionRecord
+from .telemetry import RequestTrace, current_trace, span
+from .tools import ToolRegistry, build_financial_tools
+from ..services.aws_clients import get_client
 
 @dataclass
 class AgentConfig:
@@ -18,46 +34,143 @@ class AgentConfig:
     region: str = "us-east-1"
     max_tokens: int = 4000
     temperature: float = 0.1
+    max_in_flight: int = 8
+    # Model for the direct fast path; None keeps every query on the agent
+    fast_model_id: Optional[str] = None
+    # Failover/hedge regions. The direct path can use any of them; the agent
+    # path only those where the agent is deployed (region -> agent_id)
+    secondary_regions: List[str] = field(default_factory=list)
+    regional_agent_ids: Dict[str, str] = field(default_factory=dict)
+    hedge: bool = False
+    hedge_percentile: float = 95.0
 
 class FinancialAgent:
     """Main Financial AI Agent using Bedrock AgentCore"""
     
+    DIRECT_SYSTEM_PROMPT = (
+        "You are a sophisticated financial AI agent. Answer concisely and "
+        "accurately for a professional audience."
+    )
+    
+    TOOL_SYSTEM_PROMPT = (
+        "You are a sophisticated financial AI agent. Use the provided tools for "
+        "every figure you report rather than estimating it, then explain the "
+        "results for a professional audience."
+    )
+    
     def __init__(self, config: AgentConfig):
         self.config = config
-        self.bedrock_agent = boto3.client(
-            'bedrock-agent-runtime',
-            region_name=config.region
-        )
-        self.bedrock = boto3.client(
-            'bedrock-runtime',
-            region_name=config.region
+        # Clients (and their connection pools) are shared across agents
+        self.bedrock_agent = get_client('bedrock-agent-runtime', config.region)
+        self.bedrock = get_client('bedrock-runtime', config.region)
+        self.executor = BedrockExecutor(max_in_flight=config.max_in_flight)
+        self.context_encoder = ContextEncoder()
+        
+        policy = HedgePolicy(percentile=config.hedge_percentile)
+        agent_regions = [config.region] + [
+            region for region in config.secondary_regions if region in config.regional_agent_ids
+        ]
+        self.agent_regions = HedgedCaller(agent_regions, policy, hedge=config.hedge)
+        self.model_regions = HedgedCaller(
+            [config.region] + config.secondary_regions, policy, hedge=config.hedge
         )
         
+    def _build_request(self,
+                       query: str,
+                       session_id: str,
+                       context: Optional[Dict] = None) -> Dict[str, Any]:
+        """Build the invoke_agent request body"""
+        
+        request_body = {
+            "inputText": query,
+            "sessionId": session_id,
+            "agentId": self.config.agent_id,
+            "agentAliasId": "TSTALIASID"
+        }
+        
+        if context:
+            # Session attributes must be strings; encode structured values compactly
+            request_body["sessionState"] = {
+                "sessionAttributes": {
+                    key: value if isinstance(value, str) else self.context_encoder.encode(value).text
+                    for key, value in context.items()
+                }
+            }
+            
+        return request_body
+    
     async def invoke_agent(self, 
                           query: str, 
                           session_id: str,
-                          context: Optional[Dict] = None) -> Dict[str, Any]:
+                          context: Optional[Dict] = None,
+                          deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Invoke the financial agent with a query"""
         
         try:
             # Prepare the request
-            request_body = {
-                "inputText": query,
-                "sessionId": session_id,
-                "agentId": self.config.agent_id,
-                "agentAliasId": "TSTALIASID"
-            }
+            with span("prompt"):
+                request_body = self._build_request(query, session_id, context)
             
-            if context:
-                request_body["sessionState"] = {
-                    "sessionAttributes": context
-                }
+            # Invoke the agent and drain the stream off the event loop,
+            # hedging across regions within the deadline
+            result = await self._hedged_call(
+                self.agent_regions,
+                lambda region, trace: self._invoke_blocking(request_body, region, trace),
+                deadline
+            )
             
-            # Invoke the agent
-            response = self.bedrock_agent.invoke_agent(**request_body)
+            return {
+                "success": True,
+                "response": result,
+                "session_id": session_id,
+                "timestamp": datetime.utcnow().isoformat()
+            }
             
-            # Process streaming response
-            result = await self._process_streaming_response(response)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "session_id": session_id,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+    
+    async def stream_agent(self,
+                           query: str,
+                           session_id: str,
+                           context: Optional[Dict] = None,
+                           deadline: Optional[Deadline] = None) -> AsyncIterator[str]:
+        """Invoke the agent and yield decoded text chunks as they arrive"""
+        
+        with span("prompt"):
+            request_body = self._build_request(query, session_id, context)
+        
+        def generate(region: str, trace: Optional[RequestTrace]) -> Iterator[str]:
+            with span("bedrock_request"):
+                response = self._agent_client(region).invoke_agent(
+                    **{**request_body, "agentId": self._agent_id_for(region)}
+                )
+            yield from self._iter_completion_text(response, trace)
+        
+        source = self._hedged_stream(self.agent_regions, generate, deadline)
+        async with aclosing(source) as stream:
+            async for text in stream:
+                yield text
+    
+    async def invoke_model(self,
+                           query: str,
+                           session_id: str,
+                           context: Optional[Dict] = None,
+                           deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Answer directly with the fast model, bypassing agent orchestration"""
+        
+        try:
+            with span("prompt"):
+                request_body = self._build_converse_request(query, context)
+            result = await self._hedged_call(
+                self.model_regions,
+                lambda region, trace: "".join(self._converse_blocking(request_body, region, trace)),
+                deadline
+            )
             
             return {
                 "success": True,
@@ -74,22 +187,274 @@ class FinancialAgent:
                 "timestamp": datetime.utcnow().isoformat()
             }
     
-    async def _process_streaming_response(self, response) -> str:
-        """Process the streaming response from Bedrock Agent"""
+    async def stream_model(self,
+                           query: str,
+                           session_id: str,
+                           context: Optional[Dict] = None,
+                           deadline: Optional[Deadline] = None) -> AsyncIterator[str]:
+        """Stream a direct fast-model answer"""
+        
+        with span("prompt"):
+            request_body = self._build_converse_request(query, context)
         
-        result_text = ""
+        source = self._hedged_stream(
+            self.model_regions,
+            lambda region, trace: self._converse_blocking(request_body, region, trace),
+            deadline
+        )
+        async with aclosing(source) as stream:
+            async for text in stream:
+                yield text
+    
+    def _build_converse_request(self,
+                                query: str,
+                                context: Optional[Dict] = None,
+                                model_id: Optional[str] = None,
+                                system_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """Build a Converse request, for the fast model unless told otherwise"""
+        
+        text = query
+        if context:
+            text += f"\n\nContext:\n{self.context_encoder.encode(context).text}"
+            
+        return {
+            "modelId": model_id or self.config.fast_model_id or self.config.model_id,
+            "system": [{"text": system_prompt or self.DIRECT_SYSTEM_PROMPT}],
+            "messages": [{"role": "user", "content": [{"text": text}]}],
+            "inferenceConfig": {
+                "maxTokens": self.config.max_tokens,
+                "temperature": self.config.temperature
+            }
+        }
+    
+    async def invoke_with_tools(self,
+                                query: str,
+                                session_id: str,
+                                tools: ToolRegistry,
+                                context: Optional[Dict] = None,
+                                deadline: Optional[Deadline] = None,
+                                max_rounds: int = 5) -> Dict[str, Any]:
+        """Answer with the main model, running its tool calls locally.
+        
+        Each round the model either answers or asks for tools; requested
+        tools run concurrently in-process and their compact results go back
+        in the next round. Model and tool time are reported separately.
+        """
+        
+        try:
+            with span("prompt"):
+                request_body = self._build_converse_request(
+                    query, context, model_id=self.config.model_id, system_prompt=self.TOOL_SYSTEM_PROMPT
+                )
+                request_body["toolConfig"] = tools.converse_tool_config()
+            messages = request_body["messages"]
+            calls = []
+            model_ms = 0.0
+            tool_ms = 0.0
+            
+            for _ in range(max_rounds):
+                start = time.perf_counter()
+                response = await self.model_regions.call(
+                    lambda region: self.executor.run(
+                        self._converse_once, request_body, region, deadline=deadline
+                    ),
+                    deadline
+                )
+                model_ms += (time.perf_counter() - start) * 1000
+                self._record_usage(response)
+                
+                message = response["output"]["message"]
+                messages.append(message)
+                uses = [block["toolUse"] for block in message["content"] if "toolUse" in block]
+                
+                if response.get("stopReason") != "tool_use" or not uses:
+                    return {
+                        "success": True,
+                        "response": "".join(block.get("text", "") for block in message["content"]),
+                        "session_id": session_id,
+                        "timestamp": datetime.utcnow().isoformat(),
+                        "timing": {
+                            "model_ms": round(model_ms, 1),
+                            "tool_ms": round(tool_ms, 3),
+                            "rounds": len(messages) // 2
+                        },
+                        "tool_calls": [result.to_dict() for result in calls]
+                    }
+                
+                start = time.perf_counter()
+                with span("tools"):
+                    results = await tools.execute_all(
+                        [(use["name"], use.get("input") or {}) for use in uses], session_id
+                    )
+                tool_ms += (time.perf_counter() - start) * 1000
+                calls.extend(results)
+                
+                messages.append({
+                    "role": "user",
+                    "content": [
+                        {
+                            "toolResult": {
+                                "toolUseId": use["toolUseId"],
+                                "content": [{"text": tools.encode_result(result)}],
+                                "status": "error" if result.error else "success"
+                            }
+                        }
+                        for use, result in zip(uses, results)
+                    ]
+                })
+            
+            raise Exception(f"Model still requesting tools after {max_rounds} rounds")
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "session_id": session_id,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+    
+    def _converse_once(self, request_body: Dict[str, Any], region: Optional[str] = None) -> Dict[str, Any]:
+        """Single non-streaming Converse call (runs in a worker thread)"""
+        
+        return self._model_client(region).converse(**request_body)
+    
+    async def _hedged_call(self,
+                           regions: HedgedCaller,
+                           blocking: Callable[[str, Optional[RequestTrace]], Any],
+                           deadline: Optional[Deadline]) -> Any:
+        """Hedged ``blocking(region, trace)`` call; only the winner's output is counted"""
+        
+        trace = current_trace()
+        
+        async def attempt(region: str):
+            tally = trace.attempt() if trace is not None else None
+            result = await self.executor.run(blocking, region, tally, deadline=deadline)
+            return result, tally
+            
+        result, tally = await regions.call(attempt, deadline)
+        if tally is not None:
+            trace.merge_output(tally)
+        return result
+    
+    async def _hedged_stream(self,
+                             regions: HedgedCaller,
+                             blocking: Callable[[str, Optional[RequestTrace]], Iterable[str]],
+                             deadline: Optional[Deadline]) -> AsyncIterator[str]:
+        """Hedged stream of ``blocking(region, trace)``; only the winner's output is counted"""
+        
+        trace = current_trace()
+        
+        def attempt(region: str) -> AsyncIterator[Tuple[str, Optional[RequestTrace]]]:
+            tally = trace.attempt() if trace is not None else None
+            
+            async def tagged():
+                source = self.executor.stream(blocking, region, tally, deadline=deadline)
+                async with aclosing(source) as items:
+                    async for item in items:
+                        yield item, tally
+                        
+            return tagged()
+            
+        winner = None
+        try:
+            async with aclosing(regions.stream(attempt, deadline)) as stream:
+                async for text, winner in stream:
+                    yield text
+        finally:
+            if winner is not None:
+                trace.merge_output(winner)
+    
+    def _converse_blocking(self,
+                           request_body: Dict[str, Any],
+                           region: Optional[str] = None,
+                           trace: Optional[RequestTrace] = None) -> Iterator[str]:
+        """Call converse_stream and yield text deltas (runs in a worker thread)"""
+        
+        with span("bedrock_request"):
+            response = self._model_client(region).converse_stream(**request_body)
+        for event in response['stream']:
+            delta = event.get('contentBlockDelta', {}).get('delta', {})
+            if 'text' in delta:
+                if trace is not None:
+                    trace.record_output(delta['text'])
+                yield delta['text']
+            elif 'metadata' in event:
+                self._record_usage(event['metadata'], trace)
+    
+    def _record_usage(self, payload: Dict[str, Any], trace: Optional[RequestTrace] = None):
+        """Take the exact output token count from a Converse usage block"""
+        
+        trace = trace if trace is not None else current_trace()
+        output_tokens = payload.get('usage', {}).get('outputTokens')
+        if trace is not None and output_tokens is not None:
+            trace.output_tokens = (trace.output_tokens or 0) + output_tokens
+    
+    def _invoke_blocking(self,
+                         request_body: Dict[str, Any],
+                         region: Optional[str] = None,
+                         trace: Optional[RequestTrace] = None) -> str:
+        """Call invoke_agent and drain its stream (runs in a worker thread)"""
+        
+        with span("bedrock_request"):
+            response = self._agent_client(region).invoke_agent(
+                **{**request_body, "agentId": self._agent_id_for(region)}
+            )
+        with span("bedrock_stream"):
+            return self._process_streaming_response(response, trace)
+    
+    def _agent_client(self, region: Optional[str]):
+        if region in (None, self.config.region):
+            return self.bedrock_agent
+        return get_client('bedrock-agent-runtime', region)
+    
+    def _model_client(self, region: Optional[str]):
+        if region in (None, self.config.region):
+            return self.bedrock
+        return get_client('bedrock-runtime', region)
+    
+    def _agent_id_for(self, region: Optional[str]) -> str:
+        return self.config.regional_agent_ids.get(region, self.config.agent_id)
+    
+    def get_region_metrics(self) -> Dict[str, Any]:
+        """Region health and hedging counters for each invocation path"""
+        
+        return {
+            "agent": self.agent_regions.get_metrics(),
+            "model": self.model_regions.get_metrics()
+        }
+    
+    def _iter_completion_text(self, response, trace: Optional[RequestTrace] = None) -> Iterator[str]:
+        """Decode the completion event stream incrementally.
+        
+        Multi-byte UTF-8 characters can be split across chunk boundaries,
+        so bytes are fed through an incremental decoder rather than decoded
+        chunk by chunk.
+        """
+        
+        decoder = codecs.getincrementaldecoder('utf-8')()
         
         try:
             for event in response['completion']:
                 if 'chunk' in event:
                     chunk = event['chunk']
                     if 'bytes' in chunk:
-                        result_text += chunk['bytes'].decode('utf-8')
-                        
+                        text = decoder.decode(chunk['bytes'])
+                        if text:
+                            if trace is not None:
+                                trace.record_output(text)
+                            yield text
+            
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+                
         except Exception as e:
             raise Exception(f"Error processing streaming response: {str(e)}")
-            
-        return result_text
+    
+    def _process_streaming_response(self, response, trace: Optional[RequestTrace] = None) -> str:
+        """Process the streaming response from Bedrock Agent"""
+        
+        return "".join(self._iter_completion_text(response, trace))
     
     def create_financial_prompt(self, 
                                query: str, 
@@ -116,55 +481,504 @@ class FinancialAgent:
         """
         
         if data_context:
-            base_prompt += f"\n\nAdditional Context:\n{json.dumps(data_context, indent=2)}"
+            encoded = self.context_encoder.encode(data_context)
+            base_prompt += f"\n\nAdditional Context:\n{encoded.text}"
             
         return base_prompt
 
 class AgentOrchestrator:
     """Orchestrates multiple specialized financial agents"""
     
-    def __init__(self):
+    def __init__(self,
+                 response_cache: Optional[ResponseCache] = None,
+                 tools: Optional[ToolRegistry] = None,
+                 cache_path: Optional[str] = None):
         self.agents = {}
         self.session_manager = SessionManager()
-    
+        self.history = HistoryManager(self.session_manager)
+        # On disk when a path is given, so cached answers survive restarts
+        self.response_cache = response_cache or ResponseCache(
+            backend=DiskCacheBackend(cache_path) if cache_path else None
+        )
+        self.single_flight = SingleFlight()
+        self.path_classifier = QueryPathClassifier()
+        self.intent_classifier = IntentClassifier()
+        self.route_stats: Dict[str, Dict[str, float]] = {}
+        self.scheduler = PriorityScheduler()
+        self.tools = tools if tools is not None else build_financial_tools()
+        
     def register_agent(self, name: str, agent: FinancialAgent):
         """Register a specialized agent"""
         self.agents[name] = agent
     
+    def with_history(self, session_id: str, context: Optional[Dict] = None) -> Optional[Dict]:
+        """Context plus the session's bounded conversation history, if any"""
+        
+        history = self.history.render_history(session_id)
+        if not history:
+            return context
+        return {**(context or {}), HISTORY_KEY: history}
+    
+    def record_exchange(self, session_id: str, query: str, result: Dict[str, Any]):
+        """Add a successful exchange to the session's history"""
+        
+        if result.get("success") and result.get("response"):
+            # Exchanges the agent ran in this session are in its own memory
+            route = result.get("route") or {}
+            in_memory = not result.get("cached") and route.get("agent_session") == session_id
+            self.history.add_turn(session_id, "user", query, agent_session=in_memory)
+            self.history.add_turn(session_id, "assistant", result["response"], agent_session=in_memory)
+    
     async def route_query(self, 
                          query: str, 
                          session_id: str,
-                         agent_type: str = "general") -> Dict[str, Any]:
+                         agent_type: str = "general",
+                         context: Optional[Dict] = None,
+                         use_cache: bool = True,
+                         priority: str = INTERACTIVE,
+                         deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Route query to appropriate specialized agent"""
         
+        agent_type = self._resolve_agent_type(agent_type)
+        agent = self.agents[agent_type]
+        decision = self._choose_path(agent, query, context)
+        
+        if not use_cache:
+            return await self._invoke(agent, decision, query, session_id, context, priority, deadline)
+        
+        with span("cache_lookup"):
+            cache_key = self._cache_key(agent, agent_type, decision, query, session_id, context)
+            cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return self._from_cache(cached, session_id)
+        
+        async def invoke_and_cache() -> Dict[str, Any]:
+            result = await self._invoke(agent, decision, query, session_id, context, priority, deadline)
+            self.response_cache.set(cache_key, agent_type, result)
+            return result
+        
+        # Identical concurrent queries share a single Bedrock invocation
+        result = await self.single_flight.do(cache_key, invoke_and_cache)
+        return {**result, "session_id": session_id}
+    
+    async def route_query_stream(self,
+                                 query: str,
+                                 session_id: str,
+                                 agent_type: str = "general",
+                                 context: Optional[Dict] = None,
+                                 use_cache: bool = True,
+                                 priority: str = INTERACTIVE,
+                                 deadline: Optional[Deadline] = None) -> AsyncIterator[str]:
+        """Route query to the appropriate agent and stream its response"""
+        
+        agent_type = self._resolve_agent_type(agent_type)
+        agent = self.agents[agent_type]
+        decision = self._choose_path(agent, query, context)
+        
+        if not use_cache:
+            source = self._stream(agent, decision, query, session_id, context, priority, deadline)
+        else:
+            with span("cache_lookup"):
+                cache_key = self._cache_key(agent, agent_type, decision, query, session_id, context)
+                cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                yield cached["response"]
+                return
+            
+            async def stream_and_cache() -> AsyncIterator[str]:
+                chunks = []
+                stream_source = self._stream(agent, decision, query, session_id, context, priority, deadline)
+                async with aclosing(stream_source) as stream:
+                    async for chunk in stream:
+                        chunks.append(chunk)
+                        yield chunk
+                self.response_cache.set(cache_key, agent_type, {
+                    "success": True,
+                    "response": "".join(chunks),
+                    "session_id": session_id,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "route": decision.to_dict()
+                })
+            
+            # Identical concurrent streams share one invocation, fanned out
+            source = self.single_flight.stream(cache_key, stream_and_cache)
+        
+        async with aclosing(source) as stream:
+            async for chunk in stream:
+                yield chunk
+    
+    async def route_query_with_tools(self,
+                                     query: str,
+                                     session_id: str,
+                                     agent_type: str = "general",
+                                     tool_data: Optional[Dict] = None,
+                                     context: Optional[Dict] = None,
+                                     use_cache: bool = True,
+                                     priority: str = INTERACTIVE,
+                                     deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Route a query to an agent that computes its figures with local tools.
+        
+        ``tool_data`` (e.g. a portfolio) is bound to the session for the
+        tools to read; only their compact results reach the model.
+        """
+        
+        agent_type = self._resolve_agent_type(agent_type)
+        agent = self.agents[agent_type]
+        self.tools.session(session_id, tool_data or {})
+        
+        async def invoke() -> Dict[str, Any]:
+            start = time.perf_counter()
+            try:
+                async with self.scheduler.slot(priority, timeout=deadline.remaining() if deadline else None):
+                    result = await agent.invoke_with_tools(
+                        query, session_id, self.tools, context, deadline
+                    )
+            except LoadShedError as e:
+                result = {
+                    "success": False,
+                    "error": str(e),
+                    "session_id": session_id,
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+            latency_ms = (time.perf_counter() - start) * 1000
+            self._record_route("tools", latency_ms)
+            return {**result, "route": {"path": "tools", "latency_ms": round(latency_ms, 1)}}
+        
+        if not use_cache:
+            return await invoke()
+        
+        cache_key = self.response_cache.make_key(
+            agent_type, f"{agent.config.model_id}+tools", query, {"tool_data": tool_data, "context": context}
+        )
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return self._from_cache(cached, session_id)
+        
+        async def invoke_and_cache() -> Dict[str, Any]:
+            result = await invoke()
+            self.response_cache.set(cache_key, agent_type, result)
+            return result
+        
+        result = await self.single_flight.do(cache_key, invoke_and_cache)
+        return {**result, "session_id": session_id}
+    
+    async def route_query_multi(self,
+                                query: str,
+                                session_id: str,
+                                agent_types: List[str],
+                                context: Optional[Dict] = None,
+                                use_cache: bool = True,
+                                priority: str = INTERACTIVE,
+                                deadline: Optional[Deadline] = None,
+                                agent_timeout: float = 45.0) -> Dict[str, Any]:
+        """Run several agents concurrently on one query and merge their answers.
+        
+        Each agent gets its own sub-session and at most ``agent_timeout``
+        seconds (less if the request deadline is sooner). Agents that fail or
+        time out are reported in ``agents`` without failing the request.
+        """
+        
+        agent_types = list(dict.fromkeys(
+            self._resolve_agent_type(agent_type) for agent_type in agent_types
+        )) or ["general"]
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            self._route_one(query, session_id, agent_type, context, use_cache,
+                            priority, deadline, agent_timeout)
+            for agent_type in agent_types
+        ))
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        merged = self._merge_results(dict(zip(agent_types, results)))
+        return {
+            **merged,
+            "session_id": session_id,
+            "route": {"path": "fan_out", "agents": agent_types, "latency_ms": round(latency_ms, 1)}
+        }
+    
+    async def _route_one(self,
+                         query: str,
+                         session_id: str,
+                         agent_type: str,
+                         context: Optional[Dict],
+                         use_cache: bool,
+                         priority: str,
+                         deadline: Optional[Deadline],
+                         agent_timeout: float) -> Dict[str, Any]:
+        """One fan-out branch; errors and timeouts become failed results"""
+        
+        agent_deadline = Deadline.after(agent_timeout)
+        if deadline is not None and deadline.expires_at < agent_deadline.expires_at:
+            agent_deadline = deadline
+        
+        try:
+            # Concurrent invocations may not share a Bedrock agent session
+            return await asyncio.wait_for(
+                self.route_query(query, f"{session_id}-{agent_type}", agent_type,
+                                 context, use_cache, priority, agent_deadline),
+                agent_deadline.remaining()
+            )
+        except asyncio.TimeoutError:
+            error = f"Timed out after {agent_timeout:g}s"
+        except Exception as e:
+            error = str(e)
+        
+        return {
+            "success": False,
+            "error": error,
+            "session_id": session_id,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
+    def _merge_results(self, results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine fan-out answers into one response, one section per agent"""
+        
+        succeeded = {
+            agent_type: result for agent_type, result in results.items() if result.get("success")
+        }
+        
+        if len(succeeded) == 1:
+            response = next(iter(succeeded.values()))["response"]
+        else:
+            response = "\n\n".join(
+                f"## {agent_type.title()} analysis\n\n{result['response'].strip()}"
+                for agent_type, result in succeeded.items()
+            )
+        
+        errors = [
+            f"{agent_type}: {result.get('error')}"
+            for agent_type, result in results.items() if not result.get("success")
+        ]
+        
+        return {
+            "success": bool(succeeded),
+            "response": response,
+            "error": "; ".join(errors) if errors else None,
+            "partial": bool(succeeded) and bool(errors),
+            "cached": bool(succeeded) and all(r.get("cached", False) for r in succeeded.values()),
+            "agents": {
+                agent_type: {
+                    "success": result.get("success", False),
+                    "error": result.get("error"),
+                    "cached": result.get("cached", False),
+                    "route": result.get("route")
+                }
+                for agent_type, result in results.items()
+            },
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
+    def _choose_path(self,
+                     agent: FinancialAgent,
+                     query: str,
+                     context: Optional[Dict]) -> RouteDecision:
+        """Pick the direct fast path or the full agent for a query"""
+        
+        if not agent.config.fast_model_id:
+            return RouteDecision(AGENT, "fast_path_disabled")
+        # Company names count as tickers too; those need market data
+        symbols = self.intent_classifier.extract_tickers(query)
+        # History alone does not need the agent; the direct prompt carries it
+        routing_context = {key: value for key, value in (context or {}).items() if key != HISTORY_KEY}
+        return self.path_classifier.classify(query, routing_context, symbols)
+    
+    def _agent_context(self, session_id: str, context: Optional[Dict]) -> Optional[Dict]:
+        """Context for the agent path, without history its session already holds"""
+        
+        if not context or HISTORY_KEY not in context or not self.history.in_agent_memory(session_id):
+            return context
+        return {key: value for key, value in context.items() if key != HISTORY_KEY} or None
+    
+    def _model_for(self, agent: FinancialAgent, decision: RouteDecision) -> str:
+        if decision.path == DIRECT:
+            return agent.config.fast_model_id
+        return agent.config.model_id
+    
+    def _cache_key(self,
+                   agent: FinancialAgent,
+                   agent_type: str,
+                   decision: RouteDecision,
+                   query: str,
+                   session_id: str,
+                   context: Optional[Dict]) -> str:
+        """Response cache key; agent answers in an ongoing session stay in it.
+        
+        The Bedrock agent keeps memory per session, so once a session has
+        turns its answer to the same query can differ from another's. A
+        session without history (a fresh /chat session, an analysis batch)
+        is as stateless as the direct path and shares answers, and
+        concurrent identical calls, across sessions.
+        """
+        
+        stateful = decision.path == AGENT and self.history.has_history(session_id)
+        return self.response_cache.make_key(
+            agent_type,
+            self._model_for(agent, decision),
+            query,
+            context,
+            session_id=session_id if stateful else None
+        )
+    
+    async def _invoke(self,
+                      agent: FinancialAgent,
+                      decision: RouteDecision,
+                      query: str,
+                      session_id: str,
+                      context: Optional[Dict],
+                      priority: str = INTERACTIVE,
+                      deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Invoke the chosen path and attach the routing decision and latency"""
+        
+        start = time.perf_counter()
+        try:
+            async with self.scheduler.slot(priority, timeout=deadline.remaining() if deadline else None):
+                if decision.path == DIRECT:
+                    result = await agent.invoke_model(query, session_id, context, deadline)
+                else:
+                    result = await agent.invoke_agent(
+                        query, session_id, self._agent_context(session_id, context), deadline
+                    )
+        except LoadShedError as e:
+            result = {
+                "success": False,
+                "error": str(e),
+                "session_id": session_id,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        self._record_route(decision.path, latency_ms)
+        route = {**decision.to_dict(), "latency_ms": round(latency_ms, 1)}
+        if decision.path == AGENT:
+            # Callers sharing this answer need to know whose session ran it
+            route["agent_session"] = session_id
+        return {**result, "route": route}
+    
+    async def _stream(self,
+                      agent: FinancialAgent,
+                      decision: RouteDecision,
+                      query: str,
+                      session_id: str,
+                      context: Optional[Dict],
+                      priority: str = INTERACTIVE,
+                      deadline: Optional[Deadline] = None) -> AsyncIterator[str]:
+        """Stream the chosen path, recording its latency once complete"""
+        
+        start = time.perf_counter()
+        if decision.path == DIRECT:
+            source = agent.stream_model(query, session_id, context, deadline)
+        else:
+            source = agent.stream_agent(query, session_id, self._agent_context(session_id, context), deadline)
+            
+        slot = self.scheduler.slot(priority, timeout=deadline.remaining() if deadline else None)
+        async with slot, aclosing(source) as stream:
+            async for chunk in stream:
+                yield chunk
+                
+        self._record_route(decision.path, (time.perf_counter() - start) * 1000)
+    
+    def _record_route(self, path: str, latency_ms: float):
+        stats = self.route_stats.setdefault(path, {"count": 0, "total_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += latency_ms
+    
+    def get_route_stats(self) -> Dict[str, Dict[str, float]]:
+        """Request count and mean latency per invocation path"""
+        
+        return {
+            path: {
+                "count": stats["count"],
+                "avg_latency_ms": round(stats["total_ms"] / stats["count"], 1)
+            }
+            for path, stats in self.route_stats.items()
+        }
+    
+    def _resolve_agent_type(self, agent_type: str) -> str:
+        """Resolve an agent type, falling back to the general agent"""
+        
         if agent_type not in self.agents:
             agent_type = "general"
             
-        agent = self.agents[agent_type]
-        return await agent.invoke_agent(query, session_id)
+        return agent_type
+    
+    def _from_cache(self, cached: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+        """Adapt a cached response to the requesting session"""
+        
+        return {**cached, "session_id": session_id, "cached": True}
+    
+    def get_executor_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """In-flight and queue-depth metrics for each registered agent"""
+        
+        return {name: agent.executor.get_metrics() for name, agent in self.agents.items()}
+    
+    def get_region_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Region health and hedging metrics for each registered agent"""
+        
+        return {name: agent.get_region_metrics() for name, agent in self.agents.items()}
+    
+    def get_context_encoding_stats(self) -> Dict[str, Any]:
+        """Tokens saved by compact encoding of agent prompts and tool results"""
+        
+        return {
+            "agents": {name: agent.context_encoder.get_stats() for name, agent in self.agents.items()},
+            "tools": self.tools.encoder.get_stats()
+        }
 
 class SessionManager:
     """Manages user sessions and context"""
     
-    def __init__(self):
-        self.sessions = {}
+    def __init__(self, store=None, max_history: int = 50):
+        self.store = store if store is not None else MemorySessionStore()
+        self.max_history = max_history
     
     def create_session(self, user_id: str) -> str:
         """Create a new session"""
-        session_id = f"{user_id}_{datetime.utcnow().timestamp()}"
-        self.sessions[session_id] = {
-            "user_id": user_id,
-            "created_at": datetime.utcnow(),
-            "context": {},
-            "history": []
-        }
+        now = datetime.utcnow().timestamp()
+        session_id = f"{user_id}_{now}"
+        self.store.put(SessionRecord(
+            session_id=session_id,
+            user_id=user_id,
+            created_at=now,
+            last_access=now
+        ))
         return session_id
     
+    def ensure_session(self, session_id: str, user_id: str = "anonymous") -> SessionRecord:
+        """Get a session, creating it under the caller's id if it is new"""
+        record = self.store.get(session_id)
+        if record is None:
+            now = datetime.utcnow().timestamp()
+            record = SessionRecord(
+                session_id=session_id,
+                user_id=user_id,
+                created_at=now,
+                last_access=now
+            )
+            self.store.put(record)
+        return record
+    
     def update_context(self, session_id: str, context: Dict):
         """Update session context"""
-        if session_id in self.sessions:
-            self.sessions[session_id]["context"].update(context)
+        record = self.store.get(session_id)
+        if record is not None:
+            record.context.update(context)
+            self.store.put(record)
     
-    def get_session(self, session_id: str) -> Optional[Dict]:
+    def append_history(self, session_id: str, role: str, content: str, **fields) -> Optional[SessionRecord]:
+        """Record a conversation turn, keeping at most max_history turns"""
+        record = self.store.get(session_id)
+        if record is not None:
+            record.turn_seq += 1
+            record.history.append({"role": role, "content": content, "seq": record.turn_seq, **fields})
+            del record.history[:-self.max_history]
+            self.store.put(record)
+        return record
+    
+    def get_session(self, session_id: str) -> Optional[SessionRecord]:
         """Get session data"""
-        return self.sessions.get(session_id)
\ No newline at end of file
+        return self.store.get(session_id)
+    
+    def save_session(self, record: SessionRecord):
+        """Persist a modified session record"""
+        self.store.put(record)
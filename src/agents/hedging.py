@@ -0,0 +1,322 @@
+"""
+Hedged Requests
+Deadlines, region health scoring and hedged multi-region Bedrock calls
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .adaptive_limiter import is_throttling_error
+
+# Transport failures worth retrying in another region
+_RETRYABLE_ERRORS = {
+    "EndpointConnectionError",
+    "ConnectTimeoutError",
+    "ReadTimeoutError",
+    "ConnectionClosedError"
+}
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when a request's deadline passes before it completes"""
+
+@dataclass(frozen=True)
+class Deadline:
+    """Absolute point on the monotonic clock by which a request must finish"""
+    expires_at: float
+    
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+        
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+        
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+def is_retryable_error(error: BaseException) -> bool:
+    """True for throttling, 5xx and connection errors another region may not have"""
+    if is_throttling_error(error) or type(error).__name__ in _RETRYABLE_ERRORS:
+        return True
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return status >= 500
+    return False
+
+@dataclass
+class HedgePolicy:
+    """When to send a backup request to the next region"""
+    # Hedge once the primary is slower than this percentile of its history
+    percentile: float = 95.0
+    min_delay: float = 0.2
+    max_delay: float = 10.0
+    # Used until a region has min_samples observations
+    default_delay: float = 2.0
+    min_samples: int = 20
+    # Extra concurrent requests per call; failover after errors is separate
+    max_hedges: int = 1
+
+def percentile(values: Iterable[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of unsorted values; None when there are none"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+class RegionHealth:
+    """Latency and error history for one region"""
+    
+    def __init__(self, region: str, window: int = 200, alpha: float = 0.2):
+        self.region = region
+        self.alpha = alpha
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.ewma_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        
+    def record(self, latency: float, ok: bool = True):
+        self.requests += 1
+        if ok:
+            self.samples.append(latency)
+            self.ewma_latency = latency if self.ewma_latency is None else (
+                self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+            )
+        else:
+            self.errors += 1
+        self.error_rate = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * self.error_rate
+        
+    def percentile(self, p: float) -> Optional[float]:
+        return percentile(self.samples, p)
+        
+    @property
+    def score(self) -> Optional[float]:
+        """Expected latency inflated by recent errors; lower is better"""
+        if self.ewma_latency is None:
+            return None if self.errors == 0 else math.inf
+        return self.ewma_latency * (1 + 4 * self.error_rate)
+        
+    def to_dict(self) -> Dict[str, Any]:
+        p50 = self.percentile(50)
+        p95 = self.percentile(95)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 3),
+            "ewma_ms": round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None
+        }
+
+class RegionHealthTracker:
+    """Ranks regions by observed health, keeping configured order on ties"""
+    
+    def __init__(self, regions: List[str], window: int = 200):
+        self.regions = list(dict.fromkeys(regions))
+        self._health = {region: RegionHealth(region, window) for region in self.regions}
+        
+    def get(self, region: str) -> RegionHealth:
+        return self._health[region]
+        
+    def record(self, region: str, latency: float, ok: bool = True):
+        self._health[region].record(latency, ok)
+        
+    def ranked(self) -> List[str]:
+        scores = [self._health[r].score for r in self.regions]
+        known = [s for s in scores if s is not None]
+        # Unsampled regions rank as well as the best known one, so the
+        # configured primary keeps its place until data says otherwise
+        neutral = min(known) if known else 0.0
+        order = sorted(
+            range(len(self.regions)),
+            key=lambda i: neutral if scores[i] is None else scores[i]
+        )
+        return [self.regions[i] for i in order]
+        
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {region: health.to_dict() for region, health in self._health.items()}
+
+class HedgedCaller:
+    """Runs a call against the healthiest region, hedging and failing over.
+    
+    The call starts in the best-ranked region. If it has not answered once
+    the hedge delay (a percentile of that region's latency) has passed, the
+    same call is sent to the next region and whichever answers first wins;
+    the loser is cancelled. Only completed attempts update region health.
+    Retryable errors fail over to the next region immediately. Everything
+    is bounded by the caller's deadline.
+    """
+    
+    def __init__(self,
+                 regions: List[str],
+                 policy: Optional[HedgePolicy] = None,
+                 hedge: bool = True):
+        self.policy = policy or HedgePolicy()
+        self.hedge = hedge
+        self.health = RegionHealthTracker(regions)
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self.deadline_exceeded = 0
+        
+    def hedge_delay(self, region: str) -> float:
+        health = self.health.get(region)
+        if len(health.samples) < self.policy.min_samples:
+            return self.policy.default_delay
+        delay = health.percentile(self.policy.percentile)
+        return min(self.policy.max_delay, max(self.policy.min_delay, delay))
+        
+    async def call(self,
+                   func: Callable[[str], Awaitable[Any]],
+                   deadline: Optional[Deadline] = None) -> Any:
+        """Await ``func(region)`` with hedging; time to the full result is scored"""
+        
+        _, result = await self._race(
+            lambda region: asyncio.ensure_future(func(region)), deadline
+        )
+        return result
+        
+    async def stream(self,
+                     factory: Callable[[str], AsyncIterator[Any]],
+                     deadline: Optional[Deadline] = None) -> AsyncIterator[Any]:
+        """Iterate ``factory(region)``, hedging on time to the first item.
+        
+        Once one region has produced its first item the stream is committed
+        to it; later failures are raised rather than replayed elsewhere.
+        """
+        
+        iterators: Dict[asyncio.Future, AsyncIterator[Any]] = {}
+        
+        def first_item(region: str) -> asyncio.Future:
+            iterator = factory(region)
+            task = asyncio.ensure_future(_first_or_end(iterator))
+            iterators[task] = iterator
+            return task
+            
+        try:
+            winner, first = await self._race(first_item, deadline)
+            iterator = iterators.pop(winner)
+        finally:
+            for loser in iterators.values():
+                await loser.aclose()
+                
+        try:
+            if first is _END:
+                return
+            yield first
+            while True:
+                next_item = iterator.__anext__()
+                if deadline is not None:
+                    next_item = asyncio.wait_for(next_item, deadline.remaining())
+                try:
+                    item = await next_item
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    self.deadline_exceeded += 1
+                    raise DeadlineExceeded("Deadline exceeded while streaming")
+                yield item
+        finally:
+            await iterator.aclose()
+            
+    async def _race(self,
+                    launch: Callable[[str], asyncio.Future],
+                    deadline: Optional[Deadline]) -> Tuple[asyncio.Future, Any]:
+        """Run attempts until one succeeds; returns the winning task and result"""
+        
+        candidates = deque(self.health.ranked())
+        pending: Dict[asyncio.Future, Tuple[str, float]] = {}
+        primary = candidates[0]
+        hedge_at: Optional[float] = None
+        hedged = 0
+        last_error: Optional[BaseException] = None
+        
+        def start_next():
+            region = candidates.popleft()
+            pending[launch(region)] = (region, time.monotonic())
+            
+        start_next()
+        if self.hedge and candidates:
+            hedge_at = time.monotonic() + self.hedge_delay(primary)
+            
+        try:
+            while pending:
+                waits = []
+                if hedge_at is not None:
+                    waits.append(max(0.0, hedge_at - time.monotonic()))
+                if deadline is not None:
+                    waits.append(deadline.remaining())
+                    
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=min(waits) if waits else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    if deadline is not None and deadline.expired:
+                        self.deadline_exceeded += 1
+                        raise DeadlineExceeded("Deadline exceeded waiting for Bedrock")
+                    if hedge_at is not None and time.monotonic() >= hedge_at:
+                        hedged += 1
+                        self.hedges += 1
+                        start_next()
+                        hedge_at = None
+                        if candidates and hedged < self.policy.max_hedges:
+                            hedge_at = time.monotonic() + self.hedge_delay(primary)
+                    continue
+                    
+                for task in done:
+                    region, started = pending.pop(task)
+                    latency = time.monotonic() - started
+                    error = task.exception()
+                    if error is None:
+                        self.health.record(region, latency)
+                        if hedged and region != primary:
+                            self.hedge_wins += 1
+                        return task, task.result()
+                    self.health.record(region, latency, ok=False)
+                    if not is_retryable_error(error):
+                        raise error
+                    last_error = error
+                    
+                if not pending and candidates:
+                    self.failovers += 1
+                    start_next()
+                    
+            raise last_error
+            
+        finally:
+            # Losers are cancelled unscored: their elapsed time is not a
+            # latency sample, and recording it would skew the hedge delay
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "hedging": self.hedge,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "deadline_exceeded": self.deadline_exceeded,
+            "ranked": self.health.ranked(),
+            "regions": self.health.get_metrics()
+        }
+
+# Marks a stream that ended before producing anything
+_END = object()
+
+async def _first_or_end(iterator: AsyncIterator[Any]) -> Any:
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return _END
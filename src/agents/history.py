@@ -0,0 +1,187 @@
+"""
+Conversation History Manager
+Token-budgeted session history with a rolling summary of older turns
+"""
+
+import asyncio
+import re
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Summarizer(previous_summary, turns_to_fold) -> new summary
+Summarizer = Callable[[str, List[Dict[str, Any]]], Awaitable[str]]
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Context key the rendered history is passed to the model under
+HISTORY_KEY = "conversation_history"
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)"""
+    return (len(text) + 3) // 4
+
+async def extractive_summarizer(previous: str, turns: List[Dict[str, Any]]) -> str:
+    """Local summarizer: keeps the first sentence of each folded turn"""
+    lines = [previous] if previous else []
+    for turn in turns:
+        first_sentence = _SENTENCE_END.split(turn["content"].strip(), 1)[0]
+        lines.append(f"{turn['role']}: {first_sentence[:200]}")
+    return "\n".join(lines)
+
+def agent_summarizer(agent) -> Summarizer:
+    """Summarizer that asks a FinancialAgent to fold turns into the summary"""
+    
+    async def summarize(previous: str, turns: List[Dict[str, Any]]) -> str:
+        transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+        prompt = (
+            "Update the running summary of this financial conversation. "
+            "Keep tickers, figures, user goals and decisions; drop pleasantries. "
+            "Reply with the summary only.\n\n"
+            f"Current summary:\n{previous or '(none)'}\n\n"
+            f"New turns:\n{transcript}"
+        )
+        result = await agent.invoke_agent(prompt, f"summary_{uuid.uuid4().hex}")
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", "summarization failed"))
+        return result["response"].strip()
+        
+    return summarize
+
+class HistoryManager:
+    """Keeps prompt history bounded regardless of session length.
+    
+    The last ``recent_turns`` turns are kept verbatim; older turns are
+    folded into a running summary by a background task, so summarization
+    never runs on the request's critical path.
+    """
+    
+    def __init__(self,
+                 session_manager,
+                 summarizer: Optional[Summarizer] = None,
+                 recent_turns: int = 6,
+                 max_prompt_tokens: int = 2000,
+                 max_summary_tokens: int = 400):
+        self.session_manager = session_manager
+        self.summarizer = summarizer or extractive_summarizer
+        self.recent_turns = recent_turns
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self._tasks: Dict[str, asyncio.Task] = {}
+        
+    def add_turn(self, session_id: str, role: str, content: str, **fields):
+        """Record a turn and schedule folding of turns outside the window"""
+        
+        self.session_manager.ensure_session(session_id)
+        record = self.session_manager.append_history(
+            session_id, role, content, tokens=estimate_tokens(content), **fields
+        )
+        
+        if record is not None and len(record.history) > self.recent_turns:
+            self._schedule_summary(session_id)
+            
+    def has_history(self, session_id: str) -> bool:
+        """Whether the session has any turns, recent or summarized"""
+        
+        record = self.session_manager.get_session(session_id)
+        return record is not None and bool(record.history or record.summary)
+        
+    def in_agent_memory(self, session_id: str) -> bool:
+        """Whether the Bedrock agent session already holds the whole history.
+        
+        True only if nothing has been summarized away and every turn was
+        answered by the agent itself under this session id.
+        """
+        
+        record = self.session_manager.get_session(session_id)
+        if record is None or record.summary or not record.history:
+            return False
+        return all(turn.get("agent_session") for turn in record.history)
+        
+    def get_prompt_history(self, session_id: str) -> Dict[str, Any]:
+        """Summary plus the newest turns that fit in the token budget"""
+        
+        record = self.session_manager.get_session(session_id)
+        if record is None:
+            return {"summary": "", "turns": [], "tokens": 0}
+            
+        summary_tokens = estimate_tokens(record.summary)
+        budget = self.max_prompt_tokens - summary_tokens
+        used = 0
+        turns = []
+        for turn in reversed(record.history):
+            tokens = turn.get("tokens") or estimate_tokens(turn["content"])
+            if used + tokens > budget:
+                break
+            turns.append({"role": turn["role"], "content": turn["content"]})
+            used += tokens
+        turns.reverse()
+        
+        return {"summary": record.summary, "turns": turns, "tokens": used + summary_tokens}
+        
+    def render_history(self, session_id: str) -> str:
+        """Prompt-ready text for the bounded history"""
+        
+        history = self.get_prompt_history(session_id)
+        sections = []
+        if history["summary"]:
+            sections.append(f"Conversation summary:\n{history['summary']}")
+        if history["turns"]:
+            lines = "\n".join(f"{t['role']}: {t['content']}" for t in history["turns"])
+            sections.append(f"Recent conversation:\n{lines}")
+        return "\n\n".join(sections)
+        
+    async def drain(self):
+        """Wait for pending background summaries"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+            
+    def _schedule_summary(self, session_id: str):
+        task = self._tasks.get(session_id)
+        if task is not None and not task.done():
+            # The running task re-checks the window before it exits
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (sync caller); the next turn added under a loop folds
+            return
+        task = loop.create_task(self._fold(session_id))
+        self._tasks[session_id] = task
+        task.add_done_callback(lambda t: self._forget_task(session_id, t))
+        
+    def _forget_task(self, session_id: str, task: asyncio.Task):
+        if self._tasks.get(session_id) is task:
+            del self._tasks[session_id]
+            
+    async def _fold(self, session_id: str):
+        """Fold turns older than the window into the summary until none remain"""
+        
+        while True:
+            record = self.session_manager.get_session(session_id)
+            if record is None or len(record.history) <= self.recent_turns:
+                return
+                
+            older = [dict(turn) for turn in record.history[:len(record.history) - self.recent_turns]]
+            try:
+                summary = await self.summarizer(record.summary, older)
+            except Exception:
+                # Leave the turns unfolded; the next turn retries
+                return
+                
+            # Re-read: turns may have been added while the summarizer ran
+            record = self.session_manager.get_session(session_id)
+            if record is None:
+                return
+            folded_seq = older[-1].get("seq", 0)
+            record.history = [t for t in record.history if t.get("seq", 0) > folded_seq]
+            record.summary = self._clip_summary(summary)
+            self.session_manager.save_session(record)
+            
+    def _clip_summary(self, summary: str) -> str:
+        """Keep the newest whole lines of an over-long summary"""
+        max_chars = self.max_summary_tokens * 4
+        if len(summary) <= max_chars:
+            return summary
+        clipped = summary[-max_chars:]
+        newline = clipped.find("\n")
+        return clipped[newline + 1:] if newline >= 0 else clipped
@@ -0,0 +1,286 @@
+"""
+Intent Classifier
+In-process agent_type routing and ticker detection for incoming queries
+"""
+
+import math
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .fast_path import COMMON_ACRONYMS
+
+INTENTS = ("general", "portfolio", "risk")
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+_CASHTAG = re.compile(r"\$([A-Za-z]{1,5})\b")
+_TICKER = re.compile(r"\b([A-Z]{1,5}(?:\.[A-Z])?)\b")
+
+# Phrase -> (intent, weight), matched on whole tokens
+INTENT_PHRASES: Dict[str, Tuple[str, float]] = {
+    "portfolio": ("portfolio", 1.5),
+    "rebalance": ("portfolio", 2.5),
+    "rebalancing": ("portfolio", 2.5),
+    "asset allocation": ("portfolio", 3.0),
+    "allocate": ("portfolio", 1.5),
+    "diversify": ("portfolio", 2.0),
+    "diversification": ("portfolio", 2.0),
+    "my holdings": ("portfolio", 2.5),
+    "position sizing": ("portfolio", 2.5),
+    "portfolio weights": ("portfolio", 3.0),
+    "optimize my portfolio": ("portfolio", 3.0),
+    "sharpe ratio": ("portfolio", 1.5),
+    "risk": ("risk", 1.0),
+    "risky": ("risk", 2.0),
+    "value at risk": ("risk", 3.0),
+    "var": ("risk", 1.0),
+    "stress test": ("risk", 3.0),
+    "drawdown": ("risk", 2.5),
+    "downside": ("risk", 2.0),
+    "volatility": ("risk", 1.5),
+    "hedge": ("risk", 2.0),
+    "exposure": ("risk", 1.5),
+    "credit risk": ("risk", 3.0),
+    "liquidity risk": ("risk", 3.0),
+    "market risk": ("risk", 3.0),
+    "tail risk": ("risk", 3.0),
+    "beta": ("risk", 1.0)
+}
+
+# Seed examples for the hashed n-gram model
+TRAINING_EXAMPLES: List[Tuple[str, str]] = [
+    ("what is a p/e ratio", "general"),
+    ("analyze apple stock", "general"),
+    ("latest news on tesla earnings", "general"),
+    ("explain how inflation affects bond yields", "general"),
+    ("what is the market outlook for tech", "general"),
+    ("compare microsoft and google revenue growth", "general"),
+    ("give me a summary of nvidia quarterly results", "general"),
+    ("what does the fed rate decision mean for stocks", "general"),
+    ("rebalance my portfolio toward value stocks", "portfolio"),
+    ("how should i allocate my savings between stocks and bonds", "portfolio"),
+    ("optimize the weights of my holdings", "portfolio"),
+    ("should i add more international funds to my portfolio", "portfolio"),
+    ("what is my portfolio return this year", "portfolio"),
+    ("suggest an asset allocation for retirement", "portfolio"),
+    ("am i too concentrated in tech positions", "portfolio"),
+    ("how much cash should my portfolio hold", "portfolio"),
+    ("how risky is my portfolio", "risk"),
+    ("calculate the value at risk of my positions", "risk"),
+    ("run a stress test for a market crash", "risk"),
+    ("what is my maximum drawdown", "risk"),
+    ("how can i hedge my downside", "risk"),
+    ("what is my exposure to interest rate changes", "risk"),
+    ("assess the credit risk of these bonds", "risk"),
+    ("how volatile are my holdings", "risk"),
+]
+
+# Company names that imply a ticker (matched on whole tokens)
+COMPANY_TICKERS: Dict[str, str] = {
+    "apple": "AAPL",
+    "google": "GOOGL",
+    "alphabet": "GOOGL",
+    "microsoft": "MSFT",
+    "amazon": "AMZN",
+    "oracle": "ORCL",
+    "tesla": "TSLA",
+    "nvidia": "NVDA",
+    "meta": "META",
+    "netflix": "NFLX"
+}
+
+# Widely traded symbols recognised even in an all-caps query
+KNOWN_SYMBOLS = set(COMPANY_TICKERS.values()) | {
+    "AMD", "INTC", "IBM", "JPM", "BAC", "GS", "WMT", "DIS", "KO", "PEP",
+    "XOM", "CVX", "PFE", "JNJ", "UNH", "COST", "AVGO", "CRM", "ADBE",
+    "SPY", "QQQ", "DIA", "IWM", "VOO", "VTI"
+}
+
+# English words of ticker length, so shouted or emphasised words are not
+# taken for symbols (each one would cost a market data call)
+STOP_WORDS = {
+    "A", "AN", "THE", "AND", "OR", "BUT", "NOT", "NO", "YES", "IF", "SO", "AS",
+    "AT", "BY", "FOR", "FROM", "IN", "INTO", "OF", "OFF", "ON", "OUT", "TO", "UP",
+    "WITH", "OVER", "UNDER", "I", "ME", "MY", "WE", "US", "OUR", "YOU", "YOUR",
+    "HE", "SHE", "IT", "ITS", "THEY", "THEM", "THIS", "THAT", "THESE", "THOSE",
+    "WHAT", "WHICH", "WHO", "WHY", "HOW", "WHEN", "WHERE", "IS", "ARE", "WAS",
+    "WERE", "BE", "BEEN", "AM", "DO", "DOES", "DID", "HAS", "HAVE", "HAD", "CAN",
+    "COULD", "WILL", "WOULD", "MAY", "MIGHT", "MUST", "SHALL", "GET", "GOT",
+    "BUY", "SELL", "HOLD", "SHORT", "LONG", "CALL", "CALLS", "PUT", "PUTS",
+    "STOCK", "SHARE", "BOND", "BONDS", "FUND", "FUNDS", "CASH", "DEBT", "RATE",
+    "RATES", "YIELD", "PRICE", "VALUE", "MONEY", "BEST", "GOOD", "BAD", "HIGH",
+    "LOW", "NOW", "NEW", "TODAY", "WEEK", "YEAR", "ALL", "ANY", "SOME", "MORE",
+    "MOST", "LESS", "VERY", "JUST", "ONLY", "ALSO", "THEN", "THAN", "ABOUT",
+    "TELL", "SHOW", "GIVE", "MAKE", "NEED", "WANT", "THINK", "KNOW", "HELP",
+    "PLEASE", "OK", "OKAY", "HI", "HEY", "THANK", "THANKS"
+}
+
+# Upper-case words that are not tickers in ordinary queries
+_NOT_TICKERS = COMMON_ACRONYMS | STOP_WORDS | {
+    "VAR", "CAGR", "YTD", "QOQ", "YOY",
+    "RSI", "SMA", "EMA", "MACD", "ATR", "OHLC", "PEG"
+}
+
+_WORD = re.compile(r"[A-Za-z]+")
+
+@dataclass
+class IntentResult:
+    """Routing decision and extracted entities for a query"""
+    agent_type: str
+    confidence: float
+    scores: Dict[str, float] = field(default_factory=dict)
+    tickers: List[str] = field(default_factory=list)
+    probabilities: Dict[str, float] = field(default_factory=dict)
+    
+    @property
+    def needs_market_data(self) -> bool:
+        return bool(self.tickers)
+        
+    def agent_types(self, min_probability: float = 0.15) -> List[str]:
+        """The chosen agent plus any other intent likely enough to consult"""
+        ranked = sorted(self.probabilities, key=self.probabilities.get, reverse=True)
+        return [self.agent_type] + [
+            intent for intent in ranked
+            if intent != self.agent_type and self.probabilities[intent] >= min_probability
+        ]
+        
+    def to_dict(self) -> Dict:
+        return {
+            "agent_type": self.agent_type,
+            "confidence": round(self.confidence, 3),
+            "tickers": self.tickers
+        }
+
+class _PhraseAutomaton:
+    """Token trie matching every known phrase in one left-to-right pass"""
+    
+    def __init__(self, phrases: Dict[str, Tuple[str, float]]):
+        self.root: Dict = {}
+        for phrase, value in phrases.items():
+            node = self.root
+            for token in phrase.split():
+                node = node.setdefault(token, {})
+            node[None] = value
+            
+    def scan(self, tokens: Sequence[str]) -> Dict[str, float]:
+        scores: Dict[str, float] = {}
+        for start in range(len(tokens)):
+            node = self.root
+            for token in tokens[start:]:
+                node = node.get(token)
+                if node is None:
+                    break
+                if None in node:
+                    intent, weight = node[None]
+                    scores[intent] = scores.get(intent, 0.0) + weight
+        return scores
+
+class IntentClassifier:
+    """Picks an agent type from a phrase automaton plus a hashed n-gram model.
+    
+    The linear model is an averaged multi-class perceptron over hashed word
+    unigrams and bigrams, trained on ``TRAINING_EXAMPLES`` at construction
+    (a few milliseconds); ``fit`` retrains it on other examples.
+    """
+    
+    def __init__(self,
+                 n_features: int = 1 << 12,
+                 min_confidence: float = 0.5,
+                 examples: Optional[List[Tuple[str, str]]] = None):
+        self.n_features = n_features
+        self.min_confidence = min_confidence
+        self.automaton = _PhraseAutomaton(INTENT_PHRASES)
+        self.weights: Dict[str, List[float]] = {}
+        self.fit(examples or TRAINING_EXAMPLES)
+        
+    def classify(self, query: str) -> IntentResult:
+        tokens = _TOKEN.findall(query.lower())
+        
+        scores = dict.fromkeys(INTENTS, 0.0)
+        for intent, score in self.automaton.scan(tokens).items():
+            scores[intent] += score
+        features = self._features(tokens)
+        for intent in INTENTS:
+            weights = self.weights[intent]
+            scores[intent] += sum(weights[f] for f in features)
+            
+        best = max(scores, key=scores.get)
+        probabilities = self._softmax(scores)
+        confidence = probabilities[best]
+        agent_type = best if confidence >= self.min_confidence else "general"
+        
+        return IntentResult(
+            agent_type=agent_type,
+            confidence=confidence,
+            scores=scores,
+            tickers=self.extract_tickers(query, tokens),
+            probabilities=probabilities
+        )
+        
+    def extract_tickers(self, query: str, tokens: Optional[Sequence[str]] = None) -> List[str]:
+        """Tickers named as cashtags, symbols or known company names, deduplicated.
+        
+        Bare upper-case words count only when they stand out from the
+        query; in a mostly upper-case query only known symbols do.
+        """
+        
+        found: List[str] = []
+        for match in _CASHTAG.finditer(query):
+            found.append(match.group(1).upper())
+        shouting = self._mostly_upper(query)
+        for match in _TICKER.finditer(query):
+            symbol = match.group(1)
+            if symbol in KNOWN_SYMBOLS:
+                found.append(symbol)
+            elif not shouting and symbol not in _NOT_TICKERS and len(symbol) > 1:
+                found.append(symbol)
+        for token in tokens if tokens is not None else _TOKEN.findall(query.lower()):
+            if token in COMPANY_TICKERS:
+                found.append(COMPANY_TICKERS[token])
+        return list(dict.fromkeys(found))
+        
+    def _mostly_upper(self, query: str, threshold: float = 0.5) -> bool:
+        """Whether most words are upper case (caps lock rather than symbols)"""
+        words = _WORD.findall(query)
+        if len(words) < 3:
+            return False
+        upper = sum(1 for word in words if len(word) > 1 and word.isupper())
+        return upper / len(words) > threshold
+        
+    def fit(self, examples: List[Tuple[str, str]], epochs: int = 8):
+        """Train the averaged perceptron on (query, intent) pairs"""
+        
+        weights = {intent: [0.0] * self.n_features for intent in INTENTS}
+        totals = {intent: [0.0] * self.n_features for intent in INTENTS}
+        encoded = [(self._features(_TOKEN.findall(q.lower())), label) for q, label in examples]
+        
+        steps = 0
+        for _ in range(epochs):
+            for features, label in encoded:
+                steps += 1
+                predicted = max(INTENTS, key=lambda i: sum(weights[i][f] for f in features))
+                if predicted == label:
+                    continue
+                for f in features:
+                    weights[label][f] += 1.0
+                    weights[predicted][f] -= 1.0
+                    # Lazy averaging: credit each update with the steps remaining
+                    totals[label][f] += 1.0 * (epochs * len(encoded) - steps + 1)
+                    totals[predicted][f] -= 1.0 * (epochs * len(encoded) - steps + 1)
+                    
+        total_steps = max(steps, 1)
+        self.weights = {
+            intent: [value / total_steps for value in totals[intent]]
+            for intent in INTENTS
+        }
+        
+    def _features(self, tokens: Sequence[str]) -> List[int]:
+        grams = list(tokens) + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return [zlib.crc32(gram.encode("utf-8")) % self.n_features for gram in grams]
+        
+    def _softmax(self, scores: Dict[str, float]) -> Dict[str, float]:
+        peak = max(scores.values())
+        exp = {intent: math.exp(score - peak) for intent, score in scores.items()}
+        total = sum(exp.values())
+        return {intent: value / total for intent, value in exp.items()}
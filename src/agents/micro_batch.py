@@ -0,0 +1,180 @@
+"""
+Symbol Analysis Micro-Batching
+Combines per-symbol analysis requests arriving close together into one prompt
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .hedging import Deadline
+from .scheduler import ANALYSIS
+
+BATCH_INSTRUCTIONS = (
+    "Analyze the current market data for each of these symbols: {symbols}.\n"
+    "For each one give a short assessment of recent price action, momentum "
+    "and notable risks.\n"
+    "Reply with only a JSON object mapping each symbol to its analysis as a "
+    "string, e.g. {{\"AAPL\": \"...\"}}."
+)
+
+class _Pending:
+    """A symbol waiting for the next batch, with everyone waiting on it"""
+    
+    def __init__(self, market_data: Optional[Dict[str, Any]]):
+        self.market_data = market_data
+        self.futures: List[asyncio.Future] = []
+        self.use_cache = True
+        self.deadline: Optional[Deadline] = None
+
+class SymbolAnalysisBatcher:
+    """Micro-batches symbol analysis into one structured model call.
+    
+    Requests arriving within ``window`` seconds of the first are combined,
+    up to ``max_symbols`` per prompt, so the shared instructions are paid
+    for once and many requests cost one round trip. The model is asked for
+    JSON keyed by symbol, which is split back out to each waiter. A symbol
+    requested twice in a window is analyzed once.
+    """
+    
+    def __init__(self,
+                 orchestrator,
+                 window: float = 0.05,
+                 max_symbols: int = 10,
+                 agent_type: str = "general"):
+        self.orchestrator = orchestrator
+        self.window = window
+        self.max_symbols = max_symbols
+        self.agent_type = agent_type
+        self._pending: Dict[str, _Pending] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self.requests = 0
+        self.symbols = 0
+        self.batches = 0
+        self.parse_failures = 0
+        
+    async def analyze(self,
+                      symbols: List[str],
+                      market_data: Optional[Dict[str, Dict[str, Any]]] = None,
+                      use_cache: bool = True,
+                      deadline: Optional[Deadline] = None) -> Dict[str, Dict[str, Any]]:
+        """Analysis per symbol: ``{"success", "analysis", "error"}``"""
+        
+        self.requests += 1
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        market_data = {symbol.upper(): data for symbol, data in (market_data or {}).items()}
+        futures = [self._enqueue(symbol, market_data.get(symbol), use_cache, deadline)
+                   for symbol in symbols]
+        results = await asyncio.gather(*futures)
+        return dict(zip(symbols, results))
+        
+    def _enqueue(self,
+                 symbol: str,
+                 market_data: Optional[Dict[str, Any]],
+                 use_cache: bool,
+                 deadline: Optional[Deadline]) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(symbol)
+        if pending is None:
+            pending = self._pending[symbol] = _Pending(market_data)
+        elif pending.market_data is None:
+            pending.market_data = market_data
+            
+        # One caller opting out of the cache opts the batch out; the batch
+        # has to finish by the earliest caller's deadline
+        pending.use_cache = pending.use_cache and use_cache
+        if deadline is not None:
+            if pending.deadline is None or deadline.expires_at < pending.deadline.expires_at:
+                pending.deadline = deadline
+                
+        future = loop.create_future()
+        pending.futures.append(future)
+        
+        if len(self._pending) >= self.max_symbols:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return future
+        
+    def _flush(self):
+        """Start a model call for everything pending"""
+        
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+            
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        
+    async def _run(self, batch: Dict[str, _Pending]):
+        self.batches += 1
+        self.symbols += len(batch)
+        deadlines = [p.deadline for p in batch.values() if p.deadline is not None]
+        market_data = {s: p.market_data for s, p in batch.items() if p.market_data}
+        
+        try:
+            result = await self.orchestrator.route_query(
+                query=BATCH_INSTRUCTIONS.format(symbols=", ".join(batch)),
+                session_id=f"market_analysis_{datetime.utcnow().timestamp()}",
+                agent_type=self.agent_type,
+                context={"market_data": market_data} if market_data else None,
+                use_cache=all(p.use_cache for p in batch.values()),
+                priority=ANALYSIS,
+                deadline=min(deadlines, key=lambda d: d.expires_at) if deadlines else None
+            )
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+            
+        analyses = self._split(result.get("response", "")) if result.get("success") else None
+        for symbol, pending in batch.items():
+            outcome = self._outcome(symbol, result, analyses)
+            for future in pending.futures:
+                if not future.done():
+                    future.set_result(outcome)
+                    
+    def _outcome(self,
+                 symbol: str,
+                 result: Dict[str, Any],
+                 analyses: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        if not result.get("success"):
+            return {"success": False, "analysis": "", "error": result.get("error")}
+        if analyses is None:
+            # Unstructured answer: everyone gets the whole text
+            return {"success": True, "analysis": result.get("response", ""), "error": None}
+        if symbol not in analyses:
+            return {"success": False, "analysis": "", "error": f"No analysis returned for {symbol}"}
+        return {"success": True, "analysis": analyses[symbol], "error": None}
+        
+    def _split(self, text: str) -> Optional[Dict[str, str]]:
+        """Per-symbol analyses from the model's JSON answer, or None if unparseable"""
+        
+        # Tolerate code fences or a sentence around the object
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1 and end > start:
+            try:
+                decoded = json.loads(text[start:end + 1])
+            except ValueError:
+                decoded = None
+            if isinstance(decoded, dict):
+                return {
+                    str(key).upper(): value if isinstance(value, str) else json.dumps(value)
+                    for key, value in decoded.items()
+                }
+        self.parse_failures += 1
+        return None
+        
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "symbols": self.symbols,
+            "avg_symbols_per_batch": round(self.symbols / self.batches, 2) if self.batches else 0.0,
+            "parse_failures": self.parse_failures,
+            "pending": len(self._pending)
+        }
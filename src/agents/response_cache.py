@@ -0,0 +1,223 @@
+"""
+Agent Response Cache
+Caches route_query responses with canonical keys, TTLs and LRU eviction
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?.!]+$")
+
+def canonicalize_query(query: str) -> str:
+    """Normalize a query so trivially different phrasings share a key"""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+def hash_context(context: Optional[Dict]) -> str:
+    """Stable hash of a context dict, independent of key order"""
+    if not context:
+        return ""
+    encoded = json.dumps(context, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class MemoryCacheBackend:
+    """In-process LRU store bounded by total encoded size"""
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+            
+    def set(self, key: str, value: bytes, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.time() + ttl)
+            self.current_bytes += len(value)
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self.current_bytes -= len(value)
+        
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class DiskCacheBackend:
+    """SQLite-backed LRU store that survives process restarts"""
+    
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)"
+        )
+        self._conn.commit()
+        
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            return bytes(value)
+            
+    def set(self, key: str, value: bytes, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now + ttl, now)
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self._evict()
+            self._conn.commit()
+            
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            
+    def _evict(self):
+        """Drop least recently used rows until under the size budget"""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ).fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+                
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+class ResponseCache:
+    """Caches successful agent responses keyed on the full request shape"""
+    
+    DEFAULT_TTLS = {
+        "general": 300,
+        "portfolio": 120,
+        "risk": 120
+    }
+    
+    def __init__(self,
+                 backend=None,
+                 ttl_by_agent: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 300):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl_by_agent = {**self.DEFAULT_TTLS, **(ttl_by_agent or {})}
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        
+    def make_key(self,
+                 agent_type: str,
+                 model_id: str,
+                 query: str,
+                 context: Optional[Dict] = None,
+                 session_id: Optional[str] = None) -> str:
+        """Build the cache key for a request.
+        
+        Pass ``session_id`` when the answer can depend on the session, e.g.
+        a Bedrock agent that keeps per-session memory, so one session's
+        answer is never served to another.
+        """
+        parts = [agent_type, model_id, canonicalize_query(query), hash_context(context), session_id or ""]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+        
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached response, counting the hit or miss"""
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+        
+    def set(self, key: str, agent_type: str, response: Dict[str, Any]):
+        """Store a response; failed responses are never cached"""
+        if not response.get("success"):
+            return
+        ttl = self.ttl_by_agent.get(agent_type, self.default_ttl)
+        if ttl <= 0:
+            return
+        value = json.dumps(response, separators=(",", ":"), default=str)
+        self.backend.set(key, value.encode("utf-8"), ttl)
+        
+    def clear(self):
+        self.backend.clear()
+        
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.backend)
+        }
@@ -0,0 +1,169 @@
+"""
+Priority Scheduler
+Weighted fair sharing of Bedrock capacity between traffic classes
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .adaptive_limiter import LoadShedError, get_shared_limiter
+from .telemetry import add_span
+
+INTERACTIVE = "interactive"
+ANALYSIS = "analysis"
+BATCH = "batch"
+
+@dataclass
+class PriorityClass:
+    """Scheduling parameters for one class of traffic"""
+    name: str
+    weight: float
+    max_concurrency: Optional[int] = None
+    # Waiters older than this are served next regardless of weight
+    max_wait: float = 30.0
+
+DEFAULT_CLASSES = [
+    PriorityClass(INTERACTIVE, weight=8.0, max_wait=5.0),
+    PriorityClass(ANALYSIS, weight=3.0, max_concurrency=6, max_wait=20.0),
+    PriorityClass(BATCH, weight=1.0, max_concurrency=2, max_wait=120.0)
+]
+
+class _ClassState:
+    """Queue and counters for one priority class"""
+    
+    def __init__(self, spec: PriorityClass):
+        self.spec = spec
+        self.queue: Deque[Tuple[asyncio.Future, float]] = deque()
+        self.in_flight = 0
+        self.virtual_time = 0.0
+        self.dispatched = 0
+        self.promoted = 0
+        self.total_wait = 0.0
+        
+    def has_room(self) -> bool:
+        cap = self.spec.max_concurrency
+        return cap is None or self.in_flight < cap
+
+class PriorityScheduler:
+    """Start-time fair queuing across priority classes.
+    
+    Free capacity goes to the backlogged class with the smallest virtual
+    start time, so each class gets a share proportional to its weight,
+    subject to its own concurrency cap. A class whose oldest waiter has
+    waited past ``max_wait`` is served first. Total capacity follows the
+    shared adaptive limiter by default, so priority is decided here rather
+    than by FIFO order inside the limiter.
+    """
+    
+    def __init__(self,
+                 classes: Optional[List[PriorityClass]] = None,
+                 capacity: Optional[Callable[[], int]] = None):
+        self._classes = {spec.name: _ClassState(spec) for spec in (classes or DEFAULT_CLASSES)}
+        self._capacity = capacity or (lambda: int(get_shared_limiter().limit))
+        self._virtual_clock = 0.0
+        self.in_flight = 0
+        
+    @asynccontextmanager
+    async def slot(self, priority: str = INTERACTIVE, timeout: Optional[float] = None):
+        """Hold a scheduled slot in ``priority`` for the duration of the block"""
+        state = await self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release(state)
+            
+    async def run(self, priority: str, func: Callable[[], Any]) -> Any:
+        """Await ``func()`` once a slot in ``priority`` is granted"""
+        async with self.slot(priority):
+            return await func()
+            
+    async def acquire(self, priority: str, timeout: Optional[float] = None) -> _ClassState:
+        """Wait for a slot; raises LoadShedError if ``timeout`` passes first"""
+        state = self._classes.get(priority)
+        if state is None:
+            raise ValueError(f"Unknown priority class: {priority}")
+            
+        # Capacity may have grown since the last release
+        self._dispatch()
+        
+        if not state.queue and state.has_room() and self.in_flight < self._capacity():
+            self._grant(state, 0.0)
+            return state
+            
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, time.monotonic())
+        waiting_since = time.perf_counter()
+        state.queue.append(entry)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            if entry in state.queue:
+                state.queue.remove(entry)
+            elif waiter.done() and not waiter.cancelled():
+                # Granted just as we were cancelled; hand the slot on
+                self.release(state)
+            if isinstance(e, asyncio.TimeoutError):
+                raise LoadShedError(f"Timed out waiting for {priority} capacity")
+            raise
+        add_span("scheduler_wait", time.perf_counter() - waiting_since)
+        return state
+        
+    def release(self, state: _ClassState):
+        state.in_flight -= 1
+        self.in_flight -= 1
+        self._dispatch()
+        
+    def _grant(self, state: _ClassState, waited: float):
+        start = max(state.virtual_time, self._virtual_clock)
+        state.virtual_time = start + 1.0 / state.spec.weight
+        self._virtual_clock = start
+        state.in_flight += 1
+        state.dispatched += 1
+        state.total_wait += waited
+        self.in_flight += 1
+        
+    def _dispatch(self):
+        while self.in_flight < self._capacity():
+            now = time.monotonic()
+            state = self._pick(now)
+            if state is None:
+                return
+            waiter, enqueued = state.queue.popleft()
+            if waiter.done():
+                continue
+            self._grant(state, now - enqueued)
+            waiter.set_result(None)
+            
+    def _pick(self, now: float) -> Optional[_ClassState]:
+        eligible = [s for s in self._classes.values() if s.queue and s.has_room()]
+        if not eligible:
+            return None
+            
+        overdue = [s for s in eligible if now - s.queue[0][1] > s.spec.max_wait]
+        if overdue:
+            state = min(overdue, key=lambda s: s.queue[0][1])
+            state.promoted += 1
+            return state
+            
+        return min(eligible, key=lambda s: max(s.virtual_time, self._virtual_clock))
+        
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "capacity": self._capacity(),
+            "in_flight": self.in_flight,
+            "classes": {
+                name: {
+                    "queued": len(state.queue),
+                    "in_flight": state.in_flight,
+                    "dispatched": state.dispatched,
+                    "promoted": state.promoted,
+                    "avg_wait_ms": round(state.total_wait / state.dispatched * 1000, 1)
+                    if state.dispatched else 0.0
+                }
+                for name, state in self._classes.items()
+            }
+        }
@@ -0,0 +1,278 @@
+"""
+Session Storage Backends
+Bounded, idle-expiring session stores: in-process, SQLite and DynamoDB
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+@dataclass(slots=True)
+class SessionRecord:
+    """Compact per-session state"""
+    session_id: str
+    user_id: str
+    created_at: float
+    last_access: float
+    context: Dict[str, Any] = field(default_factory=dict)
+    history: List[Dict[str, Any]] = field(default_factory=list)
+    summary: str = ""
+    # Last turn sequence number handed out; never reused, even once the
+    # history has been folded away
+    turn_seq: int = 0
+    
+    def to_item(self) -> Dict[str, Any]:
+        """Flat representation with context and history JSON-encoded"""
+        return {
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "created_at": self.created_at,
+            "last_access": self.last_access,
+            "context": json.dumps(self.context, separators=(",", ":"), default=str),
+            "history": json.dumps(self.history, separators=(",", ":"), default=str),
+            "summary": self.summary,
+            "turn_seq": self.turn_seq
+        }
+        
+    @classmethod
+    def from_item(cls, item: Dict[str, Any]) -> "SessionRecord":
+        return cls(
+            session_id=item["session_id"],
+            user_id=item["user_id"],
+            created_at=float(item["created_at"]),
+            last_access=float(item["last_access"]),
+            context=json.loads(item.get("context") or "{}"),
+            history=json.loads(item.get("history") or "[]"),
+            summary=item.get("summary") or "",
+            turn_seq=int(item.get("turn_seq") or 0)
+        )
+
+class MemorySessionStore:
+    """In-process store with idle-TTL and max-count LRU eviction"""
+    
+    def __init__(self, max_sessions: int = 10000, idle_ttl: float = 3600):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.evicted = 0
+        self._records: "OrderedDict[str, SessionRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        now = time.time()
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is None:
+                return None
+            if now - record.last_access > self.idle_ttl:
+                del self._records[session_id]
+                self.evicted += 1
+                return None
+            record.last_access = now
+            self._records.move_to_end(session_id)
+            return record
+            
+    def put(self, record: SessionRecord):
+        now = time.time()
+        with self._lock:
+            # Writing counts as access, keeping LRU order and idle expiry in step
+            record.last_access = now
+            self._records[record.session_id] = record
+            self._records.move_to_end(record.session_id)
+            self._evict(now)
+            
+    def delete(self, session_id: str):
+        with self._lock:
+            self._records.pop(session_id, None)
+            
+    def evict_expired(self) -> int:
+        """Drop idle sessions; returns how many were removed"""
+        with self._lock:
+            before = self.evicted
+            self._evict(time.time())
+            return self.evicted - before
+            
+    def _evict(self, now: float):
+        # Records are kept in access order, so expired ones sit at the front
+        while self._records:
+            oldest = next(iter(self._records.values()))
+            if now - oldest.last_access <= self.idle_ttl and len(self._records) <= self.max_sessions:
+                break
+            del self._records[oldest.session_id]
+            self.evicted += 1
+            
+    def __len__(self) -> int:
+        return len(self._records)
+
+class SQLiteSessionStore:
+    """Session store on local disk, shareable by workers on one host"""
+    
+    def __init__(self, path: str, max_sessions: int = 100000, idle_ttl: float = 3600):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.evicted = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " user_id TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " context TEXT NOT NULL,"
+            " history TEXT NOT NULL,"
+            " summary TEXT NOT NULL DEFAULT '',"
+            " turn_seq INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        if "turn_seq" not in columns:
+            # Databases created before turn sequence numbers were stored
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN turn_seq INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_lru ON sessions (last_access)"
+        )
+        self._conn.commit()
+        
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT session_id, user_id, created_at, last_access, context, history, summary, turn_seq"
+                " FROM sessions WHERE session_id = ? AND last_access >= ?",
+                (session_id, now - self.idle_ttl)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE sessions SET last_access = ? WHERE session_id = ?",
+                (now, session_id)
+            )
+            self._conn.commit()
+            
+        keys = ("session_id", "user_id", "created_at", "last_access", "context", "history", "summary", "turn_seq")
+        record = SessionRecord.from_item(dict(zip(keys, row)))
+        record.last_access = now
+        return record
+        
+    def put(self, record: SessionRecord):
+        item = record.to_item()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions"
+                " (session_id, user_id, created_at, last_access, context, history, summary, turn_seq)"
+                " VALUES (:session_id, :user_id, :created_at, :last_access, :context, :history, :summary, :turn_seq)",
+                item
+            )
+            self._evict(time.time())
+            self._conn.commit()
+            
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+            
+    def evict_expired(self) -> int:
+        """Drop idle sessions; returns how many were removed"""
+        with self._lock:
+            before = self.evicted
+            self._evict(time.time())
+            self._conn.commit()
+            return self.evicted - before
+            
+    def _evict(self, now: float):
+        cursor = self._conn.execute(
+            "DELETE FROM sessions WHERE last_access < ?", (now - self.idle_ttl,)
+        )
+        self.evicted += cursor.rowcount
+        excess = len(self) - self.max_sessions
+        if excess > 0:
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE session_id IN"
+                " (SELECT session_id FROM sessions ORDER BY last_access LIMIT ?)",
+                (excess,)
+            )
+            self.evicted += cursor.rowcount
+            
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+class DynamoDBSessionStore:
+    """Session store on a DynamoDB table shared by all workers.
+    
+    Expects a table with ``session_id`` as partition key and DynamoDB TTL
+    enabled on ``expires_at``. Idle expiry is also checked on read, since
+    DynamoDB deletes expired items lazily. DynamoDB has no cheap global
+    count, so ``max_sessions`` is not enforced here; TTL bounds the table.
+    """
+    
+    def __init__(self, table, idle_ttl: float = 3600):
+        self.table = table
+        self.idle_ttl = idle_ttl
+        
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        now = int(time.time())
+        item = self.table.get_item(Key={"session_id": session_id}).get("Item")
+        if item is None or int(item["expires_at"]) < now:
+            return None
+        self.table.update_item(
+            Key={"session_id": session_id},
+            UpdateExpression="SET last_access = :now, expires_at = :exp",
+            ExpressionAttributeValues={":now": now, ":exp": now + int(self.idle_ttl)}
+        )
+        record = SessionRecord.from_item(item)
+        record.last_access = now
+        return record
+        
+    def put(self, record: SessionRecord):
+        item = record.to_item()
+        # DynamoDB numbers must be ints or Decimals, not floats
+        item["created_at"] = int(record.created_at)
+        item["last_access"] = int(record.last_access)
+        item["expires_at"] = int(record.last_access + self.idle_ttl)
+        self.table.put_item(Item=item)
+        
+    def delete(self, session_id: str):
+        self.table.delete_item(Key={"session_id": session_id})
+        
+    def evict_expired(self) -> int:
+        """Expiry is handled by DynamoDB TTL"""
+        return 0
+
+class LocalDynamoTable:
+    """In-memory stand-in for the boto3 DynamoDB Table calls used above"""
+    
+    def __init__(self, key_name: str = "session_id"):
+        self.key_name = key_name
+        self.items: Dict[str, Dict[str, Any]] = {}
+        
+    def get_item(self, Key: Dict[str, Any]) -> Dict[str, Any]:
+        item = self.items.get(Key[self.key_name])
+        return {"Item": dict(item)} if item is not None else {}
+        
+    def put_item(self, Item: Dict[str, Any]) -> Dict[str, Any]:
+        self.items[Item[self.key_name]] = dict(Item)
+        return {}
+        
+    def delete_item(self, Key: Dict[str, Any]) -> Dict[str, Any]:
+        self.items.pop(Key[self.key_name], None)
+        return {}
+        
+    def update_item(self,
+                    Key: Dict[str, Any],
+                    UpdateExpression: str,
+                    ExpressionAttributeValues: Dict[str, Any]) -> Dict[str, Any]:
+        """Supports plain ``SET a = :x, b = :y`` expressions"""
+        item = self.items.setdefault(Key[self.key_name], dict(Key))
+        assignments = UpdateExpression.strip()[len("SET"):].split(",")
+        for assignment in assignments:
+            name, placeholder = (part.strip() for part in assignment.split("="))
+            item[name] = ExpressionAttributeValues[placeholder]
+        return {}
@@ -0,0 +1,245 @@
+"""
+Request Telemetry
+Monotonic-clock stage spans per request and scrapeable latency histograms
+"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("request_trace", default=None)
+
+# Spans that count as waiting for capacity rather than doing work
+QUEUE_SPANS = ("scheduler_wait", "executor_wait")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+RATE_BUCKETS = (1, 5, 10, 20, 40, 80, 160, 320)
+
+class RequestTrace:
+    """Stage timings and output counters for one request.
+    
+    Spans accumulate seconds by name (a stage that runs twice, e.g. a
+    hedged call, adds up); marks are offsets from the start of the request.
+    Worker threads see the trace through the copied context and update it
+    with plain assignments.
+    """
+    
+    __slots__ = ("started", "spans", "marks", "output_chars", "output_tokens", "context")
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+        self.marks: Dict[str, float] = {}
+        self.output_chars = 0
+        # Exact count when the model reports usage; estimated otherwise
+        self.output_tokens: Optional[int] = None
+        # Token accounting of the prompt context encoded for this request
+        self.context: Dict[str, int] = {}
+        
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+        
+    def add_span(self, name: str, seconds: float):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+        
+    def mark(self, name: str):
+        self.marks[name] = self.elapsed()
+        
+    def attempt(self) -> "RequestTrace":
+        """Trace for one hedged attempt: shares the spans, counts output apart"""
+        attempt = RequestTrace()
+        attempt.started = self.started
+        attempt.spans = self.spans
+        return attempt
+        
+    def merge_output(self, attempt: "RequestTrace"):
+        """Count the winning attempt's output toward this request"""
+        if "first_token" in attempt.marks:
+            self.marks.setdefault("first_token", attempt.marks["first_token"])
+            self.marks["last_token"] = attempt.marks["last_token"]
+        self.output_chars += attempt.output_chars
+        if attempt.output_tokens is not None:
+            self.output_tokens = (self.output_tokens or 0) + attempt.output_tokens
+            
+    def record_context(self, report: Dict[str, Any]):
+        """Add one encoded context's token report to the request's totals"""
+        for key in ("tokens", "raw_tokens", "tokens_saved"):
+            self.context[key] = self.context.get(key, 0) + report[key]
+        self.context["truncated"] = self.context.get("truncated", 0) + bool(report["truncated"])
+        
+    def record_output(self, text: str):
+        """Count streamed model output, marking the first and last token"""
+        offset = self.elapsed()
+        if "first_token" not in self.marks:
+            self.marks["first_token"] = offset
+        self.marks["last_token"] = offset
+        self.output_chars += len(text)
+        
+    @property
+    def ttft(self) -> Optional[float]:
+        return self.marks.get("first_token")
+        
+    @property
+    def queue_wait(self) -> float:
+        return sum(self.spans.get(name, 0.0) for name in QUEUE_SPANS)
+        
+    @property
+    def tokens(self) -> int:
+        if self.output_tokens is not None:
+            return self.output_tokens
+        return (self.output_chars + 3) // 4
+        
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        first, last = self.marks.get("first_token"), self.marks.get("last_token")
+        if first is None or last is None or last <= first:
+            return None
+        return self.tokens / (last - first)
+        
+    def summary(self) -> Dict[str, object]:
+        """Timings in milliseconds plus output counters"""
+        ttft = self.ttft
+        rate = self.tokens_per_second
+        return {
+            "total_ms": round(self.elapsed() * 1000, 2),
+            "ttft_ms": round(ttft * 1000, 2) if ttft is not None else None,
+            "queue_wait_ms": round(self.queue_wait * 1000, 2),
+            "tokens": self.tokens,
+            "tokens_per_second": round(rate, 1) if rate is not None else None,
+            "spans_ms": {name: round(seconds * 1000, 2) for name, seconds in self.spans.items()},
+            "context": dict(self.context) if self.context else None
+        }
+        
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value"""
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.spans.items()]
+        if self.ttft is not None:
+            entries.append(f"ttft;dur={self.ttft * 1000:.2f}")
+        if self.tokens:
+            entries.append(f'tokens;desc="{self.tokens}"')
+        if self.tokens_per_second is not None:
+            entries.append(f'tps;desc="{self.tokens_per_second:.1f}"')
+        if self.context:
+            entries.append(f'ctx_saved;desc="{self.context["tokens_saved"]}"')
+        entries.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(entries)
+
+def start_trace() -> Tuple[RequestTrace, Token]:
+    """Begin tracing the current request; pass the token to ``end_trace``"""
+    trace = RequestTrace()
+    return trace, _current_trace.set(trace)
+
+def end_trace(token: Token):
+    _current_trace.reset(token)
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+def add_span(name: str, seconds: float):
+    """Add time to a span of the current request, if it is being traced"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(name, seconds)
+
+class span:
+    """Time a block into the current trace; a no-op when nothing is traced"""
+    
+    __slots__ = ("name", "trace", "start")
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.trace = _current_trace.get()
+        
+    def __enter__(self):
+        if self.trace is not None:
+            self.start = time.perf_counter()
+        return self
+        
+    def __exit__(self, *exc):
+        if self.trace is not None:
+            self.trace.add_span(self.name, time.perf_counter() - self.start)
+        return False
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels, Prometheus style"""
+    
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], List] = {}
+        
+    def observe(self, value: float, *label_values: str):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+        
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in sorted(self._series.items()):
+            labels = [f'{n}="{v}"' for n, v in zip(self.label_names, label_values)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                bucket_labels = ",".join(labels + [f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.6f}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+class RequestMetrics:
+    """Histograms fed from finished request traces"""
+    
+    def __init__(self, prefix: str = "financial_agent"):
+        self.request_seconds = Histogram(
+            f"{prefix}_request_seconds", "End-to-end request latency", LATENCY_BUCKETS, ("route",)
+        )
+        self.span_seconds = Histogram(
+            f"{prefix}_span_seconds", "Time spent per request stage", LATENCY_BUCKETS, ("span",)
+        )
+        self.ttft_seconds = Histogram(
+            f"{prefix}_ttft_seconds", "Time to first model token", LATENCY_BUCKETS, ("route",)
+        )
+        self.queue_wait_seconds = Histogram(
+            f"{prefix}_queue_wait_seconds", "Time queued for Bedrock capacity", LATENCY_BUCKETS
+        )
+        self.output_tokens = Histogram(
+            f"{prefix}_output_tokens", "Model output tokens per request", TOKEN_BUCKETS
+        )
+        self.tokens_per_second = Histogram(
+            f"{prefix}_tokens_per_second", "Model output rate after the first token", RATE_BUCKETS
+        )
+        self.context_tokens_saved = Histogram(
+            f"{prefix}_context_tokens_saved", "Prompt context tokens saved by compact encoding", TOKEN_BUCKETS
+        )
+        
+    def observe(self, trace: RequestTrace, route: str):
+        self.request_seconds.observe(trace.elapsed(), route)
+        for name, seconds in trace.spans.items():
+            self.span_seconds.observe(seconds, name)
+        if trace.ttft is not None:
+            self.ttft_seconds.observe(trace.ttft, route)
+        if any(name in trace.spans for name in QUEUE_SPANS):
+            self.queue_wait_seconds.observe(trace.queue_wait)
+        if trace.tokens:
+            self.output_tokens.observe(trace.tokens)
+        if trace.tokens_per_second is not None:
+            self.tokens_per_second.observe(trace.tokens_per_second)
+        if trace.context:
+            self.context_tokens_saved.observe(trace.context["tokens_saved"])
+            
+    def render(self) -> str:
+        """Prometheus text exposition of every histogram"""
+        histograms = (self.request_seconds, self.span_seconds, self.ttft_seconds,
+                      self.queue_wait_seconds, self.output_tokens, self.tokens_per_second,
+                      self.context_tokens_saved)
+        return "\n".join(line for h in histograms for line in h.render()) + "\n"
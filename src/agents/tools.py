@@ -0,0 +1,270 @@
+"""
+Agent Tool Registry
+Local compute tools exposed to the model through Bedrock tool-use schemas
+"""
+
+import asyncio
+import inspect
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .context_encoder import ContextEncoder
+from .response_cache import hash_context
+from ..services import analytics
+
+@dataclass
+class Tool:
+    """A callable the model may invoke, with its JSON-schema parameters"""
+    name: str
+    description: str
+    func: Callable[..., Any]
+    parameters: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    required: List[str] = field(default_factory=list)
+    # Pure tools are memoized per session on their arguments
+    memoize: bool = True
+    
+    def input_schema(self) -> Dict[str, Any]:
+        return {"type": "object", "properties": self.parameters, "required": self.required}
+
+@dataclass
+class ToolSession:
+    """Data a session's tools operate on, plus their memoized results"""
+    session_id: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    data_hash: str = ""
+    memo: Dict[Tuple[str, str], Any] = field(default_factory=dict)
+
+@dataclass
+class ToolResult:
+    """Outcome and timing of one tool call"""
+    name: str
+    output: Any
+    elapsed_ms: float
+    cached: bool = False
+    error: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+            "cached": self.cached,
+            "error": self.error
+        }
+
+class ToolRegistry:
+    """Named tools, their Bedrock schemas and per-session execution.
+    
+    Tools receive the session (``func(session, **arguments)``) so bulky
+    inputs like a portfolio stay server-side instead of passing through the
+    model. Results are encoded compactly before being returned to it.
+    """
+    
+    def __init__(self, max_sessions: int = 256):
+        self.max_sessions = max_sessions
+        self.tools: Dict[str, Tool] = {}
+        self.encoder = ContextEncoder(max_tokens=800)
+        self._sessions: "OrderedDict[str, ToolSession]" = OrderedDict()
+        self.stats: Dict[str, Dict[str, float]] = {}
+        
+    def register(self, tool: Tool) -> Tool:
+        self.tools[tool.name] = tool
+        return tool
+        
+    def session(self, session_id: str, data: Optional[Dict[str, Any]] = None) -> ToolSession:
+        """Get or create a session; new data replaces old and clears its memo"""
+        
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = ToolSession(session_id)
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        
+        if data is not None:
+            data_hash = hash_context(data)
+            if data_hash != session.data_hash:
+                session.data, session.data_hash = data, data_hash
+                session.memo.clear()
+        return session
+        
+    async def execute(self, name: str, arguments: Dict[str, Any], session_id: str) -> ToolResult:
+        """Run a tool for a session, serving repeated calls from its memo"""
+        
+        start = time.perf_counter()
+        tool = self.tools.get(name)
+        if tool is None:
+            return ToolResult(name, None, 0.0, error=f"Unknown tool: {name}")
+            
+        session = self.session(session_id)
+        key = (name, hash_context(arguments) if arguments else "")
+        if tool.memoize and key in session.memo:
+            result = ToolResult(name, session.memo[key], (time.perf_counter() - start) * 1000, cached=True)
+            self._record(result)
+            return result
+            
+        try:
+            output = tool.func(session, **arguments)
+            if inspect.isawaitable(output):
+                output = await output
+            error = None
+            if tool.memoize:
+                session.memo[key] = output
+        except Exception as e:
+            output, error = None, str(e)
+            
+        result = ToolResult(name, output, (time.perf_counter() - start) * 1000, error=error)
+        self._record(result)
+        return result
+        
+    async def execute_all(self, calls: List[Tuple[str, Dict[str, Any]]], session_id: str) -> List[ToolResult]:
+        """Run several tool calls concurrently, in request order"""
+        return await asyncio.gather(*(self.execute(name, args, session_id) for name, args in calls))
+        
+    def encode_result(self, result: ToolResult) -> str:
+        """Compact text form of a tool result for the model"""
+        if result.error:
+            return f"error: {result.error}"
+        return self.encoder.encode(result.output).text
+        
+    def converse_tool_config(self) -> Dict[str, Any]:
+        """``toolConfig`` for the Converse API"""
+        return {
+            "tools": [
+                {
+                    "toolSpec": {
+                        "name": tool.name,
+                        "description": tool.description,
+                        "inputSchema": {"json": tool.input_schema()}
+                    }
+                }
+                for tool in self.tools.values()
+            ]
+        }
+        
+    def action_group_functions(self) -> List[Dict[str, Any]]:
+        """``functionSchema.functions`` for a RETURN_CONTROL agent action group"""
+        return [
+            {
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": {
+                    param: {
+                        "type": spec.get("type", "string"),
+                        "description": spec.get("description", ""),
+                        "required": param in tool.required
+                    }
+                    for param, spec in tool.parameters.items()
+                }
+            }
+            for tool in self.tools.values()
+        ]
+        
+    def _record(self, result: ToolResult):
+        stats = self.stats.setdefault(result.name, {"calls": 0, "cached": 0, "errors": 0, "total_ms": 0.0})
+        stats["calls"] += 1
+        stats["cached"] += result.cached
+        stats["errors"] += result.error is not None
+        stats["total_ms"] += result.elapsed_ms
+        
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "tools": {
+                name: {
+                    "calls": stats["calls"],
+                    "cached": stats["cached"],
+                    "errors": stats["errors"],
+                    "avg_ms": round(stats["total_ms"] / stats["calls"], 3)
+                }
+                for name, stats in self.stats.items()
+            }
+        }
+
+def _portfolio_inputs(session: ToolSession) -> Tuple[Dict[str, float], Dict[str, List[float]]]:
+    """Weights and oldest-first price histories from the session's portfolio"""
+    
+    portfolio = session.data.get("portfolio") or {}
+    holdings = portfolio.get("holdings") or portfolio.get("positions") or []
+    weights = analytics.portfolio_weights(holdings)
+    if not weights:
+        raise ValueError("Portfolio has no holdings with a value, or quantity and price")
+    prices = portfolio.get("prices") or portfolio.get("price_history") or {}
+    return weights, prices
+
+# Bar size of price histories the indicator tool fetches itself
+INTRADAY_INTERVAL = "1min"
+
+def build_financial_tools(data_service=None) -> ToolRegistry:
+    """Registry with the indicator and portfolio analytics tools"""
+    
+    registry = ToolRegistry()
+    
+    async def technical_indicators(session: ToolSession,
+                                   symbol: str,
+                                   sma_window: int = 20,
+                                   rsi_period: int = 14) -> Dict[str, Any]:
+        symbol = symbol.upper()
+        portfolio = session.data.get("portfolio") or {}
+        prices = (session.data.get("prices") or portfolio.get("prices") or {}).get(symbol)
+        # Supplied histories are daily closes; fetched ones are intraday bars
+        interval = "daily"
+        if prices is None:
+            if data_service is None or data_service.alpha_vantage is None:
+                raise ValueError(f"No price history available for {symbol}")
+            interval = INTRADAY_INTERVAL
+            data = await data_service.alpha_vantage.get_stock_data(symbol, interval=interval)
+            # Processed series are newest first
+            prices = [row["4. close"] for row in reversed(data.get("time_series", []))]
+        summary = analytics.price_summary(
+            prices, sma_window, rsi_period, periods_per_year=analytics.periods_per_year_for(interval)
+        )
+        return {"symbol": symbol, "interval": interval, **summary}
+        
+    def portfolio_performance(session: ToolSession, risk_free_rate: float = 0.0) -> Dict[str, Any]:
+        weights, prices = _portfolio_inputs(session)
+        stats = analytics.portfolio_statistics(weights, prices, risk_free_rate)
+        keys = ("holdings", "largest_weight", "concentration_hhi", "effective_positions",
+                "observations", "annual_return", "volatility", "sharpe_ratio", "unpriced")
+        return {"weights": weights, **{k: stats[k] for k in keys if k in stats}}
+        
+    def portfolio_risk(session: ToolSession, confidence: float = 0.95) -> Dict[str, Any]:
+        weights, prices = _portfolio_inputs(session)
+        stats = analytics.portfolio_statistics(weights, prices, confidence=confidence)
+        keys = ("largest_weight", "concentration_hhi", "volatility", "max_drawdown",
+                "value_at_risk", "var_confidence", "risk_contributions", "unpriced")
+        return {k: stats[k] for k in keys if k in stats}
+        
+    registry.register(Tool(
+        name="technical_indicators",
+        description="Latest price, period return, SMA, RSI, annualized volatility and "
+                    "max drawdown for a ticker symbol.",
+        func=technical_indicators,
+        parameters={
+            "symbol": {"type": "string", "description": "Ticker symbol, e.g. AAPL"},
+            "sma_window": {"type": "integer", "description": "SMA window in periods (default 20)"},
+            "rsi_period": {"type": "integer", "description": "RSI period (default 14)"}
+        },
+        required=["symbol"]
+    ))
+    registry.register(Tool(
+        name="portfolio_performance",
+        description="Weights, concentration, annualized return, volatility and Sharpe "
+                    "ratio of the user's portfolio.",
+        func=portfolio_performance,
+        parameters={
+            "risk_free_rate": {"type": "number", "description": "Annual risk-free rate (default 0)"}
+        }
+    ))
+    registry.register(Tool(
+        name="portfolio_risk",
+        description="Historical value at risk and expected shortfall, max drawdown, "
+                    "volatility and per-holding risk contributions of the user's portfolio.",
+        func=portfolio_risk,
+        parameters={
+            "confidence": {"type": "number", "description": "VaR confidence level (default 0.95)"}
+        }
+    ))
+    return registry
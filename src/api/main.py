@@ -3,19 +3,30 @@ FastAPI Main Application
 Financial AI Agent REST API
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File
+from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
 import asyncio
 import json
 import io
+import os
 from datetime import datetime
 
 # Internal imports
 from ..agents.financial_agent import FinancialAgent, AgentConfig, AgentOrchestrator
+from ..agents.adaptive_limiter import get_shared_limiter
+from ..agents.batch import BatchItem, BatchJobManager, BedrockBatchExecutor, LocalBatchExecutor
+from ..agents.executor import shutdown_shared_pool
+from ..agents.hedging import Deadline
+from ..agents.micro_batch import SymbolAnalysisBatcher
+from ..agents.scheduler import ANALYSIS
+from ..agents.telemetry import RequestMetrics, current_trace, end_trace, span, start_trace
+from ..agents.tools import build_financial_tools
+from ..services.aws_clients import prewarm
 from ..services.data_service import RealTimeDataService
+from ..services.fundamentals import PERIODS, table_records
 from ..services.output_service import OutputService
 
 # Pydantic models
@@ -23,7 +34,15 @@ class ChatRequest(BaseModel):
     query: str
     session_id: Optional[str] = None
     context: Optional[Dict] = None
-    agent_type: str = "general"
+    # "auto" lets the intent classifier pick the agent
+    agent_type: str = "auto"
+    use_cache: bool = True
+    # End-to-end budget for the request; defaults to CHAT_TIMEOUT
+    timeout_ms: Optional[int] = None
+    # /chat only: ask several agents concurrently (agent_types, or every
+    # intent the classifier finds likely) and merge their answers
+    fan_out: bool = False
+    agent_types: Optional[List[str]] = None
 
 class ChatResponse(BaseModel):
     success: bool
@@ -31,10 +50,31 @@ class ChatResponse(BaseModel):
     session_id: str
     timestamp: str
     error: Optional[str] = None
+    cached: bool = False
+    route: Optional[Dict[str, Any]] = None
+    intent: Optional[Dict[str, Any]] = None
+    partial: bool = False
+    agents: Optional[Dict[str, Any]] = None
 
 class MarketDataRequest(BaseModel):
     symbols: List[str]
     include_analysis: bool = True
+    use_cache: bool = True
+
+class FundamentalsRequest(BaseModel):
+    symbols: List[str]
+    period: str = "quarterly"
+
+class BatchItemRequest(BaseModel):
+    query: str
+    record_id: Optional[str] = None
+    session_id: Optional[str] = None
+    context: Optional[Dict] = None
+
+class BatchRequest(BaseModel):
+    items: List[BatchItemRequest]
+    # Defaults to the general agent's model
+    model_id: Optional[str] = None
 
 class ReportRequest(BaseModel):
     data: Dict[str, Any]
@@ -58,9 +98,80 @@ app.add_middleware(
 )
 
 # Global services
-orchestrator = AgentOrchestrator()
-data_service = RealTimeDataService()
+data_service = RealTimeDataService(
+    cache_path=os.environ.get("MARKET_DATA_CACHE_PATH", ".cache/market_data.sqlite")
+)
+orchestrator = AgentOrchestrator(
+    tools=build_financial_tools(data_service),
+    cache_path=os.environ.get("RESPONSE_CACHE_PATH", ".cache/responses.sqlite")
+)
 output_service = OutputService()
+# /market-data analysis requests arriving together share one model call
+analysis_batcher = SymbolAnalysisBatcher(orchestrator, window=0.05, max_symbols=10)
+# Bulk prompt jobs, created at startup from the agent configuration
+batch_manager: Optional[BatchJobManager] = None
+
+# Payload keys the analytics tools read; everything else goes in the prompt
+TOOL_DATA_KEYS = ("holdings", "positions", "prices", "price_history")
+
+# Stage timings per request, scraped from /metrics
+request_metrics = RequestMetrics()
+# Send this request header (any value) to get a Server-Timing response header
+TIMING_REQUEST_HEADER = "x-request-timing"
+
+# Upper bound on waiting for market data before prompting the model; data
+# arriving later is left out of the prompt
+MARKET_PREFETCH_TIMEOUT = 2.0
+MAX_PREFETCH_SYMBOLS = 5
+
+# Default request deadlines (seconds), propagated into the agent calls
+CHAT_TIMEOUT = 60.0
+ANALYSIS_TIMEOUT = 120.0
+# Per-agent budget when a chat fans out to several agents
+FAN_OUT_AGENT_TIMEOUT = 45.0
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Trace each request's stages and feed them to the latency histograms"""
+    
+    trace, token = start_trace()
+    try:
+        response = await call_next(request)
+    finally:
+        end_trace(token)
+        
+    # Before the handler ran: body parsing and validation; after: serialization
+    if "handler_start" in trace.marks:
+        trace.add_span("parse", trace.marks["handler_start"])
+    if "handler_end" in trace.marks:
+        trace.add_span("serialize", trace.elapsed() - trace.marks["handler_end"])
+        
+    if request.headers.get(TIMING_REQUEST_HEADER):
+        response.headers["Server-Timing"] = trace.server_timing()
+        
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", "unmatched")
+    if route_path == "/metrics":
+        return response
+        
+    body = response.body_iterator
+    
+    async def observed_body():
+        # Streamed responses finish long after the handler returns
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            request_metrics.observe(trace, route_path)
+            
+    response.body_iterator = observed_body()
+    return response
+
+def _mark(name: str):
+    """Mark a point in the current request's trace"""
+    trace = current_trace()
+    if trace is not None:
+        trace.mark(name)
 
 @app.on_event("startup")
 async def startup_event():
@@ -69,7 +180,11 @@ async def startup_event():
     # Initialize agent configurations
     config = AgentConfig(
         agent_id="financial-agent-001",
-        model_id="anthropic.claude-3-sonnet-20240229-v1:0"
+        model_id="anthropic.claude-3-sonnet-20240229-v1:0",
+        fast_model_id="anthropic.claude-3-haiku-20240307-v1:0",
+        # The fast model is available in both regions; hedge its tail
+        secondary_regions=["us-west-2"],
+        hedge=True
     )
     
     # Create specialized agents
@@ -80,8 +195,49 @@ async def startup_event():
     orchestrator.register_agent("portfolio", general_agent)  # Can be specialized later
     orchestrator.register_agent("risk", general_agent)      # Can be specialized later
     
+    # Bedrock batch inference when an S3 bucket and service role are
+    # configured; otherwise jobs run locally on a small worker pool
+    global batch_manager
+    if os.environ.get("BATCH_S3_BUCKET") and os.environ.get("BATCH_ROLE_ARN"):
+        batch_executor = BedrockBatchExecutor(
+            bucket=os.environ["BATCH_S3_BUCKET"],
+            role_arn=os.environ["BATCH_ROLE_ARN"],
+            region=config.region
+        )
+    else:
+        # Records share Bedrock capacity at the lowest priority
+        batch_executor = LocalBatchExecutor(scheduler=orchestrator.scheduler)
+    batch_manager = BatchJobManager(
+        batch_executor,
+        model_id=config.model_id,
+        max_tokens=config.max_tokens,
+        temperature=config.temperature,
+        system_prompt=FinancialAgent.DIRECT_SYSTEM_PROMPT
+    )
+    
+    # Open Bedrock connections before the first request pays for the handshake
+    await asyncio.get_running_loop().run_in_executor(None, prewarm, [
+        ("bedrock-agent-runtime", config.region),
+        ("bedrock-runtime", config.region)
+    ] + [("bedrock-runtime", region) for region in config.secondary_regions])
+    
     # Initialize data service (API key should come from environment)
-    # data_service.initialize("YOUR_ALPHA_VANTAGE_KEY")
+    if os.environ.get("ALPHA_VANTAGE_API_KEY"):
+        data_service.initialize(
+            os.environ["ALPHA_VANTAGE_API_KEY"],
+            calls_per_minute=int(os.environ.get("ALPHA_VANTAGE_CALLS_PER_MINUTE", 5)),
+            calls_per_day=int(os.environ.get("ALPHA_VANTAGE_CALLS_PER_DAY", 25))
+        )
+    # Open the pooled market data session up front
+    await data_service.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release worker threads and pooled connections on shutdown"""
+    if batch_manager is not None:
+        await batch_manager.close()
+    await data_service.close()
+    shutdown_shared_pool()
 
 @app.get("/")
 async def root():
@@ -92,47 +248,228 @@ async def root():
         "timestamp": datetime.utcnow().isoformat()
     }
 
+def _market_context(market_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Latest quote and indicators per symbol, without the raw time series"""
+    return {
+        symbol: {key: value for key, value in data.items() if key != "time_series"}
+        for symbol, data in market_data.items()
+    }
+
+def _deadline_for(request: ChatRequest) -> Deadline:
+    """Deadline from the request's timeout, or the default chat budget"""
+    if request.timeout_ms:
+        return Deadline.after(request.timeout_ms / 1000)
+    return Deadline.after(CHAT_TIMEOUT)
+
+async def _prepare_chat(request: ChatRequest, deadline: Deadline):
+    """Classify the query, pick the agent and attach market data it needs.
+    
+    Fetches for named tickers start first and run while the rest of the
+    request is prepared; whatever has arrived by the prefetch budget goes
+    into the context, and the stragglers are cancelled.
+    """
+    
+    prefetch = None
+    if data_service.alpha_vantage is not None:
+        tickers = orchestrator.intent_classifier.extract_tickers(request.query)
+        if tickers:
+            prefetch = data_service.prefetch(tickers[:MAX_PREFETCH_SYMBOLS])
+    
+    with span("classify"):
+        intent = orchestrator.intent_classifier.classify(request.query)
+    agent_type = intent.agent_type if request.agent_type == "auto" else request.agent_type
+    context = dict(request.context or {})
+    
+    if prefetch is not None:
+        try:
+            with span("market_data"):
+                market_data = await prefetch.collect(min(MARKET_PREFETCH_TIMEOUT, deadline.remaining()))
+            if market_data:
+                context["market_data"] = _market_context(market_data)
+        finally:
+            prefetch.cancel()
+    
+    return intent, agent_type, context or None
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     """Main chat endpoint for financial queries"""
     
+    _mark("handler_start")
     try:
-        # Route query to appropriate agent
-        result = await orchestrator.route_query(
-            query=request.query,
-            session_id=request.session_id or f"session_{datetime.utcnow().timestamp()}",
-            agent_type=request.agent_type
-        )
+        deadline = _deadline_for(request)
+        session_id = request.session_id or f"session_{datetime.utcnow().timestamp()}"
+        intent, agent_type, context = await _prepare_chat(request, deadline)
+        context = orchestrator.with_history(session_id, context)
+        
+        if request.fan_out or request.agent_types:
+            # Consult several agents at once; latency is the slowest one
+            result = await orchestrator.route_query_multi(
+                query=request.query,
+                session_id=session_id,
+                agent_types=request.agent_types or intent.agent_types(),
+                context=context,
+                use_cache=request.use_cache,
+                deadline=deadline,
+                agent_timeout=FAN_OUT_AGENT_TIMEOUT
+            )
+        else:
+            # Route query to appropriate agent
+            result = await orchestrator.route_query(
+                query=request.query,
+                session_id=session_id,
+                agent_type=agent_type,
+                context=context,
+                use_cache=request.use_cache,
+                deadline=deadline
+            )
+        
+        # Summarizing older turns happens in the background
+        orchestrator.record_exchange(session_id, request.query, result)
         
-        return ChatResponse(**result)
+        response = ChatResponse(**result, intent=intent.to_dict())
+        _mark("handler_end")
+        return response
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _split_tool_data(data: Dict[str, Any]):
+    """Split a payload into tool inputs and the remaining prompt context"""
+    tool_data = {key: value for key, value in data.items() if key in TOOL_DATA_KEYS}
+    context = {key: value for key, value in data.items() if key not in TOOL_DATA_KEYS}
+    return tool_data, context or None
+
+def _sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Format a Server-Sent Events message"""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Stream the agent response as Server-Sent Events"""
+    
+    _mark("handler_start")
+    session_id = request.session_id or f"session_{datetime.utcnow().timestamp()}"
+    deadline = _deadline_for(request)
+    trace = current_trace()
+    
+    async def event_stream():
+        try:
+            intent, agent_type, context = await _prepare_chat(request, deadline)
+            context = orchestrator.with_history(session_id, context)
+            yield _sse_event(intent.to_dict(), event="intent")
+            
+            chunks = []
+            async for chunk in orchestrator.route_query_stream(
+                query=request.query,
+                session_id=session_id,
+                agent_type=agent_type,
+                context=context,
+                use_cache=request.use_cache,
+                deadline=deadline
+            ):
+                chunks.append(chunk)
+                yield _sse_event({"chunk": chunk})
+                
+            orchestrator.record_exchange(session_id, request.query, {"success": True, "response": "".join(chunks)})
+            
+            yield _sse_event({
+                "session_id": session_id,
+                "timestamp": datetime.utcnow().isoformat(),
+                # Headers went out before the stream; timings come here
+                "timing": trace.summary() if trace is not None else None
+            }, event="done")
+            
+        except Exception as e:
+            yield _sse_event({"error": str(e), "session_id": session_id}, event="error")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _analyze_prefetched(request: MarketDataRequest, prefetch) -> Dict[str, Dict[str, Any]]:
+    """Analyze symbols with the market data that arrives within the prefetch budget"""
+    
+    deadline = Deadline.after(ANALYSIS_TIMEOUT)
+    market_data = await prefetch.collect(MARKET_PREFETCH_TIMEOUT)
+    # Batched with concurrent /market-data requests
+    return await analysis_batcher.analyze(
+        request.symbols,
+        market_data=_market_context(market_data),
+        use_cache=request.use_cache,
+        deadline=deadline
+    )
+
 @app.post("/market-data")
 async def get_market_data(request: MarketDataRequest):
     """Get real-time market data for specified symbols"""
     
     try:
-        market_snapshot = await data_service.get_market_snapshot(request.symbols)
+        prefetch = data_service.prefetch(request.symbols)
         
+        # Start the analysis with whatever data arrives within the prefetch
+        # budget, so the model runs while slow symbols are still loading
+        analysis_task = None
         if request.include_analysis:
-            # Add AI analysis of market data
-            analysis_query = f"Analyze the current market data for {', '.join(request.symbols)}"
-            
-            analysis_result = await orchestrator.route_query(
-                query=analysis_query,
-                session_id=f"market_analysis_{datetime.utcnow().timestamp()}",
-                agent_type="general"
-            )
+            analysis_task = asyncio.ensure_future(_analyze_prefetched(request, prefetch))
+        
+        try:
+            market_snapshot = data_service.build_snapshot(await prefetch.all())
             
-            market_snapshot["ai_analysis"] = analysis_result.get("response", "")
+            if analysis_task is not None:
+                analyses = await analysis_task
+                market_snapshot["ai_analysis_by_symbol"] = {
+                    symbol: result["analysis"] for symbol, result in analyses.items() if result["success"]
+                }
+                market_snapshot["ai_analysis"] = "\n\n".join(
+                    f"{symbol}: {analysis}" for symbol, analysis in market_snapshot["ai_analysis_by_symbol"].items()
+                )
+        finally:
+            if analysis_task is not None:
+                analysis_task.cancel()
         
         return market_snapshot
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/fundamentals/stream")
+async def fundamentals_stream(request: FundamentalsRequest):
+    """Stream aligned financial statements per symbol as Server-Sent Events"""
+    
+    if request.period not in PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of {', '.join(PERIODS)}")
+    
+    async def event_stream():
+        loaded = failed = 0
+        try:
+            async for result in data_service.stream_financial_statements(request.symbols, period=request.period):
+                if result["success"]:
+                    loaded += 1
+                    yield _sse_event({"symbol": result["symbol"], "periods": table_records(result["table"])},
+                                     event="statements")
+                else:
+                    failed += 1
+                    yield _sse_event({"symbol": result["symbol"], "error": result["error"]}, event="symbol_error")
+                    
+            yield _sse_event({
+                "loaded": loaded,
+                "failed": failed,
+                "timestamp": datetime.utcnow().isoformat()
+            }, event="done")
+            
+        except Exception as e:
+            yield _sse_event({"error": str(e)}, event="error")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/generate-report")
 async def generate_report(request: ReportRequest):
     """Generate financial report in specified format"""
@@ -190,21 +527,24 @@ async def portfolio_analysis(portfolio_data: Dict[str, Any]):
     """Analyze portfolio performance and provide recommendations"""
     
     try:
-        # Create portfolio analysis query
-        query = f"""
-        Analyze the following portfolio data and provide:
+        # Holdings and prices stay server-side; the tools compute the figures
+        tool_data, context = _split_tool_data(portfolio_data)
+        query = """
+        Analyze the user's portfolio with the portfolio tools and provide:
         1. Performance analysis
         2. Risk assessment
         3. Optimization recommendations
         4. Diversification analysis
-        
-        Portfolio Data: {json.dumps(portfolio_data, indent=2)}
         """
         
-        result = await orchestrator.route_query(
+        result = await orchestrator.route_query_with_tools(
             query=query,
             session_id=f"portfolio_{datetime.utcnow().timestamp()}",
-            agent_type="portfolio"
+            agent_type="portfolio",
+            tool_data={"portfolio": tool_data},
+            context=context,
+            priority=ANALYSIS,
+            deadline=Deadline.after(ANALYSIS_TIMEOUT)
         )
         
         return result
@@ -217,20 +557,24 @@ async def risk_assessment(risk_data: Dict[str, Any]):
     """Perform comprehensive risk assessment"""
     
     try:
-        query = f"""
-        Perform a comprehensive risk assessment based on:
+        tool_data, context = _split_tool_data(risk_data)
+        query = """
+        Perform a comprehensive risk assessment, using the portfolio tools
+        for any holdings provided, based on:
         1. Market risk analysis
         2. Credit risk evaluation
         3. Operational risk factors
         4. Liquidity risk assessment
-        
-        Risk Data: {json.dumps(risk_data, indent=2)}
         """
         
-        result = await orchestrator.route_query(
+        result = await orchestrator.route_query_with_tools(
             query=query,
             session_id=f"risk_{datetime.utcnow().timestamp()}",
-            agent_type="risk"
+            agent_type="risk",
+            tool_data={"portfolio": tool_data},
+            context=context,
+            priority=ANALYSIS,
+            deadline=Deadline.after(ANALYSIS_TIMEOUT)
         )
         
         return result
@@ -238,6 +582,66 @@ async def risk_assessment(risk_data: Dict[str, Any]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _batch_manager() -> BatchJobManager:
+    if batch_manager is None:
+        raise HTTPException(status_code=503, detail="Batch jobs are not available yet")
+    return batch_manager
+
+@app.post("/batch")
+async def submit_batch(request: BatchRequest):
+    """Submit many prompts as one batch inference job"""
+    
+    manager = _batch_manager()
+    try:
+        job = await manager.submit(
+            [BatchItem(
+                query=item.query,
+                record_id=item.record_id or "",
+                session_id=item.session_id,
+                context=item.context
+            ) for item in request.items],
+            model_id=request.model_id
+        )
+        return job.to_dict()
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/batch")
+async def list_batches():
+    """Recent batch jobs, newest first"""
+    return {"jobs": _batch_manager().list_jobs()}
+
+@app.get("/batch/{job_id}")
+async def get_batch(job_id: str):
+    """Status of a batch job"""
+    
+    job = _batch_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown batch job: {job_id}")
+    return job.to_dict()
+
+@app.get("/batch/{job_id}/results")
+async def get_batch_results(job_id: str):
+    """Per-item results of a finished batch job, shaped like /chat responses"""
+    
+    job = _batch_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown batch job: {job_id}")
+    if not job.done:
+        raise HTTPException(status_code=409, detail=f"Batch job is {job.status}")
+    return {
+        **job.to_dict(),
+        "results": [job.results[item.record_id] for item in job.items if item.record_id in job.results]
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Request latency, TTFT, queue wait and token histograms (Prometheus format)"""
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
@@ -248,6 +652,20 @@ async def health_check():
             "data_service": "active",
             "output_service": "active"
         },
+        "bedrock_executors": orchestrator.get_executor_metrics(),
+        "bedrock_concurrency": get_shared_limiter().get_metrics(),
+        "market_data_http": data_service.get_http_metrics(),
+        "market_data_quota": data_service.get_quota_stats(),
+        "market_data_cache": data_service.get_cache_stats(),
+        "scheduler": orchestrator.scheduler.get_metrics(),
+        "regions": orchestrator.get_region_metrics(),
+        "response_cache": orchestrator.response_cache.get_stats(),
+        "request_coalescing": orchestrator.single_flight.get_stats(),
+        "analysis_batching": analysis_batcher.get_stats(),
+        "context_encoding": orchestrator.get_context_encoding_stats(),
+        "routing": orchestrator.get_route_stats(),
+        "tools": orchestrator.tools.get_stats(),
+        "batch": batch_manager.get_stats() if batch_manager is not None else None,
         "timestamp": datetime.utcnow().isoformat()
     }
 
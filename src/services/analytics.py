@@ -0,0 +1,170 @@
+"""
+Financial Analytics
+Vectorized numpy implementations of indicators, returns and portfolio risk
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+# Regular-session bars per trading day at each intraday interval
+BARS_PER_DAY = {"1min": 390, "5min": 78, "15min": 26, "30min": 13, "60min": 6.5}
+
+def periods_per_year_for(interval: str) -> float:
+    """Bars per year at an interval ("daily" or an intraday one like "1min")"""
+    if interval == "daily":
+        return TRADING_DAYS
+    if interval not in BARS_PER_DAY:
+        raise ValueError(f"Unknown interval: {interval}")
+    return TRADING_DAYS * BARS_PER_DAY[interval]
+
+def to_array(values: Sequence[float]) -> np.ndarray:
+    """Float array from a price or return sequence, oldest value first"""
+    return np.asarray(values, dtype=np.float64)
+
+def simple_returns(prices: np.ndarray) -> np.ndarray:
+    return prices[1:] / prices[:-1] - 1.0
+
+def log_returns(prices: np.ndarray) -> np.ndarray:
+    return np.diff(np.log(prices))
+
+def sma(prices: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average; the first ``window - 1`` values are NaN"""
+    out = np.full(prices.shape, np.nan)
+    if len(prices) >= window:
+        csum = np.cumsum(np.insert(prices, 0, 0.0))
+        out[window - 1:] = (csum[window:] - csum[:-window]) / window
+    return out
+
+def rsi(prices: np.ndarray, period: int = 14) -> np.ndarray:
+    """RSI from simple rolling means of gains and losses (Cutler's RSI)"""
+    out = np.full(prices.shape, np.nan)
+    if len(prices) <= period:
+        return out
+    delta = np.diff(prices)
+    avg_gain = sma(np.where(delta > 0, delta, 0.0), period)
+    avg_loss = sma(np.where(delta < 0, -delta, 0.0), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[1:] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+def volatility(returns: np.ndarray, periods_per_year: float = TRADING_DAYS) -> float:
+    """Annualized standard deviation of periodic returns"""
+    if len(returns) < 2:
+        return float("nan")
+    return float(np.std(returns, ddof=1) * np.sqrt(periods_per_year))
+
+def max_drawdown(prices: np.ndarray) -> float:
+    """Largest peak-to-trough decline as a (negative) fraction"""
+    if len(prices) == 0:
+        return float("nan")
+    peaks = np.maximum.accumulate(prices)
+    return float(np.min(prices / peaks - 1.0))
+
+def historical_var(returns: np.ndarray, confidence: float = 0.95) -> Dict[str, float]:
+    """Historical value at risk and expected shortfall, as positive losses"""
+    if len(returns) == 0:
+        return {"var": float("nan"), "cvar": float("nan")}
+    cutoff = np.quantile(returns, 1.0 - confidence)
+    tail = returns[returns <= cutoff]
+    return {"var": float(-cutoff), "cvar": float(-tail.mean())}
+
+def price_summary(prices: Sequence[float],
+                  sma_window: int = 20,
+                  rsi_period: int = 14,
+                  periods_per_year: float = TRADING_DAYS) -> Dict[str, Any]:
+    """Latest indicator values for one price series (oldest first)"""
+    
+    closes = to_array(prices)
+    if len(closes) < 2:
+        return {"observations": len(closes)}
+    returns = simple_returns(closes)
+    
+    return {
+        "observations": len(closes),
+        "last_price": float(closes[-1]),
+        "change": float(closes[-1] - closes[-2]),
+        "period_return": float(closes[-1] / closes[0] - 1.0),
+        f"sma_{sma_window}": _last(sma(closes, sma_window)),
+        "rsi": _last(rsi(closes, rsi_period)),
+        "volatility": volatility(returns, periods_per_year),
+        "max_drawdown": max_drawdown(closes)
+    }
+
+def portfolio_weights(holdings: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Weights by market value from holdings with value, or quantity and price"""
+    
+    values = {}
+    for holding in holdings:
+        symbol = holding.get("symbol")
+        if not symbol:
+            continue
+        value = holding.get("value")
+        if value is None:
+            value = float(holding.get("quantity", 0)) * float(holding.get("price", 0))
+        values[symbol] = values.get(symbol, 0.0) + float(value)
+        
+    total = sum(values.values())
+    if total <= 0:
+        return {}
+    return {symbol: value / total for symbol, value in values.items()}
+
+def portfolio_statistics(weights: Dict[str, float],
+                         prices: Optional[Dict[str, Sequence[float]]] = None,
+                         risk_free_rate: float = 0.0,
+                         confidence: float = 0.95,
+                         periods_per_year: int = TRADING_DAYS) -> Dict[str, Any]:
+    """Concentration, and return/risk statistics when price history is given.
+    
+    Price series are aligned on their most recent observations; symbols
+    without history are excluded from the return statistics and listed.
+    """
+    
+    symbols = list(weights)
+    w = to_array([weights[s] for s in symbols])
+    stats: Dict[str, Any] = {
+        "holdings": len(symbols),
+        "largest_weight": float(w.max()) if len(w) else 0.0,
+        # Herfindahl index and its equivalent number of equal positions
+        "concentration_hhi": float(np.sum(w ** 2)),
+        "effective_positions": float(1.0 / np.sum(w ** 2)) if len(w) else 0.0
+    }
+    
+    priced = [s for s in symbols if prices and len(prices.get(s) or ()) >= 3]
+    if not priced:
+        return stats
+        
+    length = min(len(prices[s]) for s in priced)
+    # Rows are periods, columns are assets
+    matrix = np.column_stack([to_array(prices[s])[-length:] for s in priced])
+    returns = matrix[1:] / matrix[:-1] - 1.0
+    pw = to_array([weights[s] for s in priced])
+    pw = pw / pw.sum()
+    
+    portfolio_returns = returns @ pw
+    covariance = np.atleast_2d(np.cov(returns, rowvar=False, ddof=1)) * periods_per_year
+    variance = float(pw @ covariance @ pw)
+    vol = float(np.sqrt(variance))
+    annual_return = float(np.mean(portfolio_returns) * periods_per_year)
+    # Share of portfolio variance contributed by each asset
+    contributions = pw * (covariance @ pw) / variance if variance > 0 else np.zeros_like(pw)
+    equity = np.cumprod(1.0 + portfolio_returns)
+    
+    stats.update({
+        "observations": length,
+        "annual_return": annual_return,
+        "volatility": vol,
+        "sharpe_ratio": (annual_return - risk_free_rate) / vol if vol > 0 else None,
+        "max_drawdown": max_drawdown(np.insert(equity, 0, 1.0)),
+        "value_at_risk": historical_var(portfolio_returns, confidence),
+        "var_confidence": confidence,
+        "risk_contributions": dict(zip(priced, contributions.tolist())),
+        "unpriced": [s for s in symbols if s not in priced]
+    })
+    return stats
+
+def _last(series: np.ndarray) -> Optional[float]:
+    value = float(series[-1]) if len(series) else float("nan")
+    return None if np.isnan(value) else value
@@ -0,0 +1,121 @@
+"""
+AWS Client Factory
+Shared, tuned boto3 clients cached per service, region and config
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+DEFAULT_REGION = "us-east-1"
+
+# Pool sized above the Bedrock worker pool so threads never wait for a socket
+DEFAULT_CLIENT_SETTINGS: Dict[str, Any] = {
+    "max_pool_connections": 50,
+    "tcp_keepalive": True,
+    "connect_timeout": 3,
+    "read_timeout": 60,
+    "retries": {"mode": "adaptive", "max_attempts": 4}
+}
+
+# Bedrock agents can think for a while before the first chunk arrives.
+# Bedrock calls go through the concurrency limiter and hedging, which own
+# retries: botocore must surface throttles to the limiter at once rather
+# than retrying (and sleeping) inside a held permit.
+_BEDROCK_SETTINGS = {"read_timeout": 120, "retries": {"mode": "standard", "max_attempts": 1}}
+SERVICE_SETTINGS: Dict[str, Dict[str, Any]] = {
+    "bedrock-agent-runtime": _BEDROCK_SETTINGS,
+    "bedrock-runtime": _BEDROCK_SETTINGS
+}
+
+# Cheap read-only call per service used to open a pooled connection
+WARMUP_CALLS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "bedrock-runtime": ("list_async_invokes", {"maxResults": 1}),
+    "bedrock-agent-runtime": ("list_sessions", {"maxResults": 1}),
+    "bedrock": ("list_foundation_models", {})
+}
+
+_clients: Dict[Tuple, Any] = {}
+_lock = threading.Lock()
+_session: Optional[boto3.session.Session] = None
+
+def build_config(service: str, **overrides) -> Config:
+    """botocore Config with the shared defaults, service tweaks and overrides"""
+    settings = {**DEFAULT_CLIENT_SETTINGS, **SERVICE_SETTINGS.get(service, {}), **overrides}
+    return Config(**settings)
+
+def get_client(service: str, region: Optional[str] = None, **config_overrides) -> Any:
+    """Return the cached client for (service, region, config), creating it once.
+    
+    boto3 clients are thread-safe, so one instance (and its connection
+    pool) is shared by every caller in the process.
+    """
+    global _session
+    region = region or DEFAULT_REGION
+    key = (service, region, _freeze(config_overrides))
+    
+    client = _clients.get(key)
+    if client is not None:
+        return client
+        
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            if _session is None:
+                _session = boto3.session.Session()
+            client = _session.client(
+                service,
+                region_name=region,
+                config=build_config(service, **config_overrides)
+            )
+            _clients[key] = client
+        return client
+
+def prewarm(services: Iterable[Tuple[str, Optional[str]]]) -> List[str]:
+    """Connect to each service before the first request needs it.
+    
+    Builds the client, resolves credentials and makes one cheap read-only
+    call, so the DNS lookup and TLS handshake happen at startup and the
+    open connection waits in the client's pool. An error response (e.g.
+    AccessDenied) still counts: the connection is up either way. Returns
+    the endpoints that answered.
+    """
+    warmed = []
+    for service, region in services:
+        try:
+            client = get_client(service, region)
+            if _session is not None:
+                _session.get_credentials()
+            operation, params = WARMUP_CALLS[service]
+            try:
+                getattr(client, operation)(**params)
+            except ClientError:
+                pass
+            warmed.append(client.meta.endpoint_url)
+        except Exception:
+            # Warming is best effort; the first real call will connect
+            pass
+    return warmed
+
+def register_client(service: str, region: str, client: Any):
+    """Serve ``client`` for (service, region) instead of a real one (local fakes)"""
+    with _lock:
+        _clients[(service, region, ())] = client
+
+def clear_clients():
+    """Drop cached clients (tests and credential rotation)"""
+    global _session
+    with _lock:
+        _clients.clear()
+        _session = None
+
+def _freeze(value: Any) -> Any:
+    """Hashable form of nested config overrides"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
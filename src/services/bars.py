@@ -0,0 +1,122 @@
+"""
+OHLCV Bars
+Columnar numpy price bars parsed straight from Alpha Vantage time series payloads
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Field names inside each Alpha Vantage bar
+OPEN = "1. open"
+HIGH = "2. high"
+LOW = "3. low"
+CLOSE = "4. close"
+VOLUME = "5. volume"
+
+class Bars:
+    """Contiguous OHLCV arrays, oldest bar first.
+    
+    ``timestamps`` are int64 epoch seconds of the provider's (naive, exchange
+    local) times, ``open``/``high``/``low``/``close`` float64 and ``volume``
+    int64. Slicing returns views, so indicators and serializers can read a
+    window without copying.
+    """
+    
+    __slots__ = ("timestamps", "open", "high", "low", "close", "volume")
+    
+    def __init__(self,
+                 timestamps: np.ndarray,
+                 open: np.ndarray,
+                 high: np.ndarray,
+                 low: np.ndarray,
+                 close: np.ndarray,
+                 volume: np.ndarray):
+        self.timestamps = timestamps
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        
+    def __len__(self) -> int:
+        return len(self.timestamps)
+        
+    def __getitem__(self, index: slice) -> "Bars":
+        if not isinstance(index, slice):
+            raise TypeError("Bars only support slicing")
+        return Bars(*(getattr(self, name)[index] for name in self.__slots__))
+        
+    def datetimes(self) -> np.ndarray:
+        """Timestamps as datetime64[s], sharing memory with ``timestamps``"""
+        return self.timestamps.view("datetime64[s]")
+        
+    def records(self,
+                limit: Optional[int] = None,
+                newest_first: bool = True,
+                extra: Optional[Dict[str, np.ndarray]] = None) -> List[Dict[str, Any]]:
+        """Bars as provider-keyed dicts, optionally with aligned indicator columns.
+        
+        NaN and infinite values (e.g. an indicator's warm-up) become None.
+        """
+        
+        window = slice(-limit, None) if limit else slice(None)
+        columns = {
+            OPEN: self.open[window],
+            HIGH: self.high[window],
+            LOW: self.low[window],
+            CLOSE: self.close[window],
+            VOLUME: self.volume[window].astype(np.float64),
+            **{name: values[window] for name, values in (extra or {}).items()}
+        }
+        # One tolist() per column is far cheaper than per-element conversion
+        lists = {name: _json_list(values) for name, values in columns.items()}
+        names = list(lists)
+        rows = [dict(zip(names, row)) for row in zip(*lists.values())]
+        return rows[::-1] if newest_first else rows
+
+def _json_list(values: np.ndarray) -> List[Any]:
+    """``values.tolist()`` with non-finite floats replaced by None"""
+    items = values.tolist()
+    if values.dtype.kind == "f":
+        for index in np.flatnonzero(~np.isfinite(values)).tolist():
+            items[index] = None
+    return items
+
+def parse_time_series(time_series: Dict[str, Dict[str, str]]) -> Bars:
+    """Bars from a ``Time Series (...)`` payload, sorted ascending by time"""
+    
+    # The API lists bars newest first; reading them back to front usually
+    # leaves nothing to sort
+    items = list(reversed(time_series.items()))
+    rows = [row for _, row in items]
+    
+    bars = Bars(
+        _parse_timestamps([stamp for stamp, _ in items]),
+        np.array([row[OPEN] for row in rows], dtype=np.float64),
+        np.array([row[HIGH] for row in rows], dtype=np.float64),
+        np.array([row[LOW] for row in rows], dtype=np.float64),
+        np.array([row[CLOSE] for row in rows], dtype=np.float64),
+        _parse_volume([row[VOLUME] for row in rows])
+    )
+    
+    if len(bars) > 1 and not np.all(bars.timestamps[1:] > bars.timestamps[:-1]):
+        order = np.argsort(bars.timestamps, kind="stable")
+        bars = Bars(*(getattr(bars, name)[order] for name in Bars.__slots__))
+    return bars
+
+def _parse_timestamps(stamps: List[str]) -> np.ndarray:
+    """Epoch seconds; ISO dates and times parse in numpy, anything else via pandas"""
+    try:
+        parsed = np.array(stamps, dtype="datetime64[s]")
+    except ValueError:
+        parsed = pd.to_datetime(stamps).values.astype("datetime64[s]")
+    return parsed.astype(np.int64)
+
+def _parse_volume(volumes: List[str]) -> np.ndarray:
+    try:
+        return np.array(volumes, dtype=np.int64)
+    except ValueError:
+        # Some feeds report volume as "1234.0"
+        return np.array(volumes, dtype=np.float64).astype(np.int64)
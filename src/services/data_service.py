@@ -4,21 +4,61 @@ Integrates Alpha Vantage, QuickSight, and real-time market data
 """
 
 import asyncio
-import aiohttp
-import boto3
+import math
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-import pandas as pd
 import json
 
+from . import analytics
+from .aws_clients import get_client
+from .bars import parse_time_series
+from .fundamentals import StatementsLoader
+from .http_client import ManagedSession
+from .market_cache import INTRADAY, OVERVIEW, STATEMENTS, MarketDataCache
+from .quota import BACKFILL, INTERACTIVE, QuotaScheduler
+
+def _finite(value: float) -> Optional[float]:
+    """``value`` as a float, or None when it is NaN or infinite"""
+    value = float(value)
+    return value if math.isfinite(value) else None
+
 class AlphaVantageService:
     """Alpha Vantage API integration for financial data"""
     
-    def __init__(self, api_key: str):
+    def __init__(self,
+                 api_key: str,
+                 http: Optional[ManagedSession] = None,
+                 quota: Optional[QuotaScheduler] = None,
+                 cache: Optional[MarketDataCache] = None):
         self.api_key = api_key
         self.base_url = "https://www.alphavantage.co/query"
+        # One pooled session for every call instead of one per request
+        self.http = http or ManagedSession()
+        # Every call waits for per-minute and per-day quota
+        self.quota = quota or QuotaScheduler()
+        # Optional; without one every call goes to the API
+        self.cache = cache
+        
+    async def _request(self, params: Dict[str, str], priority: str = INTERACTIVE) -> Dict:
+        """GET the API within quota, retrying rate-limit responses"""
+        
+        async def fetch() -> Dict:
+            session = await self.http.get()
+            async with session.get(self.base_url, params=params) as response:
+                return await response.json()
+                
+        return await self.quota.call(fetch, priority)
+        
+    async def _cached(self, dataset: str, key: str, fetch, priority: str) -> Dict:
+        """``fetch(priority)`` through the cache, when there is one"""
+        if self.cache is None:
+            return await fetch(priority)
+        return await self.cache.get_or_fetch(dataset, key, fetch, priority)
         
-    async def get_stock_data(self, symbol: str, interval: str = "1min") -> Dict:
+    async def get_stock_data(self,
+                             symbol: str,
+                             interval: str = "1min",
+                             priority: str = INTERACTIVE) -> Dict:
         """Get real-time stock data"""
         
         params = {
@@ -29,12 +69,12 @@ class AlphaVantageService:
             "outputsize": "compact"
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.base_url, params=params) as response:
-                data = await response.json()
-                return self._process_stock_data(data)
+        async def fetch(priority: str) -> Dict:
+            return self._process_stock_data(await self._request(params, priority))
+            
+        return await self._cached(INTRADAY, f"{symbol.upper()}:{interval}", fetch, priority)
     
-    async def get_company_overview(self, symbol: str) -> Dict:
+    async def get_company_overview(self, symbol: str, priority: str = INTERACTIVE) -> Dict:
         """Get company fundamental data"""
         
         params = {
@@ -43,72 +83,73 @@ class AlphaVantageService:
             "apikey": self.api_key
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.base_url, params=params) as response:
-                return await response.json()
+        return await self._cached(
+            OVERVIEW, symbol.upper(), lambda priority: self._request(params, priority), priority
+        )
     
-    async def get_financial_statements(self, symbol: str) -> Dict:
+    async def get_financial_statements(self, symbol: str, priority: str = INTERACTIVE) -> Dict:
         """Get income statement, balance sheet, cash flow"""
         
-        statements = {}
         functions = ["INCOME_STATEMENT", "BALANCE_SHEET", "CASH_FLOW"]
         
-        async with aiohttp.ClientSession() as session:
-            for function in functions:
-                params = {
-                    "function": function,
-                    "symbol": symbol,
-                    "apikey": self.api_key
-                }
-                async with session.get(self.base_url, params=params) as response:
-                    statements[function.lower()] = await response.json()
-        
-        return statements
+        async def fetch(priority: str) -> Dict:
+            # All three at once; the quota scheduler paces the actual calls
+            results = await asyncio.gather(*[
+                self._request({"function": function, "symbol": symbol, "apikey": self.api_key}, priority)
+                for function in functions
+            ])
+            return {function.lower(): result for function, result in zip(functions, results)}
+            
+        # Cached until the next fiscal period is expected to be filed
+        return await self._cached(STATEMENTS, symbol.upper(), fetch, priority)
     
     def _process_stock_data(self, raw_data: Dict) -> Dict:
         """Process and clean stock data"""
         
+        if "Error Message" in raw_data:
+            raise ValueError(raw_data["Error Message"])
+        
         if "Time Series (1min)" in raw_data:
-            time_series = raw_data["Time Series (1min)"]
-            
-            # Convert to DataFrame for easier processing
-            df = pd.DataFrame.from_dict(time_series, orient='index')
-            df.index = pd.to_datetime(df.index)
-            df = df.astype(float)
-            
-            # Calculate technical indicators
-            df['sma_20'] = df['4. close'].rolling(window=20).mean()
-            df['rsi'] = self._calculate_rsi(df['4. close'])
+            # Straight to numpy columns, oldest first, for the indicators
+            bars = parse_time_series(raw_data["Time Series (1min)"])
+            if len(bars) == 0:
+                raise ValueError("Empty intraday time series")
+            sma_20 = analytics.sma(bars.close, 20)
+            rsi = analytics.rsi(bars.close)
             
+            # Indicators are NaN until they have enough bars; JSON has no NaN
             return {
                 "symbol": raw_data.get("Meta Data", {}).get("2. Symbol"),
                 "last_refreshed": raw_data.get("Meta Data", {}).get("3. Last Refreshed"),
-                "current_price": float(df.iloc[0]['4. close']),
-                "change": float(df.iloc[0]['4. close']) - float(df.iloc[1]['4. close']),
-                "volume": int(df.iloc[0]['5. volume']),
+                "current_price": _finite(bars.close[-1]),
+                "change": _finite(bars.close[-1] - bars.close[-2]) if len(bars) > 1 else None,
+                "volume": int(bars.volume[-1]),
                 "technical_indicators": {
-                    "sma_20": df.iloc[0]['sma_20'],
-                    "rsi": df.iloc[0]['rsi']
+                    "sma_20": _finite(sma_20[-1]),
+                    "rsi": _finite(rsi[-1])
                 },
-                "time_series": df.head(100).to_dict('records')
+                "time_series": bars.records(limit=100, extra={"sma_20": sma_20, "rsi": rsi})
             }
         
         return raw_data
-    
-    def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
-        """Calculate RSI technical indicator"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
 
 class QuickSightService:
     """Amazon QuickSight integration for dashboards"""
     
     def __init__(self, region: str = "us-east-1"):
-        self.quicksight = boto3.client('quicksight', region_name=region)
-        self.account_id = boto3.client('sts').get_caller_identity()['Account']
+        self.region = region
+        self._account_id = None
+    
+    @property
+    def quicksight(self):
+        return get_client('quicksight', self.region)
+    
+    @property
+    def account_id(self) -> str:
+        """AWS account id, looked up on first use rather than at construction"""
+        if self._account_id is None:
+            self._account_id = get_client('sts', self.region).get_caller_identity()['Account']
+        return self._account_id
     
     async def create_financial_dashboard(self, 
                                        dashboard_name: str,
@@ -160,32 +201,124 @@ class QuickSightService:
             }
         ]
 
+class MarketDataPrefetch:
+    """Per-symbol market data fetches started ahead of need.
+    
+    Each symbol is its own task, so callers can take whatever has arrived
+    by a deadline while slower symbols keep loading (or are cancelled).
+    """
+    
+    def __init__(self, fetch, symbols: List[str]):
+        self.tasks: Dict[str, asyncio.Task] = {}
+        for symbol in dict.fromkeys(symbols):
+            task = asyncio.ensure_future(fetch(symbol))
+            # Failures surface as missing symbols, not unretrieved exceptions
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self.tasks[symbol] = task
+            
+    def ready(self) -> Dict[str, Dict]:
+        """Results fetched successfully so far"""
+        return {
+            symbol: task.result()
+            for symbol, task in self.tasks.items()
+            if task.done() and not task.cancelled() and task.exception() is None
+        }
+        
+    async def collect(self, timeout: float) -> Dict[str, Dict]:
+        """Wait up to ``timeout`` seconds, then return what has arrived"""
+        if self.tasks:
+            await asyncio.wait(self.tasks.values(), timeout=max(0.0, timeout))
+        return self.ready()
+        
+    async def all(self) -> Dict[str, Dict]:
+        """Wait for every fetch; failed symbols are left out"""
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        return self.ready()
+        
+    def cancel(self):
+        for task in self.tasks.values():
+            task.cancel()
+
 class RealTimeDataService:
     """Real-time market data processing"""
     
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = None):
         self.alpha_vantage = None
         self.quicksight = None
-        self.cache = {}
+        # Memory tier always; an on-disk tier when a path is given
+        self.cache = MarketDataCache(disk_path=cache_path)
         
-    def initialize(self, alpha_vantage_key: str):
-        """Initialize data services"""
-        self.alpha_vantage = AlphaVantageService(alpha_vantage_key)
+    def initialize(self,
+                   alpha_vantage_key: str,
+                   calls_per_minute: int = 5,
+                   calls_per_day: int = 25):
+        """Initialize data services (quotas default to the free Alpha Vantage tier)"""
+        self.alpha_vantage = AlphaVantageService(
+            alpha_vantage_key,
+            quota=QuotaScheduler(calls_per_minute=calls_per_minute, calls_per_day=calls_per_day),
+            cache=self.cache
+        )
         self.quicksight = QuickSightService()
     
-    async def get_market_snapshot(self, symbols: List[str]) -> Dict:
-        """Get real-time market snapshot for multiple symbols"""
+    async def start(self):
+        """Open the pooled HTTP session (application startup)"""
+        if self.alpha_vantage is not None:
+            await self.alpha_vantage.http.get()
+    
+    async def close(self):
+        """Close pooled connections (application shutdown)"""
+        if self.alpha_vantage is not None:
+            await self.alpha_vantage.http.close()
+    
+    def get_http_metrics(self) -> Optional[Dict[str, Any]]:
+        """Connection pool metrics for the market data API"""
+        if self.alpha_vantage is None:
+            return None
+        return self.alpha_vantage.http.get_metrics()
+    
+    def get_quota_stats(self) -> Optional[Dict[str, Any]]:
+        """Quota usage and queue depth for the market data API"""
+        if self.alpha_vantage is None:
+            return None
+        return self.alpha_vantage.quota.get_stats()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit rates per cache tier and background refresh counts"""
+        return self.cache.get_stats()
+    
+    def prefetch(self, symbols: List[str], priority: str = INTERACTIVE) -> MarketDataPrefetch:
+        """Start fetching market data for symbols without waiting for it.
         
-        tasks = []
-        for symbol in symbols:
-            tasks.append(self.alpha_vantage.get_stock_data(symbol))
+        Fetches queue for API quota, so a wide request is spread out at the
+        quota rate rather than sent in one burst.
+        """
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        if self.alpha_vantage is None:
+            raise RuntimeError("Alpha Vantage is not initialized")
+        return MarketDataPrefetch(
+            lambda symbol: self.alpha_vantage.get_stock_data(symbol, priority=priority), symbols
+        )
+    
+    def stream_financial_statements(self,
+                                    symbols: List[str],
+                                    period: str = "quarterly",
+                                    priority: str = BACKFILL,
+                                    max_concurrency: int = 8):
+        """Aligned per-period statements for each symbol, yielded as each one loads"""
         
-        market_data = {}
-        for i, result in enumerate(results):
-            if not isinstance(result, Exception):
-                market_data[symbols[i]] = result
+        if self.alpha_vantage is None:
+            raise RuntimeError("Alpha Vantage is not initialized")
+        loader = StatementsLoader(self.alpha_vantage, max_concurrency=max_concurrency)
+        return loader.stream(symbols, period=period, priority=priority)
+    
+    async def get_market_snapshot(self, symbols: List[str], priority: str = INTERACTIVE) -> Dict:
+        """Get real-time market snapshot for multiple symbols"""
+        
+        market_data = await self.prefetch(symbols, priority).all()
+        return self.build_snapshot(market_data)
+    
+    def build_snapshot(self, market_data: Dict[str, Dict]) -> Dict:
+        """Snapshot with summary statistics from per-symbol market data"""
         
         return {
             "timestamp": datetime.utcnow().isoformat(),
@@ -200,7 +333,8 @@ class RealTimeDataService:
             return {}
         
         prices = [data.get("current_price", 0) for data in market_data.values()]
-        changes = [data.get("change", 0) for data in market_data.values()]
+        # A symbol with a single bar has no change yet
+        changes = [data.get("change") or 0 for data in market_data.values()]
         
         return {
             "total_symbols": len(market_data),
@@ -0,0 +1,137 @@
+"""
+Fake Bedrock Endpoint
+In-process stand-in for Bedrock runtimes with injectable latency and errors
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional
+
+from botocore.exceptions import ClientError
+
+from .aws_clients import register_client
+
+DEFAULT_RESPONSE = (
+    "Based on the available data, the position looks balanced. Revenue growth "
+    "remains steady, margins are stable and valuation is in line with peers."
+)
+
+@dataclass
+class LatencyProfile:
+    """Latency and failure behaviour of one fake region"""
+    # Delay before the response starts (time to first byte)
+    first_byte: float = 0.05
+    # Uniform random extra delay added to first_byte
+    jitter: float = 0.0
+    # Delay between streamed chunks
+    per_chunk: float = 0.0
+    # Probability of a long stall before the first byte (tail latency)
+    stall_rate: float = 0.0
+    stall: float = 2.0
+    # Probability of failing with error_code instead of answering
+    error_rate: float = 0.0
+    error_code: str = "ServiceUnavailableException"
+
+class FakeBedrockClient:
+    """Answers invoke_agent, converse and converse_stream like boto3 does.
+    
+    Sleeps happen in the calling thread, as real network waits would, so
+    the executor, limiter and hedging layers see realistic behaviour.
+    """
+    
+    def __init__(self,
+                 region: str,
+                 profile: Optional[LatencyProfile] = None,
+                 response_text: str = DEFAULT_RESPONSE,
+                 chunk_size: int = 24,
+                 seed: Optional[int] = None):
+        self.region = region
+        self.profile = profile or LatencyProfile()
+        self.response_text = response_text
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        
+    def invoke_agent(self, **request) -> Dict[str, Any]:
+        self._before_response("InvokeAgent")
+        events = (
+            {"chunk": {"bytes": chunk.encode("utf-8")}}
+            for chunk in self._chunks()
+        )
+        return {"completion": events, "sessionId": request.get("sessionId")}
+        
+    def converse_stream(self, **request) -> Dict[str, Any]:
+        self._before_response("ConverseStream")
+        
+        def events() -> Iterator[Dict[str, Any]]:
+            yield {"messageStart": {"role": "assistant"}}
+            for chunk in self._chunks():
+                yield {"contentBlockDelta": {"contentBlockIndex": 0, "delta": {"text": chunk}}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            
+        return {"stream": events()}
+        
+    def converse(self, **request) -> Dict[str, Any]:
+        self._before_response("Converse")
+        
+        # With tools offered and none run yet, ask for every tool that needs
+        # no arguments so tool loops can be exercised offline
+        tools = request.get("toolConfig", {}).get("tools", [])
+        answered = any(
+            "toolResult" in block
+            for message in request.get("messages", []) for block in message["content"]
+        )
+        uses = [
+            {"toolUse": {"toolUseId": f"tool-{i}", "name": spec["toolSpec"]["name"], "input": {}}}
+            for i, spec in enumerate(tools)
+            if not spec["toolSpec"]["inputSchema"]["json"].get("required")
+        ]
+        if uses and not answered:
+            return {
+                "output": {"message": {"role": "assistant", "content": uses}},
+                "stopReason": "tool_use"
+            }
+        
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": self.response_text}]}},
+            "stopReason": "end_turn"
+        }
+    
+    def _before_response(self, operation: str):
+        with self._lock:
+            self.calls += 1
+            roll = self._random.random()
+            delay = self.profile.first_byte + self._random.uniform(0, self.profile.jitter)
+            if self._random.random() < self.profile.stall_rate:
+                delay += self.profile.stall
+                
+        time.sleep(delay)
+        if roll < self.profile.error_rate:
+            raise ClientError({
+                "Error": {"Code": self.profile.error_code, "Message": f"Injected failure in {self.region}"},
+                "ResponseMetadata": {"HTTPStatusCode": 503}
+            }, operation)
+            
+    def _chunks(self) -> Iterator[str]:
+        text = self.response_text
+        for start in range(0, len(text), self.chunk_size):
+            if start and self.profile.per_chunk:
+                time.sleep(self.profile.per_chunk)
+            yield text[start:start + self.chunk_size]
+
+def install_fake_bedrock(profiles: Dict[str, LatencyProfile], **client_options) -> Dict[str, FakeBedrockClient]:
+    """Route Bedrock clients for each region to a fake with that region's profile.
+    
+    Call before agents are created; ``clear_clients`` restores real clients.
+    """
+    
+    fakes = {}
+    for region, profile in profiles.items():
+        fake = FakeBedrockClient(region, profile, **client_options)
+        for service in ("bedrock-agent-runtime", "bedrock-runtime"):
+            register_client(service, region, fake)
+        fakes[region] = fake
+    return fakes
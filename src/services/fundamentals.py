@@ -0,0 +1,133 @@
+"""
+Fundamentals Loader
+Concurrent multi-symbol financial statements, aligned into one table per symbol
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List
+
+import pandas as pd
+
+from .quota import BACKFILL
+
+# Keys of get_financial_statements results, in column precedence order
+STATEMENT_KEYS = ("income_statement", "balance_sheet", "cash_flow")
+PERIODS = ("quarterly", "annual")
+
+# Columns kept as text; every other reported field is numeric
+TEXT_COLUMNS = ("reportedCurrency",)
+
+def align_statements(statements: Dict[str, Any], period: str = "quarterly") -> pd.DataFrame:
+    """One row per fiscal period with income, balance sheet and cash flow columns.
+    
+    Rows are indexed by ``fiscalDateEnding``, newest first. A period missing
+    from one statement keeps that statement's columns empty; a field
+    reported by more than one statement (e.g. ``netIncome``) is taken from
+    the first that has it.
+    """
+    
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+        
+    table = None
+    columns: List[str] = []
+    for key in STATEMENT_KEYS:
+        statement = statements.get(key)
+        reports = statement.get(f"{period}Reports") if isinstance(statement, dict) else None
+        if not reports:
+            continue
+            
+        frame = pd.DataFrame(reports)
+        if "fiscalDateEnding" not in frame:
+            continue
+        # Missing values are reported as the string "None"; blank them so a
+        # later statement can fill a shared field
+        frame = frame.mask(frame == "None")
+        frame = frame.drop_duplicates("fiscalDateEnding").set_index("fiscalDateEnding")
+        columns.extend(column for column in frame.columns if column not in columns)
+        table = frame if table is None else table.combine_first(frame)
+        
+    if table is None:
+        return pd.DataFrame(index=pd.Index([], name="fiscalDateEnding"))
+        
+    table = table[columns].sort_index(ascending=False)
+    for column in columns:
+        if column not in TEXT_COLUMNS:
+            table[column] = pd.to_numeric(table[column], errors="coerce")
+    return table
+
+def table_records(table: pd.DataFrame) -> List[Dict[str, Any]]:
+    """JSON-ready rows of an aligned table, with empty cells as None"""
+    rows = table.reset_index()
+    return rows.astype(object).where(rows.notna(), None).to_dict("records")
+
+class StatementsLoader:
+    """Loads financial statements for many symbols concurrently.
+    
+    Up to ``max_concurrency`` symbols are in flight, each issuing its three
+    statement requests at once; the quota scheduler paces the actual calls,
+    so a 500-ticker screen runs at the quota rate without flooding its
+    queue. Results are yielded as each symbol completes.
+    """
+    
+    def __init__(self, alpha_vantage, max_concurrency: int = 8):
+        self.alpha_vantage = alpha_vantage
+        self.max_concurrency = max_concurrency
+        
+    async def stream(self,
+                     symbols: List[str],
+                     period: str = "quarterly",
+                     priority: str = BACKFILL) -> AsyncIterator[Dict[str, Any]]:
+        """Yield ``{"symbol", "success", "table", "error"}`` per symbol, in completion order"""
+        
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period}")
+            
+        queue: asyncio.Queue = asyncio.Queue()
+        for symbol in dict.fromkeys(symbol.upper() for symbol in symbols):
+            queue.put_nowait(symbol)
+        results: asyncio.Queue = asyncio.Queue()
+        
+        async def worker():
+            while not queue.empty():
+                symbol = queue.get_nowait()
+                await results.put(await self._load(symbol, period, priority))
+                
+        total = queue.qsize()
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(self.max_concurrency, total))]
+        try:
+            for _ in range(total):
+                yield await results.get()
+        finally:
+            # Stop issuing requests once the consumer goes away
+            for task in workers:
+                task.cancel()
+                
+    async def load(self,
+                   symbols: List[str],
+                   period: str = "quarterly",
+                   priority: str = BACKFILL) -> pd.DataFrame:
+        """Every symbol's aligned table in one frame indexed by (symbol, fiscalDateEnding)"""
+        
+        tables = {}
+        async for result in self.stream(symbols, period, priority):
+            if result["success"]:
+                tables[result["symbol"]] = result["table"]
+        if not tables:
+            return pd.DataFrame()
+        return pd.concat(tables, names=["symbol"]).sort_index(ascending=[True, False])
+        
+    async def _load(self, symbol: str, period: str, priority: str) -> Dict[str, Any]:
+        try:
+            statements = await self.alpha_vantage.get_financial_statements(symbol, priority=priority)
+            for key in STATEMENT_KEYS:
+                if "Error Message" in statements.get(key, {}):
+                    raise ValueError(statements[key]["Error Message"])
+                    
+            table = align_statements(statements, period)
+            if table.empty:
+                raise ValueError(f"No {period} statements for {symbol}")
+            return {"symbol": symbol, "success": True, "table": table, "error": None}
+            
+        except Exception as e:
+            return {"symbol": symbol, "success": False, "table": None, "error": str(e)}
@@ -0,0 +1,110 @@
+"""
+HTTP Client Session
+Long-lived aiohttp session with a tuned connection pool and reuse metrics
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+# Enough connections for a wide market snapshot without one host taking all
+DEFAULT_CONNECTOR_SETTINGS: Dict[str, Any] = {
+    "limit": 100,
+    "limit_per_host": 20,
+    "ttl_dns_cache": 300,
+    "keepalive_timeout": 30
+}
+
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=5, sock_read=20)
+
+class ManagedSession:
+    """One aiohttp session, and its connection pool, shared by every call.
+    
+    The session is created on first use inside the running loop, and again
+    when called from another loop (e.g. between ``asyncio.run`` calls), in
+    which case the old session is closed; call ``close`` on shutdown.
+    Connection creation and reuse are counted through aiohttp tracing.
+    """
+    
+    def __init__(self,
+                 timeout: aiohttp.ClientTimeout = DEFAULT_TIMEOUT,
+                 **connector_overrides):
+        self.timeout = timeout
+        self.connector_settings = {**DEFAULT_CONNECTOR_SETTINGS, **connector_overrides}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.sessions_created = 0
+        
+    async def get(self) -> aiohttp.ClientSession:
+        """The shared session, created if needed"""
+        
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            old_session, old_loop = self._session, self._loop
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**self.connector_settings),
+                timeout=self.timeout,
+                trace_configs=[self._trace_config()]
+            )
+            self._loop = loop
+            self.sessions_created += 1
+            await self._close_session(old_session, old_loop)
+        return self._session
+        
+    async def close(self):
+        session, loop = self._session, self._loop
+        self._session = self._loop = None
+        await self._close_session(session, loop)
+        
+    async def _close_session(self,
+                             session: Optional[aiohttp.ClientSession],
+                             loop: Optional[asyncio.AbstractEventLoop]):
+        """Close a session, whichever loop it was created on"""
+        
+        if session is None or session.closed:
+            return
+        if loop is not asyncio.get_running_loop() and loop.is_running():
+            # Owned by a loop in another thread; close it there
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        try:
+            # On a closed loop aiohttp only marks the pool closed; the
+            # sockets are released when the transports are collected
+            await session.close()
+        except RuntimeError:
+            # Stopped but open loop: its transports close when it next runs
+            pass
+            
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        
+        async def on_request_start(session, context, params):
+            self.requests += 1
+            
+        async def on_connection_create_end(session, context, params):
+            self.connections_created += 1
+            
+        async def on_connection_reuseconn(session, context, params):
+            self.connections_reused += 1
+            
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+        
+    def get_metrics(self) -> Dict[str, Any]:
+        acquired = self.connections_created + self.connections_reused
+        return {
+            "open": self._session is not None and not self._session.closed,
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "connection_reuse_rate": round(self.connections_reused / acquired, 3) if acquired else 0.0,
+            "sessions_created": self.sessions_created,
+            "limit": self.connector_settings["limit"],
+            "limit_per_host": self.connector_settings["limit_per_host"]
+        }
@@ -0,0 +1,234 @@
+"""
+Market Data Cache
+Two-tier (memory over disk) cache with per-dataset TTLs and stale-while-revalidate
+"""
+
+import asyncio
+import json
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .quota import INTERACTIVE, RATE_LIMIT_KEYS, REFRESH
+from ..agents.response_cache import DiskCacheBackend, MemoryCacheBackend
+
+INTRADAY = "intraday"
+OVERVIEW = "overview"
+STATEMENTS = "statements"
+
+# Seconds a value is fresh; statements are fresh until the next fiscal period
+DATASET_TTLS: Dict[str, float] = {
+    INTRADAY: 60,
+    OVERVIEW: 86400,
+    STATEMENTS: 7 * 86400
+}
+
+# Seconds past freshness a value may still be served while it is refreshed
+STALE_TTLS: Dict[str, float] = {
+    INTRADAY: 300,
+    OVERVIEW: 7 * 86400,
+    STATEMENTS: 30 * 86400
+}
+
+def is_data_payload(value: Any) -> bool:
+    """False for empty values and API error or notice bodies (sent with HTTP 200)"""
+    if not value:
+        return False
+    if isinstance(value, dict):
+        if "Error Message" in value:
+            return False
+        if all(key in RATE_LIMIT_KEYS for key in value):
+            return False
+    return True
+
+def complete_statements(statements: Any) -> bool:
+    """Every statement in the bundle is real data with at least one report"""
+    return isinstance(statements, dict) and all(
+        is_data_payload(statement) and isinstance(statement, dict)
+        and bool(statement.get("annualReports") or statement.get("quarterlyReports"))
+        for statement in statements.values()
+    )
+
+# Extra checks for datasets bundling several API responses
+DATASET_VALIDATORS: Dict[str, Callable[[Any], bool]] = {
+    STATEMENTS: complete_statements
+}
+
+# A quarter, plus the time companies take to file it
+FISCAL_QUARTER_DAYS = 91
+FILING_LAG_DAYS = 45
+
+def statements_ttl(statements: Dict[str, Any], today: Optional[date] = None) -> Optional[float]:
+    """Seconds until the next quarterly filing is expected, from the latest fiscal period.
+    
+    None when no quarterly report dates are present.
+    """
+    
+    latest = None
+    for statement in statements.values():
+        if not isinstance(statement, dict):
+            continue
+        for report in statement.get("quarterlyReports") or []:
+            try:
+                ending = datetime.strptime(report["fiscalDateEnding"], "%Y-%m-%d").date()
+            except (KeyError, TypeError, ValueError):
+                continue
+            latest = ending if latest is None or ending > latest else latest
+    if latest is None:
+        return None
+        
+    expected = latest + timedelta(days=FISCAL_QUARTER_DAYS + FILING_LAG_DAYS)
+    days = (expected - (today or date.today())).days
+    # Overdue filings are checked daily; never hold a period past a quarter
+    return float(min(max(days, 1), FISCAL_QUARTER_DAYS) * 86400)
+
+class TieredCache:
+    """Memory LRU in front of an optional on-disk store, both bounded by bytes.
+    
+    Values are stored with their freshness deadline; the backends expire
+    them only once they are too stale to serve at all.
+    """
+    
+    def __init__(self, memory=None, disk=None):
+        self.memory = memory if memory is not None else MemoryCacheBackend(32 * 1024 * 1024)
+        self.disk = disk
+        
+    def get(self, key: str) -> Optional[Tuple[Any, bool, str]]:
+        """``(value, fresh, tier)`` or None on a miss"""
+        
+        tier = "memory"
+        raw = self.memory.get(key)
+        if raw is None and self.disk is not None:
+            raw = self.disk.get(key)
+            tier = "disk"
+        if raw is None:
+            return None
+            
+        entry = json.loads(raw)
+        now = time.time()
+        if tier == "disk":
+            # Promote for the rest of its servable life
+            self.memory.set(key, raw, max(0.0, entry["expires_at"] - now))
+        return entry["value"], now < entry["fresh_until"], tier
+        
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float):
+        now = time.time()
+        raw = json.dumps({
+            "value": value,
+            "fresh_until": now + ttl,
+            "expires_at": now + ttl + stale_ttl
+        }, separators=(",", ":"), default=str).encode("utf-8")
+        self.memory.set(key, raw, ttl + stale_ttl)
+        if self.disk is not None:
+            self.disk.set(key, raw, ttl + stale_ttl)
+            
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+class MarketDataCache:
+    """Caches market data per dataset, refreshing stale values in the background.
+    
+    A fresh value is returned as is. A stale one is returned immediately
+    while a single background refresh (at refresh priority, so it yields
+    quota to interactive calls) replaces it. Concurrent misses for the same
+    key share one fetch.
+    """
+    
+    def __init__(self,
+                 disk_path: Optional[str] = None,
+                 memory_bytes: int = 32 * 1024 * 1024,
+                 disk_bytes: int = 256 * 1024 * 1024,
+                 ttls: Optional[Dict[str, float]] = None,
+                 stale_ttls: Optional[Dict[str, float]] = None):
+        self.store = TieredCache(
+            MemoryCacheBackend(memory_bytes),
+            DiskCacheBackend(disk_path, disk_bytes) if disk_path else None
+        )
+        self.ttls = {**DATASET_TTLS, **(ttls or {})}
+        self.stale_ttls = {**STALE_TTLS, **(stale_ttls or {})}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0
+        }
+        
+    async def get_or_fetch(self,
+                           dataset: str,
+                           key: str,
+                           fetch: Callable[[str], Awaitable[Any]],
+                           priority: str = INTERACTIVE) -> Any:
+        """Cached value for ``key``, fetching with ``fetch(priority)`` when needed"""
+        
+        cache_key = f"{dataset}:{key}"
+        cached = self.store.get(cache_key)
+        if cached is not None:
+            value, fresh, tier = cached
+            if fresh:
+                self.stats[f"{tier}_hits"] += 1
+                return value
+            self.stats["stale_hits"] += 1
+            if cache_key not in self._inflight:
+                self.stats["refreshes"] += 1
+                self._start(dataset, cache_key, fetch, REFRESH, background=True)
+            return value
+            
+        self.stats["misses"] += 1
+        task = self._inflight.get(cache_key) or self._start(dataset, cache_key, fetch, priority)
+        return await asyncio.shield(task)
+        
+    def _start(self,
+               dataset: str,
+               cache_key: str,
+               fetch: Callable[[str], Awaitable[Any]],
+               priority: str,
+               background: bool = False) -> asyncio.Task:
+        task = asyncio.ensure_future(self._fetch_and_store(dataset, cache_key, fetch, priority))
+        self._inflight[cache_key] = task
+        
+        def finished(task: asyncio.Task):
+            self._inflight.pop(cache_key, None)
+            failed = task.cancelled() or task.exception() is not None
+            if background and failed:
+                # The stale value keeps being served; the next read retries
+                self.stats["refresh_errors"] += 1
+                
+        task.add_done_callback(finished)
+        return task
+        
+    async def _fetch_and_store(self,
+                               dataset: str,
+                               cache_key: str,
+                               fetch: Callable[[str], Awaitable[Any]],
+                               priority: str) -> Any:
+        value = await fetch(priority)
+        if self._cacheable(dataset, value):
+            ttl = self.ttls.get(dataset, 60)
+            if dataset == STATEMENTS:
+                ttl = statements_ttl(value) or ttl
+            self.store.set(cache_key, value, ttl, self.stale_ttls.get(dataset, 0))
+        return value
+        
+    def _cacheable(self, dataset: str, value: Any) -> bool:
+        """Only real data; API error bodies are returned but never stored"""
+        validator = DATASET_VALIDATORS.get(dataset)
+        return is_data_payload(value) and (validator is None or validator(value))
+        
+    def clear(self):
+        self.store.clear()
+        
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["stale_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "refreshing": len(self._inflight),
+            "memory_entries": len(self.store.memory),
+            "memory_bytes": self.store.memory.current_bytes
+        }
@@ -17,8 +17,8 @@ from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
-from python_docx import Document
-from python_docx.shared import Inches
+from docx import Document
+from docx.shared import Inches
 from pptx import Presentation
 from pptx.util import Inches as PptxInches
 
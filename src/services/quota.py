@@ -0,0 +1,223 @@
+"""
+API Quota Scheduler
+Per-minute and per-day token buckets with priorities for quota-limited data APIs
+"""
+
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Priorities, most urgent first
+INTERACTIVE = "interactive"
+REFRESH = "refresh"
+BACKFILL = "backfill"
+PRIORITY_RANK = {INTERACTIVE: 0, REFRESH: 1, BACKFILL: 2}
+
+# Longest a call may queue for quota before giving up (None waits forever)
+DEFAULT_MAX_WAIT: Dict[str, Optional[float]] = {
+    INTERACTIVE: 30.0,
+    REFRESH: 300.0,
+    BACKFILL: None
+}
+
+# Alpha Vantage answers over-quota calls with HTTP 200 and one of these keys
+RATE_LIMIT_KEYS = ("Note", "Information")
+# The same keys carry other notices (premium endpoints, bad API keys), which
+# are returned to the caller rather than retried
+RATE_LIMIT_WORDING = re.compile(r"call frequency|rate limit|per minute|per day", re.IGNORECASE)
+
+class QuotaExceededError(Exception):
+    """Raised when a call cannot get quota within its priority's wait limit"""
+
+class RateLimitedError(Exception):
+    """Raised when the API keeps answering with rate-limit payloads"""
+
+def rate_limit_message(payload: Any) -> Optional[str]:
+    """The provider's message if ``payload`` is a rate-limit notice, else None"""
+    if not isinstance(payload, dict) or not payload:
+        return None
+    if any(key not in RATE_LIMIT_KEYS for key in payload):
+        return None
+    message = str(payload.get("Note") or payload.get("Information"))
+    return message if RATE_LIMIT_WORDING.search(message) else None
+
+class TokenBucket:
+    """Continuously refilling bucket of ``capacity`` calls"""
+    
+    def __init__(self, capacity: float, per_seconds: float):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        
+    def wait_time(self) -> float:
+        """Seconds until a token is available"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+        
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+        
+    def refund(self):
+        """Give back a token that was taken but not used"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + 1)
+        
+    def drain(self):
+        """Empty the bucket (the provider says we are over quota)"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+class QuotaScheduler:
+    """Grants API calls within per-minute and per-day quotas, by priority.
+    
+    Every call takes a token from both buckets. Waiting calls are served
+    most urgent priority first, then in arrival order, so interactive
+    requests overtake queued refresh and backfill work and a wide burst
+    (e.g. a 50-symbol snapshot) drains at the quota rate instead of
+    exceeding it. Rate-limit responses pause the queue with exponential
+    backoff and the call is retried from its original queue position.
+    """
+    
+    def __init__(self,
+                 calls_per_minute: int = 5,
+                 calls_per_day: int = 25,
+                 max_retries: int = 3,
+                 backoff: float = 15.0,
+                 max_backoff: float = 120.0,
+                 max_wait: Optional[Dict[str, Optional[float]]] = None):
+        self.minute = TokenBucket(calls_per_minute, 60.0)
+        self.day = TokenBucket(calls_per_day, 86400.0)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_wait = {**DEFAULT_MAX_WAIT, **(max_wait or {})}
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._paused_until = 0.0
+        self.granted: Dict[str, int] = {priority: 0 for priority in PRIORITY_RANK}
+        self.rate_limited = 0
+        self.retries = 0
+        self.rejected = 0
+        
+    async def call(self,
+                   func: Callable[[], Awaitable[Any]],
+                   priority: str = INTERACTIVE) -> Any:
+        """Run ``func`` once quota allows, retrying rate-limited responses"""
+        
+        position = next(self._sequence)
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(priority, position)
+            result = await func()
+            message = rate_limit_message(result)
+            if message is None:
+                return result
+                
+            self.rate_limited += 1
+            if "per day" in message.lower():
+                self.day.drain()
+            self.minute.drain()
+            self.pause(min(self.max_backoff, self.backoff * 2 ** attempt))
+            if attempt < self.max_retries:
+                self.retries += 1
+                
+        raise RateLimitedError(message)
+        
+    async def acquire(self, priority: str = INTERACTIVE, position: Optional[int] = None):
+        """Wait for a token; raises QuotaExceededError past the priority's wait limit"""
+        
+        if priority not in PRIORITY_RANK:
+            raise ValueError(f"Unknown priority: {priority}")
+        if position is None:
+            position = next(self._sequence)
+            
+        # Fail fast when even an empty queue could not be served in time,
+        # e.g. once the daily quota is spent
+        max_wait = self.max_wait[priority]
+        if max_wait is not None and self._min_wait() > max_wait:
+            self.rejected += 1
+            raise QuotaExceededError(f"API quota exhausted for the next {self._min_wait():.0f}s")
+            
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITY_RANK[priority], position, future))
+        self._dispatch()
+        
+        granted = False
+        try:
+            await asyncio.wait_for(future, max_wait)
+            granted = True
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise QuotaExceededError(f"No API quota available within {max_wait:.0f}s for {priority} call")
+        finally:
+            if not granted:
+                if future.done() and not future.cancelled():
+                    # Granted just as the wait timed out or was cancelled;
+                    # the call will not run, so its tokens go back
+                    self.minute.refund()
+                    self.day.refund()
+                # Let the next waiter through in this one's place
+                self._dispatch()
+        self.granted[priority] += 1
+        
+    def pause(self, seconds: float):
+        """Hold every call for ``seconds`` (backoff after a rate-limit response)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        
+    def _min_wait(self) -> float:
+        """Seconds until any call could be granted, ignoring the queue"""
+        return max(self.minute.wait_time(), self.day.wait_time(), self._paused_until - time.monotonic())
+        
+    def _dispatch(self):
+        """Grant tokens to waiters in priority order; re-arm a timer when out"""
+        
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+            
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+                
+            wait = self._min_wait()
+            if wait > 0:
+                self._wakeup = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+                
+            heapq.heappop(self._waiters)
+            self.minute.take()
+            self.day.take()
+            future.set_result(None)
+            
+    def get_stats(self) -> Dict[str, Any]:
+        waiting: Dict[str, int] = {priority: 0 for priority in PRIORITY_RANK}
+        ranks = {rank: priority for priority, rank in PRIORITY_RANK.items()}
+        for rank, _, future in self._waiters:
+            if not future.done():
+                waiting[ranks[rank]] += 1
+        return {
+            "granted": dict(self.granted),
+            "waiting": waiting,
+            "minute_tokens": round(max(0.0, self.minute.available()), 2),
+            "day_tokens": round(max(0.0, self.day.available()), 2),
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 1),
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,22 @@
+"""
+Shared test fixtures
+Fake Bedrock clients and a helper for running coroutines
+"""
+
+import asyncio
+
+import pytest
+
+from src.services.aws_clients import clear_clients
+from src.services.fake_bedrock import LatencyProfile, install_fake_bedrock
+
+def run(coro):
+    """Run a coroutine to completion on a fresh event loop"""
+    return asyncio.run(coro)
+
+@pytest.fixture
+def fake_bedrock():
+    """Instant fake Bedrock in us-east-1; real clients are restored afterwards"""
+    fakes = install_fake_bedrock({"us-east-1": LatencyProfile(first_byte=0.0)})
+    yield fakes["us-east-1"]
+    clear_clients()
@@ -0,0 +1,87 @@
+"""
+Adaptive Concurrency Limiter Tests
+AIMD limit changes, queueing and load shedding
+"""
+
+import asyncio
+
+import pytest
+
+from src.agents.adaptive_limiter import AdaptiveConcurrencyLimiter, LoadShedError, is_throttling_error
+
+from .conftest import run
+
+class Throttled(Exception):
+    response = {"Error": {"Code": "ThrottlingException"}}
+
+def test_throttling_errors_are_recognised():
+    assert is_throttling_error(Throttled())
+    assert not is_throttling_error(ValueError())
+
+def test_healthy_calls_raise_the_limit_additively():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=5)
+    
+    async def scenario():
+        for _ in range(20):
+            limiter.release(await limiter.acquire())
+            
+    run(scenario())
+    assert limiter.limit == 5
+    assert limiter.in_flight == 0
+
+def test_throttle_cuts_the_limit_once_per_window():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+    
+    async def scenario():
+        started = [await limiter.acquire() for _ in range(3)]
+        for start in started:
+            limiter.release(start, Throttled())
+            
+    run(scenario())
+    # Three throttles from calls started before the first cut count once
+    assert limiter.limit == 4
+    assert limiter.throttles == 3
+
+def test_slow_calls_do_not_raise_the_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, latency_threshold_ms=0.0)
+    
+    async def scenario():
+        started = await limiter.acquire()
+        await asyncio.sleep(0.01)
+        limiter.release(started)
+        
+    run(scenario())
+    assert limiter.limit == 4
+
+def test_waiters_are_served_in_arrival_order():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    order = []
+    
+    async def worker(name):
+        started = await limiter.acquire()
+        order.append(name)
+        await asyncio.sleep(0.005)
+        limiter.release(started)
+        
+    async def scenario():
+        await asyncio.gather(*(worker(name) for name in "abc"))
+        
+    run(scenario())
+    assert order == ["a", "b", "c"]
+
+def test_full_queue_and_queue_timeout_shed_load():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_queue=1, queue_timeout=0.02)
+    
+    async def scenario():
+        held = await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(LoadShedError):
+            await limiter.acquire()
+        with pytest.raises(LoadShedError):
+            await waiter
+        limiter.release(held)
+        
+    run(scenario())
+    assert limiter.shed == 2
+    assert limiter.in_flight == 0
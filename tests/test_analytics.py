@@ -0,0 +1,95 @@
+"""
+Financial Analytics Tests
+Indicators, risk measures and portfolio statistics against reference values
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from src.services import analytics
+
+def test_sma_matches_a_rolling_mean():
+    prices = analytics.to_array([1, 2, 3, 4, 5])
+    result = analytics.sma(prices, 3)
+    
+    assert np.isnan(result[:2]).all()
+    assert result[2:].tolist() == [2.0, 3.0, 4.0]
+    assert np.isnan(analytics.sma(prices, 10)).all()
+
+def test_rsi_is_bounded_and_saturates_on_one_way_moves():
+    rising = analytics.to_array(range(1, 31))
+    assert analytics.rsi(rising, 14)[-1] == 100.0
+    
+    zigzag = analytics.to_array([10, 11] * 15)
+    value = analytics.rsi(zigzag, 14)[-1]
+    assert 0.0 < value < 100.0
+    assert np.isnan(analytics.rsi(rising[:14], 14)).all()
+
+def test_returns_volatility_and_drawdown():
+    prices = analytics.to_array([100, 110, 99, 120])
+    returns = analytics.simple_returns(prices)
+    
+    assert returns.tolist() == pytest.approx([0.1, -0.1, 120 / 99 - 1])
+    assert analytics.log_returns(prices)[0] == pytest.approx(math.log(1.1))
+    assert analytics.volatility(returns, 1) == pytest.approx(np.std(returns, ddof=1))
+    assert analytics.max_drawdown(prices) == pytest.approx(-0.1)
+    assert math.isnan(analytics.volatility(returns[:1]))
+
+def test_historical_var_reports_losses_as_positive():
+    returns = analytics.to_array([-0.05, -0.02, 0.0, 0.01, 0.03] * 4)
+    risk = analytics.historical_var(returns, confidence=0.8)
+    
+    assert risk["var"] == pytest.approx(0.026)
+    assert risk["cvar"] == pytest.approx(0.05)
+
+def test_price_summary_skips_indicators_still_warming_up():
+    summary = analytics.price_summary([100, 101, 102], sma_window=2, rsi_period=14)
+    
+    assert summary["change"] == 1.0
+    assert summary["sma_2"] == 101.5
+    assert summary["rsi"] is None
+    assert analytics.price_summary([100]) == {"observations": 1}
+
+def test_weights_combine_lots_and_skip_bad_holdings():
+    weights = analytics.portfolio_weights([
+        {"symbol": "AAPL", "quantity": 10, "price": 10},
+        {"symbol": "AAPL", "value": 100},
+        {"symbol": "MSFT", "value": 200},
+        {"quantity": 5, "price": 1}
+    ])
+    assert weights == {"AAPL": 0.5, "MSFT": 0.5}
+    assert analytics.portfolio_weights([{"symbol": "X", "value": 0}]) == {}
+
+def test_concentration_without_price_history():
+    stats = analytics.portfolio_statistics({"A": 0.5, "B": 0.25, "C": 0.25})
+    
+    assert stats["concentration_hhi"] == pytest.approx(0.375)
+    assert stats["effective_positions"] == pytest.approx(1 / 0.375)
+    assert "volatility" not in stats
+
+def test_portfolio_risk_matches_the_covariance_formula():
+    prices = {
+        "A": [100, 102, 101, 105, 107, 106],
+        "B": [50, 49, 51, 50, 52, 53, 54],
+        "C": [10]
+    }
+    stats = analytics.portfolio_statistics({"A": 0.6, "B": 0.3, "C": 0.1}, prices, periods_per_year=1)
+    
+    matrix = np.column_stack([np.array(prices["A"], float), np.array(prices["B"][-6:], float)])
+    returns = matrix[1:] / matrix[:-1] - 1.0
+    weights = np.array([2 / 3, 1 / 3])
+    expected_vol = math.sqrt(weights @ np.cov(returns, rowvar=False) @ weights)
+    
+    assert stats["observations"] == 6
+    assert stats["unpriced"] == ["C"]
+    assert stats["volatility"] == pytest.approx(expected_vol)
+    assert sum(stats["risk_contributions"].values()) == pytest.approx(1.0)
+
+def test_periods_per_year_scale_with_bar_size():
+    assert analytics.periods_per_year_for("daily") == 252
+    assert analytics.periods_per_year_for("1min") == 252 * 390
+    assert analytics.periods_per_year_for("60min") == 252 * 6.5
+    with pytest.raises(ValueError):
+        analytics.periods_per_year_for("2min")
@@ -0,0 +1,54 @@
+"""
+AWS Client Factory Tests
+Shared client cache and per-service botocore settings
+"""
+
+from botocore.stub import Stubber
+
+from src.services.aws_clients import build_config, clear_clients, get_client, prewarm
+
+def test_bedrock_clients_leave_retries_to_the_limiter():
+    for service in ("bedrock-runtime", "bedrock-agent-runtime"):
+        config = build_config(service)
+        assert config.retries["max_attempts"] == 1
+        assert config.read_timeout == 120
+
+def test_other_services_keep_botocore_retries():
+    assert build_config("s3").retries["max_attempts"] == 4
+
+def test_clients_are_cached_per_service_and_region(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    clear_clients()
+    try:
+        client = get_client("bedrock-runtime", "us-east-1")
+        assert get_client("bedrock-runtime", "us-east-1") is client
+        assert get_client("bedrock-runtime", "us-west-2") is not client
+    finally:
+        clear_clients()
+
+def test_prewarm_makes_a_cheap_call_on_the_shared_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    clear_clients()
+    try:
+        runtime = get_client("bedrock-runtime", "us-east-1")
+        agent_runtime = get_client("bedrock-agent-runtime", "us-east-1")
+        with Stubber(runtime) as runtime_stub, Stubber(agent_runtime) as agent_stub:
+            runtime_stub.add_response("list_async_invokes", {"asyncInvokeSummaries": []}, {"maxResults": 1})
+            # A refusal still means the connection was made
+            agent_stub.add_client_error("list_sessions", "AccessDeniedException", http_status_code=403)
+            
+            warmed = prewarm([("bedrock-runtime", "us-east-1"), ("bedrock-agent-runtime", "us-east-1")])
+            runtime_stub.assert_no_pending_responses()
+            agent_stub.assert_no_pending_responses()
+        assert warmed == [runtime.meta.endpoint_url, agent_runtime.meta.endpoint_url]
+    finally:
+        clear_clients()
+
+def test_prewarm_skips_services_it_cannot_reach():
+    clear_clients()
+    try:
+        assert prewarm([("no-such-service", "us-east-1")]) == []
+    finally:
+        clear_clients()
@@ -0,0 +1,87 @@
+"""
+OHLCV Bars Tests
+Time series parsing, record serialization and intraday processing
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.services import analytics
+from src.services.bars import CLOSE, VOLUME, parse_time_series
+from src.services.data_service import AlphaVantageService, RealTimeDataService
+
+def series(count: int, start_minute: int = 0) -> dict:
+    """Alpha Vantage style payload, newest bar first"""
+    bars = {}
+    for minute in reversed(range(start_minute, start_minute + count)):
+        price = 100.0 + minute
+        bars[f"2026-10-16 10:{minute:02d}:00"] = {
+            "1. open": str(price), "2. high": str(price + 1), "3. low": str(price - 1),
+            "4. close": str(price + 0.5), "5. volume": str(1000 + minute)
+        }
+    return bars
+
+def test_parse_orders_bars_oldest_first():
+    payload = series(3)
+    shuffled = dict([list(payload.items())[1], list(payload.items())[0], list(payload.items())[2]])
+    
+    for time_series in (payload, shuffled):
+        bars = parse_time_series(time_series)
+        assert bars.close.tolist() == [100.5, 101.5, 102.5]
+        assert np.all(np.diff(bars.timestamps) == 60)
+
+def test_volume_reported_as_float_text_is_parsed():
+    payload = series(2)
+    for row in payload.values():
+        row[VOLUME] += ".0"
+    assert parse_time_series(payload).volume.dtype == np.int64
+
+def test_records_are_newest_first_and_limited():
+    bars = parse_time_series(series(5))
+    records = bars.records(limit=2)
+    assert [row[CLOSE] for row in records] == [104.5, 103.5]
+    assert bars.records(limit=2, newest_first=False)[0][CLOSE] == 103.5
+
+def test_records_replace_non_finite_indicators_with_none():
+    bars = parse_time_series(series(5))
+    records = bars.records(newest_first=False, extra={"sma_3": analytics.sma(bars.close, 3)})
+    
+    assert [row["sma_3"] for row in records[:2]] == [None, None]
+    assert records[2]["sma_3"] == pytest.approx(101.5)
+    json.dumps(records, allow_nan=False)
+
+def test_slicing_returns_views():
+    bars = parse_time_series(series(5))
+    window = bars[1:3]
+    assert len(window) == 2
+    assert np.shares_memory(window.close, bars.close)
+    with pytest.raises(TypeError):
+        bars[0]
+
+@pytest.mark.parametrize("count", [1, 5, 30])
+def test_processed_intraday_data_is_strict_json(count):
+    service = AlphaVantageService("demo")
+    data = service._process_stock_data({
+        "Meta Data": {"2. Symbol": "AAPL", "3. Last Refreshed": "2026-10-16 10:00:00"},
+        "Time Series (1min)": series(count)
+    })
+    
+    json.dumps(data, allow_nan=False)
+    assert data["current_price"] == 100.5 + count - 1
+    assert data["change"] == (None if count == 1 else 1.0)
+    assert (data["technical_indicators"]["sma_20"] is None) == (count < 20)
+    assert len(data["time_series"]) == count
+
+def test_error_payload_raises():
+    with pytest.raises(ValueError):
+        AlphaVantageService("demo")._process_stock_data({"Error Message": "Invalid API call"})
+
+def test_market_summary_counts_single_bar_symbols_as_unchanged():
+    summary = RealTimeDataService().build_snapshot({
+        "AAPL": {"current_price": 10.0, "change": 1.0},
+        "NEW": {"current_price": 20.0, "change": None}
+    })["market_summary"]
+    assert summary["total_change"] == 1.0
+    assert summary["gainers"] == 1 and summary["losers"] == 0
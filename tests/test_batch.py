@@ -0,0 +1,156 @@
+"""
+Batch Inference Tests
+Input and output JSONL, local execution and job tracking
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from src.agents.batch import (
+    BatchItem, BatchJob, BatchJobManager, LocalBatchExecutor, build_model_input,
+    converse_handler, parse_output_jsonl
+)
+from src.agents.scheduler import BATCH, PriorityClass, PriorityScheduler
+from src.services.fake_bedrock import DEFAULT_RESPONSE
+
+from .conftest import run
+
+def echo_handler(model_id, model_input):
+    text = model_input["messages"][0]["content"][0]["text"]
+    if "fail" in text:
+        raise RuntimeError("model error")
+    return {"content": [{"type": "text", "text": f"{model_id}: {text}"}]}
+
+def make_manager(handler=echo_handler, **kwargs) -> BatchJobManager:
+    executor = LocalBatchExecutor(handler=handler, max_workers=2)
+    executor.poll_interval = 0.01
+    return BatchJobManager(executor, model_id="model-x", **kwargs)
+
+def test_model_input_carries_encoded_context():
+    body = build_model_input("Summarise", {"symbol": "AAPL"}, max_tokens=100)
+    text = body["messages"][0]["content"][0]["text"]
+    
+    assert body["max_tokens"] == 100
+    assert text.startswith("Summarise\n\nContext:\n")
+    assert "AAPL" in text
+
+def test_input_assigns_record_ids_in_order():
+    manager = make_manager()
+    job = BatchJob("job", "model-x", [BatchItem("a"), BatchItem("b", record_id="mine")])
+    records = [json.loads(line) for line in manager.build_input(job).splitlines()]
+    
+    assert [record["recordId"] for record in records] == ["r000000", "mine"]
+    assert records[0]["modelInput"]["messages"][0]["content"][0]["text"] == "a"
+
+def test_missing_and_failed_records_become_failures():
+    job = BatchJob("job", "model-x", [
+        BatchItem("a", record_id="ok"), BatchItem("b", record_id="bad"), BatchItem("c", record_id="lost")
+    ])
+    output = "\n".join([
+        json.dumps({"recordId": "ok", "modelOutput": {"content": [{"type": "text", "text": "answer"}]}}),
+        json.dumps({"recordId": "bad", "error": {"errorCode": 400, "errorMessage": "invalid"}})
+    ])
+    results = parse_output_jsonl(output, job)
+    
+    assert results["ok"]["success"] and results["ok"]["response"] == "answer"
+    assert results["bad"]["error"] == "invalid"
+    assert results["lost"]["error"] == "No output for record"
+    assert results["ok"]["route"] == {"path": "batch", "job_id": "job", "record_id": "ok"}
+
+def test_local_job_runs_to_completion():
+    manager = make_manager()
+    
+    async def scenario():
+        job = await manager.submit([BatchItem("one"), BatchItem("two", session_id="s2")])
+        return await manager.wait(job.job_id, timeout=5)
+        
+    job = run(scenario())
+    assert job.status == "Completed"
+    assert job.results["r000000"]["response"] == "model-x: one"
+    assert job.results["r000001"]["session_id"] == "s2"
+    assert manager.get_stats()["completed"] == 1
+    assert manager.list_jobs()[0]["succeeded"] == 2
+
+def test_scheduled_records_run_in_the_batch_class():
+    scheduler = PriorityScheduler([PriorityClass(BATCH, weight=1.0, max_concurrency=1)], capacity=lambda: 4)
+    lock = threading.Lock()
+    active, peak = [0], [0]
+    
+    def handler(model_id, model_input):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return echo_handler(model_id, model_input)
+        
+    async def scenario():
+        executor = LocalBatchExecutor(handler=handler, max_workers=4, scheduler=scheduler)
+        executor.poll_interval = 0.01
+        manager = BatchJobManager(executor, model_id="model-x")
+        job = await manager.submit([BatchItem(f"q{i}") for i in range(4)])
+        job = await manager.wait(job.job_id, timeout=5)
+        executor.shutdown()
+        return job
+        
+    job = run(scenario())
+    metrics = scheduler.get_metrics()
+    assert job.status == "Completed"
+    assert peak[0] == 1
+    assert metrics["classes"][BATCH]["dispatched"] == 4
+    assert metrics["in_flight"] == 0
+
+def test_some_failed_records_complete_partially():
+    manager = make_manager()
+    
+    async def scenario():
+        job = await manager.submit([BatchItem("fine"), BatchItem("fail please")])
+        return await manager.wait(job.job_id, timeout=5)
+        
+    job = run(scenario())
+    assert job.status == "PartiallyCompleted"
+    assert job.results["r000001"]["error"] == "model error"
+    assert job.to_dict()["failed"] == 1
+
+def test_all_failed_records_fail_the_job():
+    manager = make_manager()
+    
+    async def scenario():
+        job = await manager.submit([BatchItem("fail")])
+        return await manager.wait(job.job_id, timeout=5)
+        
+    job = run(scenario())
+    assert job.status == "Failed"
+    assert job.results == {}
+    assert manager.get_stats()["failed"] == 1
+
+def test_submit_rejects_empty_and_duplicate_items():
+    manager = make_manager()
+    with pytest.raises(ValueError):
+        run(manager.submit([]))
+    with pytest.raises(ValueError):
+        run(manager.submit([BatchItem("a", record_id="x"), BatchItem("b", record_id="x")]))
+
+def test_finished_jobs_are_evicted_oldest_first():
+    manager = make_manager(max_jobs=2)
+    
+    async def scenario():
+        job_ids = []
+        for query in ("a", "b", "c"):
+            job = await manager.submit([BatchItem(query)])
+            await manager.wait(job.job_id, timeout=5)
+            job_ids.append(job.job_id)
+        return job_ids
+        
+    first, second, third = run(scenario())
+    assert manager.get(first) is None
+    assert manager.get(second) is not None and manager.get(third) is not None
+
+def test_converse_handler_returns_messages_output(fake_bedrock):
+    output = converse_handler()("model-x", build_model_input("What is a bond?"))
+    assert output["content"] == [{"type": "text", "text": DEFAULT_RESPONSE}]
+    assert output["role"] == "assistant"
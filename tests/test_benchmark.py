@@ -0,0 +1,57 @@
+"""
+Offline Benchmark Tests
+Baseline comparison and short runs against the fake backend
+"""
+
+import argparse
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from src.services.aws_clients import clear_clients
+
+from .conftest import run
+
+_PATH = Path(__file__).parent.parent / "scripts" / "benchmark" / "benchmark.py"
+_spec = importlib.util.spec_from_file_location("benchmark", _PATH)
+benchmark = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(benchmark)
+
+def bench_args(**overrides) -> argparse.Namespace:
+    settings = dict(
+        target="orchestrator", requests=8, concurrency=4, first_byte=0.0, jitter=0.0,
+        per_chunk=0.0, chunk_size=24, response_chars=48, error_rate=0.0, stall_rate=0.0,
+        stall=0.0, cache=False, seed=7
+    )
+    settings.update(overrides)
+    return argparse.Namespace(**settings)
+
+def test_baseline_comparison_flags_only_real_regressions():
+    baseline = {"config": {"requests": 8}, "targets": {"orchestrator": {"p50_ms": 10.0, "throughput_rps": 100.0}}}
+    slower = {"config": {"requests": 8}, "targets": {"orchestrator": {"p50_ms": 12.0, "throughput_rps": 100.0}}}
+    noise = {"config": {"requests": 8}, "targets": {"orchestrator": {"p50_ms": 10.5, "throughput_rps": 95.0}}}
+    
+    assert not benchmark.compare_to_baseline(slower, baseline, tolerance=0.1)
+    assert benchmark.compare_to_baseline(noise, baseline, tolerance=0.1)
+
+def test_orchestrator_run_reports_latency_and_throughput():
+    try:
+        results = run(benchmark.run(bench_args()))
+    finally:
+        clear_clients()
+        
+    stats = results["targets"]["orchestrator"]
+    assert stats["requests"] == 8 and stats["errors"] == 0
+    assert stats["throughput_rps"] > 0
+    assert stats["p50_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert results["simulated_model_ms"] == pytest.approx(0.0)
+
+def test_api_run_drives_the_chat_route():
+    try:
+        results = run(benchmark.run(bench_args(target="api", requests=4, concurrency=2)))
+    finally:
+        clear_clients()
+        
+    stats = results["targets"]["api"]
+    assert stats["requests"] == 4 and stats["errors"] == 0
@@ -0,0 +1,137 @@
+"""
+Request Coalescing Tests
+Shared calls and fanned-out streams for identical concurrent requests
+"""
+
+import asyncio
+
+import pytest
+
+from src.agents.coalescing import SingleFlight
+from src.agents.financial_agent import AgentConfig, AgentOrchestrator, FinancialAgent
+from src.services.aws_clients import clear_clients
+from src.services.fake_bedrock import LatencyProfile, install_fake_bedrock
+
+from .conftest import run
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+        
+    async def scenario():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(4)))
+        
+    assert run(scenario()) == ["answer"] * 4
+    assert len(calls) == 1
+    assert flight.get_stats() == {"in_flight_calls": 0, "in_flight_streams": 0, "coalesced": 3}
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+        
+    async def scenario():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(2)), return_exceptions=True)
+        
+    assert all(isinstance(result, ValueError) for result in run(scenario()))
+
+def test_cancelled_waiter_leaves_the_shared_call_running():
+    flight = SingleFlight()
+    
+    async def work():
+        await asyncio.sleep(0.02)
+        return "answer"
+        
+    async def scenario():
+        leaver = asyncio.ensure_future(flight.do("k", work))
+        stayer = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        leaver.cancel()
+        return await stayer
+        
+    assert run(scenario()) == "answer"
+
+def test_work_is_cancelled_once_every_waiter_leaves():
+    flight = SingleFlight()
+    cancelled = []
+    
+    async def work():
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+            
+    async def scenario():
+        waiter = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.sleep(0)
+        
+    run(scenario())
+    assert cancelled == [1]
+    assert flight.get_stats()["in_flight_calls"] == 0
+
+def test_late_stream_subscribers_replay_earlier_chunks():
+    flight = SingleFlight()
+    produced = []
+    
+    async def source():
+        for chunk in ("a", "b", "c"):
+            produced.append(chunk)
+            await asyncio.sleep(0.01)
+            yield chunk
+            
+    async def subscribe(delay):
+        await asyncio.sleep(delay)
+        return [chunk async for chunk in flight.stream("k", source)]
+        
+    async def scenario():
+        return await asyncio.gather(subscribe(0), subscribe(0.015))
+        
+    assert run(scenario()) == [["a", "b", "c"], ["a", "b", "c"]]
+    assert produced == ["a", "b", "c"]
+
+def test_stream_errors_reach_every_subscriber():
+    flight = SingleFlight()
+    
+    async def source():
+        yield "a"
+        await asyncio.sleep(0.01)
+        raise RuntimeError("broken")
+        
+    async def subscribe():
+        return [chunk async for chunk in flight.stream("k", source)]
+        
+    async def scenario():
+        return await asyncio.gather(subscribe(), subscribe(), return_exceptions=True)
+        
+    assert all(isinstance(result, RuntimeError) for result in run(scenario()))
+
+def test_stateless_agent_queries_coalesce_across_sessions():
+    fake = install_fake_bedrock({"us-east-1": LatencyProfile(first_byte=0.02)})["us-east-1"]
+    try:
+        orchestrator = AgentOrchestrator()
+        orchestrator.register_agent("general", FinancialAgent(AgentConfig(agent_id="agent")))
+        
+        async def scenario():
+            return await asyncio.gather(*(
+                orchestrator.route_query("Analyze AAPL", f"s{i}") for i in range(10)
+            ))
+            
+        results = run(scenario())
+    finally:
+        clear_clients()
+        
+    assert all(result["success"] for result in results)
+    assert [result["session_id"] for result in results] == [f"s{i}" for i in range(10)]
+    assert fake.calls == 1
+    assert orchestrator.single_flight.coalesced == 9
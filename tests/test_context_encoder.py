@@ -0,0 +1,92 @@
+"""
+Context Encoder Tests
+Compaction, tabulation and token budget enforcement at every nesting level
+"""
+
+import json
+
+from src.agents.context_encoder import ContextEncoder
+from src.agents.telemetry import RequestMetrics, end_trace, start_trace
+
+def _records(count: int):
+    return [
+        {"symbol": f"SYM{i}", "price": 100 + i / 3, "volume": 1000 * i, "note": None}
+        for i in range(count)
+    ]
+
+def test_record_lists_become_tables_with_rounded_floats():
+    encoded = ContextEncoder(float_precision=2).encode({"positions": _records(2)})
+    value = json.loads(encoded.text)
+    
+    assert value["positions"]["columns"] == ["symbol", "price", "volume"]
+    assert value["positions"]["rows"][1] == ["SYM1", 100.33, 1000]
+    assert encoded.tokens < encoded.raw_tokens
+
+def test_nulls_empties_and_non_finite_floats_are_dropped():
+    encoded = ContextEncoder().encode({"a": None, "b": [], "c": "", "d": float("nan"), "e": 1.0})
+    assert json.loads(encoded.text) == {"e": 1}
+
+def test_nested_table_is_truncated_with_stats():
+    encoded = ContextEncoder(max_tokens=80).encode({"positions": _records(39)})
+    table = json.loads(encoded.text)["positions"]
+    
+    assert encoded.truncated
+    assert encoded.tokens <= 80
+    assert table["omitted_rows"] + len(table["rows"]) == 39
+    assert table["stats"]["volume"] == [0, 38000, 19000]
+
+def test_root_level_record_list_respects_the_budget():
+    encoded = ContextEncoder(max_tokens=50).encode(_records(39))
+    
+    assert encoded.truncated
+    assert encoded.tokens <= 50
+    assert json.loads(encoded.text)["omitted_rows"] > 0
+
+def test_root_level_string_and_list_respect_the_budget():
+    encoder = ContextEncoder(max_tokens=20)
+    
+    text = encoder.encode("x" * 1000)
+    assert text.truncated and text.tokens <= 20
+    
+    values = encoder.encode(list(range(200)))
+    assert values.truncated and values.tokens <= 20
+    assert json.loads(values.text)[-1].endswith("more")
+
+def test_explicit_zero_budget_is_not_ignored():
+    encoded = ContextEncoder(max_tokens=10000).encode({"positions": _records(10)}, max_tokens=0)
+    assert encoded.truncated
+
+def test_context_within_budget_is_untouched():
+    encoded = ContextEncoder().encode({"positions": _records(3)})
+    assert not encoded.truncated
+    assert len(json.loads(encoded.text)["positions"]["rows"]) == 3
+
+def test_stats_accumulate_tokens_saved():
+    encoder = ContextEncoder()
+    first = encoder.encode({"positions": _records(5)})
+    second = encoder.encode({"positions": _records(8)})
+    assert encoder.get_stats() == {
+        "requests": 2,
+        "total_tokens_saved": first.tokens_saved + second.tokens_saved
+    }
+
+def test_savings_are_reported_on_the_request_trace():
+    encoder = ContextEncoder()
+    encoder.encode({"ignored": "outside any request"})
+    
+    trace, token = start_trace()
+    try:
+        first = encoder.encode({"prices": _records(20)})
+        second = encoder.encode({"risk": "low"})
+    finally:
+        end_trace(token)
+        
+    summary = trace.summary()["context"]
+    assert summary["tokens_saved"] == first.tokens_saved + second.tokens_saved > 0
+    assert summary["raw_tokens"] == first.raw_tokens + second.raw_tokens
+    assert summary["truncated"] == 0
+    assert f'ctx_saved;desc="{summary["tokens_saved"]}"' in trace.server_timing()
+    
+    metrics = RequestMetrics(prefix="test")
+    metrics.observe(trace, "agent")
+    assert "test_context_tokens_saved_count 1" in metrics.render()
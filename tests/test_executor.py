@@ -0,0 +1,101 @@
+"""
+Bedrock Executor Tests
+Thread-pool execution, deadlines and slot accounting
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.agents.adaptive_limiter import AdaptiveConcurrencyLimiter, LoadShedError
+from src.agents.executor import BedrockExecutor
+from src.agents.hedging import Deadline
+
+from .conftest import run
+
+def make_executor(max_in_flight: int = 2, limit: int = 8) -> BedrockExecutor:
+    return BedrockExecutor(
+        max_in_flight=max_in_flight,
+        pool=ThreadPoolExecutor(max_workers=4),
+        limiter=AdaptiveConcurrencyLimiter(initial_limit=limit, queue_timeout=5)
+    )
+
+def test_run_returns_the_result_and_counts_it():
+    executor = make_executor()
+    assert run(executor.run(lambda a, b: a + b, 2, b=3)) == 5
+    assert executor.get_metrics()["completed"] == 1
+    assert executor.limiter.in_flight == 0
+
+def test_run_raises_the_worker_error():
+    executor = make_executor()
+    
+    def fail():
+        raise ValueError("boom")
+        
+    with pytest.raises(ValueError):
+        run(executor.run(fail))
+    assert executor.get_metrics()["failed"] == 1
+
+def test_deadline_bounds_the_limiter_wait():
+    executor = make_executor(limit=1)
+    release = threading.Event()
+    
+    async def scenario():
+        busy = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        with pytest.raises(LoadShedError):
+            await executor.run(lambda: None, deadline=Deadline.after(0.1))
+        waited = time.monotonic() - started
+        release.set()
+        await busy
+        return waited
+        
+    assert run(scenario()) < 1.0
+
+def test_cancelled_call_holds_its_slot_until_the_thread_returns():
+    executor = make_executor(max_in_flight=1)
+    release = threading.Event()
+    
+    async def scenario():
+        call = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        await asyncio.sleep(0.05)
+        try:
+            # The worker thread is still blocked, so its slot is still taken
+            assert executor.in_flight == 1
+            assert executor.limiter.in_flight == 1
+        finally:
+            release.set()
+        await asyncio.sleep(0.05)
+        assert executor.in_flight == 0
+        assert executor.limiter.in_flight == 0
+        
+    run(scenario())
+
+def test_stream_yields_items_and_releases_when_drained():
+    executor = make_executor()
+    
+    async def collect():
+        return [item async for item in executor.stream(lambda n: iter(range(n)), 3)]
+        
+    assert run(collect()) == [0, 1, 2]
+    assert executor.in_flight == 0
+
+def test_stream_raises_the_producer_error():
+    executor = make_executor()
+    
+    def produce():
+        yield "a"
+        raise RuntimeError("broken stream")
+        
+    async def collect():
+        return [item async for item in executor.stream(produce)]
+        
+    with pytest.raises(RuntimeError):
+        run(collect())
+    assert executor.get_metrics()["failed"] == 1
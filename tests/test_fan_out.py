@@ -0,0 +1,69 @@
+"""
+Multi-Agent Fan-Out Tests
+Concurrent agent branches, per-agent timeouts and merged answers
+"""
+
+import asyncio
+from datetime import datetime
+
+from src.agents.financial_agent import AgentConfig, AgentOrchestrator, FinancialAgent
+from src.services.fake_bedrock import DEFAULT_RESPONSE
+
+from .conftest import run
+
+QUERY = "Analyze AAPL earnings"
+
+def make_orchestrator() -> AgentOrchestrator:
+    orchestrator = AgentOrchestrator()
+    for name in ("general", "portfolio", "risk"):
+        orchestrator.register_agent(name, FinancialAgent(AgentConfig(agent_id=f"{name}-agent")))
+    return orchestrator
+
+def test_answers_are_merged_one_section_per_agent(fake_bedrock):
+    result = run(make_orchestrator().route_query_multi(QUERY, "s1", ["portfolio", "risk"]))
+    
+    assert result["success"] and not result["partial"]
+    assert result["response"].startswith("## Portfolio analysis")
+    assert "## Risk analysis" in result["response"]
+    assert result["route"]["agents"] == ["portfolio", "risk"]
+
+def test_single_agent_answer_is_returned_as_is(fake_bedrock):
+    result = run(make_orchestrator().route_query_multi(QUERY, "s1", ["general", "unknown"]))
+    assert result["response"] == DEFAULT_RESPONSE
+    assert result["route"]["agents"] == ["general"]
+
+def test_failed_and_slow_agents_give_a_partial_answer(fake_bedrock):
+    orchestrator = make_orchestrator()
+    
+    async def fail(query, session_id, context=None, deadline=None):
+        return {"success": False, "error": "agent failed", "session_id": session_id,
+                "timestamp": datetime.utcnow().isoformat()}
+        
+    async def stall(query, session_id, context=None, deadline=None):
+        await asyncio.sleep(1.0)
+        
+    orchestrator.agents["portfolio"].invoke_agent = fail
+    orchestrator.agents["risk"].invoke_agent = stall
+    
+    result = run(orchestrator.route_query_multi(
+        QUERY, "s1", ["general", "portfolio", "risk"], use_cache=False, agent_timeout=0.05
+    ))
+    assert result["success"] and result["partial"]
+    assert result["response"] == DEFAULT_RESPONSE
+    assert result["agents"]["portfolio"]["error"] == "agent failed"
+    assert result["agents"]["risk"]["error"].startswith("Timed out")
+
+def test_branches_use_separate_sessions(fake_bedrock):
+    orchestrator = make_orchestrator()
+    sessions = []
+    original = FinancialAgent.invoke_agent
+    
+    async def record(agent, query, session_id, context=None, deadline=None):
+        sessions.append(session_id)
+        return await original(agent, query, session_id, context, deadline)
+        
+    for agent in orchestrator.agents.values():
+        agent.invoke_agent = record.__get__(agent)
+        
+    run(orchestrator.route_query_multi(QUERY, "s1", ["portfolio", "risk"], use_cache=False))
+    assert sorted(sessions) == ["s1-portfolio", "s1-risk"]
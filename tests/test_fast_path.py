@@ -0,0 +1,50 @@
+"""
+Fast-Path Routing Tests
+Direct model path for simple questions, agent path for anything needing data
+"""
+
+import pytest
+
+from src.agents.fast_path import AGENT, DIRECT, QueryPathClassifier
+from src.agents.financial_agent import AgentConfig, AgentOrchestrator, FinancialAgent
+
+from .conftest import run
+
+classifier = QueryPathClassifier()
+
+@pytest.mark.parametrize("query", [
+    "What is a bond?",
+    "Explain the difference between stocks and bonds",
+    "Thanks, that helps"
+])
+def test_simple_questions_go_direct(query):
+    assert classifier.classify(query).path == DIRECT
+
+@pytest.mark.parametrize("query, reason", [
+    ("What is the current price of gold?", "tool_keyword"),
+    ("Is $AAPL a buy?", "ticker"),
+    ("Thoughts on NVDA?", "ticker"),
+    ("word " * 50, "long_query")
+])
+def test_data_and_tool_questions_stay_on_the_agent(query, reason):
+    decision = classifier.classify(query)
+    assert (decision.path, decision.reason) == (AGENT, reason)
+
+def test_context_keeps_the_agent_path():
+    assert classifier.classify("What is a bond?", {"holdings": [1]}).reason == "context"
+
+def test_common_acronyms_are_not_tickers():
+    assert classifier.classify("What is an ETF?").path == DIRECT
+
+def test_detected_symbols_keep_the_agent_path():
+    assert classifier.classify("Tell me about Apple", symbols=["AAPL"]).path == AGENT
+    assert classifier.classify("Tell me about Apple", symbols=[]).path == DIRECT
+
+@pytest.mark.parametrize("query", ["Tell me about Apple", "Should I sell Tesla?"])
+def test_orchestrator_routes_company_names_to_the_agent(fake_bedrock, query):
+    orchestrator = AgentOrchestrator()
+    orchestrator.register_agent("general", FinancialAgent(AgentConfig(agent_id="agent", fast_model_id="fast")))
+    
+    result = run(orchestrator.route_query(query, "s1", use_cache=False))
+    assert result["route"]["path"] == AGENT
+    assert result["route"]["reason"] == "ticker"
@@ -0,0 +1,105 @@
+"""
+Fundamentals Loader Tests
+Statement alignment and concurrent multi-symbol loading
+"""
+
+import asyncio
+
+import pandas as pd
+import pytest
+
+from src.services.fundamentals import StatementsLoader, align_statements, table_records
+
+from .conftest import run
+
+def statements(symbol: str = "AAPL") -> dict:
+    return {
+        "income_statement": {"symbol": symbol, "quarterlyReports": [
+            {"fiscalDateEnding": "2026-06-30", "reportedCurrency": "USD", "totalRevenue": "100", "netIncome": "10"},
+            {"fiscalDateEnding": "2026-03-31", "reportedCurrency": "USD", "totalRevenue": "90", "netIncome": "None"}
+        ]},
+        "balance_sheet": {"symbol": symbol, "quarterlyReports": [
+            {"fiscalDateEnding": "2026-03-31", "totalAssets": "500"},
+            {"fiscalDateEnding": "2025-12-31", "totalAssets": "480"}
+        ]},
+        "cash_flow": {"symbol": symbol, "quarterlyReports": [
+            {"fiscalDateEnding": "2026-03-31", "netIncome": "9", "operatingCashflow": "12"}
+        ]}
+    }
+
+class FakeAlphaVantage:
+    """Serves statements, tracking how many symbols load at once"""
+    
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.active = 0
+        self.peak = 0
+        self.requested = []
+        
+    async def get_financial_statements(self, symbol, priority):
+        self.requested.append(symbol)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if symbol in self.failing:
+            return {"income_statement": {"Error Message": "Invalid API call"}}
+        return statements(symbol)
+
+def test_statements_align_by_period_newest_first():
+    table = align_statements(statements())
+    
+    assert list(table.index) == ["2026-06-30", "2026-03-31", "2025-12-31"]
+    assert list(table.columns) == ["reportedCurrency", "totalRevenue", "netIncome", "totalAssets", "operatingCashflow"]
+    assert table.loc["2026-06-30", "totalRevenue"] == 100
+    assert pd.isna(table.loc["2026-06-30", "totalAssets"])
+
+def test_shared_fields_fall_back_to_later_statements():
+    table = align_statements(statements())
+    assert table.loc["2026-06-30", "netIncome"] == 10
+    assert table.loc["2026-03-31", "netIncome"] == 9
+
+def test_records_use_none_for_empty_cells():
+    rows = table_records(align_statements(statements()))
+    assert rows[0]["fiscalDateEnding"] == "2026-06-30"
+    assert rows[0]["totalAssets"] is None
+    assert rows[2]["reportedCurrency"] is None
+
+def test_missing_reports_give_an_empty_table():
+    assert align_statements({"income_statement": {"annualReports": []}}, "annual").empty
+    with pytest.raises(ValueError):
+        align_statements(statements(), "monthly")
+
+def test_loader_caps_concurrency_and_reports_failures():
+    alpha_vantage = FakeAlphaVantage(failing={"BAD"})
+    loader = StatementsLoader(alpha_vantage, max_concurrency=2)
+    
+    async def scenario():
+        return [result async for result in loader.stream(["aapl", "MSFT", "BAD", "AAPL", "TSLA"])]
+        
+    results = {result["symbol"]: result for result in run(scenario())}
+    assert sorted(results) == ["AAPL", "BAD", "MSFT", "TSLA"]
+    assert results["BAD"]["error"] == "Invalid API call"
+    assert results["AAPL"]["success"] and not results["AAPL"]["table"].empty
+    assert alpha_vantage.peak == 2
+
+def test_load_combines_symbols_into_one_frame():
+    loader = StatementsLoader(FakeAlphaVantage(failing={"BAD"}))
+    frame = run(loader.load(["MSFT", "AAPL", "BAD"]))
+    
+    assert list(frame.index.get_level_values("symbol").unique()) == ["AAPL", "MSFT"]
+    assert frame.loc[("AAPL", "2026-06-30"), "totalRevenue"] == 100
+
+def test_stopping_early_stops_issuing_requests():
+    alpha_vantage = FakeAlphaVantage()
+    loader = StatementsLoader(alpha_vantage, max_concurrency=1)
+    
+    async def scenario():
+        stream = loader.stream(["A", "B", "C", "D"])
+        first = await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+        return first
+        
+    assert run(scenario())["symbol"] == "A"
+    assert len(alpha_vantage.requested) <= 2
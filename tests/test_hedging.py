@@ -0,0 +1,130 @@
+"""
+Hedged Request Tests
+Hedging, failover, deadlines and winner-only accounting
+"""
+
+import asyncio
+
+import pytest
+
+from src.agents.financial_agent import AgentConfig, FinancialAgent
+from src.agents.hedging import Deadline, DeadlineExceeded, HedgedCaller, HedgePolicy, percentile
+from src.agents.telemetry import end_trace, start_trace
+from src.services.aws_clients import clear_clients
+from src.services.fake_bedrock import DEFAULT_RESPONSE, LatencyProfile, install_fake_bedrock
+
+from .conftest import run
+
+class Unavailable(Exception):
+    response = {"Error": {"Code": "ServiceUnavailableException"}}
+
+def make_caller(**policy) -> HedgedCaller:
+    return HedgedCaller(["east", "west"], HedgePolicy(**{"default_delay": 0.05, **policy}))
+
+def test_slow_primary_is_hedged_and_the_loser_is_not_scored():
+    caller = make_caller()
+    delays = {"east": 1.0, "west": 0.0}
+    
+    async def call(region):
+        await asyncio.sleep(delays[region])
+        return region
+        
+    assert run(caller.call(call)) == "west"
+    assert caller.hedges == 1 and caller.hedge_wins == 1
+    assert caller.health.get("west").requests == 1
+    assert caller.health.get("east").requests == 0
+
+def test_retryable_error_fails_over():
+    caller = make_caller(default_delay=5.0)
+    
+    async def call(region):
+        if region == "east":
+            raise Unavailable()
+        return region
+        
+    assert run(caller.call(call)) == "west"
+    assert caller.failovers == 1
+    assert caller.health.get("east").errors == 1
+
+def test_non_retryable_error_is_raised():
+    caller = make_caller(default_delay=5.0)
+    
+    async def call(region):
+        raise ValueError("bad request")
+        
+    with pytest.raises(ValueError):
+        run(caller.call(call))
+
+def test_deadline_bounds_the_call():
+    caller = HedgedCaller(["east"])
+    
+    async def call(region):
+        await asyncio.sleep(1.0)
+        
+    with pytest.raises(DeadlineExceeded):
+        run(caller.call(call, Deadline.after(0.05)))
+    assert caller.deadline_exceeded == 1
+
+def test_stream_commits_to_the_first_region_to_produce():
+    caller = make_caller()
+    
+    async def produce(region):
+        await asyncio.sleep(1.0 if region == "east" else 0.0)
+        for index in range(3):
+            yield f"{region}-{index}"
+            
+    async def collect():
+        return [item async for item in caller.stream(produce)]
+        
+    assert run(collect()) == ["west-0", "west-1", "west-2"]
+
+@pytest.fixture
+def hedged_agent():
+    install_fake_bedrock({
+        "us-east-1": LatencyProfile(first_byte=0.3, per_chunk=0.005),
+        "us-west-2": LatencyProfile(first_byte=0.0, per_chunk=0.005)
+    })
+    agent = FinancialAgent(AgentConfig(
+        agent_id="agent", fast_model_id="fast", secondary_regions=["us-west-2"], hedge=True
+    ))
+    agent.model_regions.policy.default_delay = 0.05
+    yield agent
+    clear_clients()
+
+def test_only_the_winning_attempt_counts_output(hedged_agent):
+    async def scenario():
+        trace, token = start_trace()
+        try:
+            result = await hedged_agent.invoke_model("What is a bond?", "s1")
+            # Let the losing worker thread finish its (discarded) response
+            await asyncio.sleep(0.6)
+        finally:
+            end_trace(token)
+        return result, trace
+        
+    result, trace = run(scenario())
+    assert result["success"] and result["response"] == DEFAULT_RESPONSE
+    assert trace.output_chars == len(DEFAULT_RESPONSE)
+    assert hedged_agent.model_regions.hedge_wins == 1
+
+def test_only_the_winning_stream_counts_output(hedged_agent):
+    async def scenario():
+        trace, token = start_trace()
+        try:
+            chunks = [chunk async for chunk in hedged_agent.stream_model("What is a bond?", "s1")]
+            await asyncio.sleep(0.6)
+        finally:
+            end_trace(token)
+        return "".join(chunks), trace
+        
+    text, trace = run(scenario())
+    assert text == DEFAULT_RESPONSE
+    assert trace.output_chars == len(DEFAULT_RESPONSE)
+    assert trace.ttft is not None
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(100, 0, -1))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([5, 1, 3], 50) == 3
+    assert percentile([], 50) is None
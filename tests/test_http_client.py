@@ -0,0 +1,71 @@
+"""
+Managed HTTP Session Tests
+Connection reuse and session lifetime across event loops
+"""
+
+import asyncio
+
+from aiohttp import web
+
+from src.services.http_client import ManagedSession
+
+async def _ok(request):
+    return web.Response(text="ok")
+
+async def _fetch(managed: ManagedSession, times: int):
+    """Serve a local endpoint and request it ``times`` times"""
+    app = web.Application()
+    app.router.add_get("/", _ok)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        session = await managed.get()
+        for _ in range(times):
+            async with session.get(f"http://127.0.0.1:{port}/") as response:
+                assert await response.text() == "ok"
+        return session
+    finally:
+        await runner.cleanup()
+
+def test_connections_are_pooled_and_reused():
+    managed = ManagedSession()
+    
+    async def scenario():
+        await _fetch(managed, 3)
+        await managed.close()
+        
+    asyncio.run(scenario())
+    metrics = managed.get_metrics()
+    assert metrics["requests"] == 3
+    assert metrics["connections_created"] == 1
+    assert metrics["connections_reused"] == 2
+    assert not metrics["open"]
+
+def test_new_loop_closes_the_old_session():
+    managed = ManagedSession()
+    first = asyncio.run(_fetch(managed, 1))
+    
+    async def reopen():
+        return await managed.get()
+        
+    second = asyncio.run(reopen())
+    assert first.closed
+    assert second is not first
+    assert managed.sessions_created == 2
+    
+    asyncio.run(managed.close())
+    assert second.closed
+
+def test_session_is_shared_within_a_loop():
+    managed = ManagedSession()
+    
+    async def scenario():
+        first, second = await asyncio.gather(managed.get(), managed.get())
+        await managed.close()
+        return first, second
+        
+    first, second = asyncio.run(scenario())
+    assert first is second and first.closed
@@ -0,0 +1,45 @@
+"""
+Intent Classifier Tests
+Agent-type routing and ticker extraction
+"""
+
+import pytest
+
+from src.agents.intent_classifier import IntentClassifier
+
+classifier = IntentClassifier()
+
+@pytest.mark.parametrize("query, tickers", [
+    ("Thoughts on NVDA?", ["NVDA"]),
+    ("Is $aapl a buy?", ["AAPL"]),
+    ("Tell me about Apple", ["AAPL"]),
+    ("Compare MSFT and Google", ["MSFT", "GOOGL"]),
+    ("Buy BRK.B?", ["BRK.B"])
+])
+def test_extracts_named_tickers(query, tickers):
+    assert sorted(classifier.extract_tickers(query)) == sorted(tickers)
+
+@pytest.mark.parametrize("query", [
+    "WHAT IS THE BEST STOCK TO BUY",
+    "Is THE market up today?",
+    "What is an ETF?"
+])
+def test_ordinary_upper_case_words_are_not_tickers(query):
+    assert classifier.extract_tickers(query) == []
+
+def test_all_caps_query_keeps_known_symbols_and_cashtags():
+    assert sorted(classifier.extract_tickers("SHOULD I SELL TSLA OR $GME NOW")) == ["GME", "TSLA"]
+    assert classifier.extract_tickers("WHAT ABOUT PLTR FOR THE LONG RUN") == []
+
+def test_extracted_tickers_are_deduplicated():
+    assert classifier.extract_tickers("AAPL or $AAPL or Apple?") == ["AAPL"]
+
+@pytest.mark.parametrize("query, agent_type", [
+    ("How should I rebalance my portfolio?", "portfolio"),
+    ("What is the value at risk of my positions?", "risk"),
+    ("Latest news on Tesla earnings", "general")
+])
+def test_classifies_agent_type(query, agent_type):
+    result = classifier.classify(query)
+    assert result.agent_type == agent_type
+    assert 0.0 <= result.confidence <= 1.0
@@ -0,0 +1,121 @@
+"""
+Market Data Cache Tests
+Freshness, stale-while-revalidate, coalesced misses and what gets stored
+"""
+
+import asyncio
+from datetime import date
+
+from src.services.market_cache import (
+    INTRADAY, OVERVIEW, STATEMENTS, MarketDataCache, statements_ttl
+)
+from src.services.quota import INTERACTIVE, REFRESH
+
+from .conftest import run
+
+REPORTS = {"quarterlyReports": [{"fiscalDateEnding": "2026-06-30"}], "annualReports": []}
+STATEMENTS_OK = {"income_statement": REPORTS, "balance_sheet": REPORTS, "cash_flow": REPORTS}
+
+class Fetcher:
+    """Counts calls and the priority each was made at"""
+    
+    def __init__(self, *values):
+        self.values = list(values)
+        self.priorities = []
+        
+    async def __call__(self, priority):
+        self.priorities.append(priority)
+        await asyncio.sleep(0)
+        return self.values.pop(0) if len(self.values) > 1 else self.values[0]
+
+def test_fresh_values_are_served_from_memory():
+    cache = MarketDataCache()
+    fetch = Fetcher({"price": 1})
+    
+    async def scenario():
+        first = await cache.get_or_fetch(OVERVIEW, "AAPL", fetch)
+        second = await cache.get_or_fetch(OVERVIEW, "AAPL", fetch)
+        return first, second
+        
+    assert run(scenario()) == ({"price": 1}, {"price": 1})
+    assert fetch.priorities == [INTERACTIVE]
+    assert cache.get_stats()["memory_hits"] == 1
+
+def test_concurrent_misses_share_one_fetch():
+    cache = MarketDataCache()
+    fetch = Fetcher({"price": 1})
+    
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_fetch(OVERVIEW, "AAPL", fetch) for _ in range(5)))
+        
+    assert run(scenario()) == [{"price": 1}] * 5
+    assert len(fetch.priorities) == 1
+
+def test_stale_value_is_served_while_refreshing():
+    cache = MarketDataCache(ttls={INTRADAY: 0.1}, stale_ttls={INTRADAY: 60})
+    fetch = Fetcher({"price": 1}, {"price": 2})
+    
+    async def scenario():
+        await cache.get_or_fetch(INTRADAY, "AAPL", fetch)
+        await asyncio.sleep(0.11)
+        stale = await cache.get_or_fetch(INTRADAY, "AAPL", fetch)
+        await asyncio.sleep(0.01)
+        fresh = await cache.get_or_fetch(INTRADAY, "AAPL", fetch)
+        return stale, fresh
+        
+    assert run(scenario()) == ({"price": 1}, {"price": 2})
+    assert fetch.priorities == [INTERACTIVE, REFRESH]
+
+def test_error_and_notice_bodies_are_returned_but_not_stored():
+    cache = MarketDataCache()
+    
+    for body in ({"Error Message": "Invalid API call"}, {"Information": "premium endpoint"}, {}):
+        fetch = Fetcher(body)
+        
+        async def scenario():
+            await cache.get_or_fetch(OVERVIEW, "AAPL", fetch)
+            return await cache.get_or_fetch(OVERVIEW, "AAPL", fetch)
+            
+        assert run(scenario()) == body
+        assert len(fetch.priorities) == 2
+
+def test_statements_with_a_failed_part_are_not_stored():
+    cache = MarketDataCache()
+    incomplete = [
+        {**STATEMENTS_OK, "cash_flow": {"Error Message": "Invalid API call"}},
+        {**STATEMENTS_OK, "balance_sheet": {"Note": "API call frequency exceeded"}},
+        {**STATEMENTS_OK, "income_statement": {"symbol": "AAPL", "annualReports": [], "quarterlyReports": []}}
+    ]
+    
+    for statements in incomplete:
+        fetch = Fetcher(statements)
+        
+        async def scenario():
+            await cache.get_or_fetch(STATEMENTS, "AAPL", fetch)
+            await cache.get_or_fetch(STATEMENTS, "AAPL", fetch)
+            
+        run(scenario())
+        assert len(fetch.priorities) == 2
+        
+    fetch = Fetcher(STATEMENTS_OK)
+    
+    async def complete():
+        await cache.get_or_fetch(STATEMENTS, "AAPL", fetch)
+        return await cache.get_or_fetch(STATEMENTS, "AAPL", fetch)
+        
+    assert run(complete()) == STATEMENTS_OK
+    assert len(fetch.priorities) == 1
+
+def test_statements_stay_fresh_until_the_next_filing():
+    assert statements_ttl(STATEMENTS_OK, today=date(2026, 7, 1)) == 91 * 86400
+    assert statements_ttl(STATEMENTS_OK, today=date(2026, 11, 10)) == 3 * 86400
+    assert statements_ttl(STATEMENTS_OK, today=date(2027, 1, 1)) == 86400
+    assert statements_ttl({"income_statement": {}}) is None
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    path = str(tmp_path / "market.sqlite")
+    run(MarketDataCache(disk_path=path).get_or_fetch(OVERVIEW, "AAPL", Fetcher({"price": 1})))
+    
+    fetch = Fetcher({"price": 2})
+    assert run(MarketDataCache(disk_path=path).get_or_fetch(OVERVIEW, "AAPL", fetch)) == {"price": 1}
+    assert fetch.priorities == []
@@ -0,0 +1,95 @@
+"""
+Symbol Analysis Micro-Batching Tests
+Windowed batching, per-symbol splitting and failure fan-out
+"""
+
+import asyncio
+import json
+
+from src.agents.hedging import Deadline
+from src.agents.micro_batch import SymbolAnalysisBatcher
+
+from .conftest import run
+
+class RecordingOrchestrator:
+    """Answers each batch with JSON for the symbols named in the prompt"""
+    
+    def __init__(self, response=None, success=True):
+        self.response = response
+        self.success = success
+        self.calls = []
+        
+    async def route_query(self, query, session_id, agent_type, context, use_cache, priority, deadline):
+        self.calls.append({"query": query, "context": context, "use_cache": use_cache, "deadline": deadline})
+        if not self.success:
+            return {"success": False, "error": "model unavailable"}
+        if self.response is not None:
+            return {"success": True, "response": self.response}
+        symbols = query.split(": ", 1)[1].split(".\n", 1)[0].split(", ")
+        return {"success": True, "response": json.dumps({s.lower(): f"{s} looks fine" for s in symbols})}
+
+def test_requests_in_one_window_share_a_model_call():
+    orchestrator = RecordingOrchestrator()
+    batcher = SymbolAnalysisBatcher(orchestrator, window=0.02)
+    
+    async def scenario():
+        return await asyncio.gather(
+            batcher.analyze(["aapl", "MSFT"], market_data={"aapl": {"price": 1}}),
+            batcher.analyze(["MSFT", "TSLA"])
+        )
+        
+    first, second = run(scenario())
+    assert len(orchestrator.calls) == 1
+    assert "AAPL, MSFT, TSLA" in orchestrator.calls[0]["query"]
+    assert orchestrator.calls[0]["context"] == {"market_data": {"AAPL": {"price": 1}}}
+    assert first["AAPL"] == {"success": True, "analysis": "AAPL looks fine", "error": None}
+    assert first["MSFT"] == second["MSFT"]
+    assert batcher.get_stats()["symbols"] == 3
+
+def test_a_full_batch_is_sent_without_waiting_for_the_window():
+    orchestrator = RecordingOrchestrator()
+    batcher = SymbolAnalysisBatcher(orchestrator, window=10.0, max_symbols=2)
+    
+    async def scenario():
+        return await asyncio.wait_for(batcher.analyze(["A", "B", "C", "D"]), 1.0)
+        
+    result = run(scenario())
+    assert all(outcome["success"] for outcome in result.values())
+    assert len(orchestrator.calls) == 2
+
+def test_symbols_missing_from_the_answer_fail_alone():
+    orchestrator = RecordingOrchestrator(response='Here you go: {"AAPL": "strong"}')
+    batcher = SymbolAnalysisBatcher(orchestrator, window=0.0)
+    result = run(batcher.analyze(["AAPL", "MSFT"]))
+    
+    assert result["AAPL"]["analysis"] == "strong"
+    assert result["MSFT"] == {"success": False, "analysis": "", "error": "No analysis returned for MSFT"}
+
+def test_unstructured_answers_go_to_every_symbol():
+    orchestrator = RecordingOrchestrator(response="Markets are calm.")
+    batcher = SymbolAnalysisBatcher(orchestrator, window=0.0)
+    result = run(batcher.analyze(["AAPL", "MSFT"]))
+    
+    assert {outcome["analysis"] for outcome in result.values()} == {"Markets are calm."}
+    assert batcher.get_stats()["parse_failures"] == 1
+
+def test_a_failed_call_fails_every_waiter():
+    batcher = SymbolAnalysisBatcher(RecordingOrchestrator(success=False), window=0.0)
+    result = run(batcher.analyze(["AAPL", "MSFT"]))
+    assert [outcome["error"] for outcome in result.values()] == ["model unavailable"] * 2
+
+def test_cache_opt_out_and_earliest_deadline_apply_to_the_batch():
+    orchestrator = RecordingOrchestrator()
+    batcher = SymbolAnalysisBatcher(orchestrator, window=0.02)
+    
+    async def scenario():
+        soon, later = Deadline.after(1.0), Deadline.after(5.0)
+        await asyncio.gather(
+            batcher.analyze(["AAPL"], deadline=later),
+            batcher.analyze(["AAPL"], use_cache=False, deadline=soon)
+        )
+        return soon
+        
+    soon = run(scenario())
+    assert orchestrator.calls[0]["use_cache"] is False
+    assert orchestrator.calls[0]["deadline"] is soon
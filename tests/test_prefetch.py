@@ -0,0 +1,81 @@
+"""
+Market Data Prefetch Tests
+Per-symbol fetch tasks, deadline collection and snapshots
+"""
+
+import asyncio
+
+import pytest
+
+from src.services.data_service import MarketDataPrefetch, RealTimeDataService
+from src.services.quota import BACKFILL
+
+from .conftest import run
+
+def make_fetch(delays, calls=None):
+    async def fetch(symbol):
+        if calls is not None:
+            calls.append(symbol)
+        await asyncio.sleep(delays[symbol])
+        if symbol == "BAD":
+            raise ValueError("no data")
+        return {"symbol": symbol, "current_price": 10.0, "change": 1.0}
+    return fetch
+
+def test_collect_returns_what_arrived_and_keeps_loading_the_rest():
+    async def scenario():
+        prefetch = MarketDataPrefetch(make_fetch({"FAST": 0.0, "SLOW": 0.05}), ["FAST", "SLOW"])
+        early = await prefetch.collect(0.01)
+        late = await prefetch.all()
+        return early, late
+        
+    early, late = run(scenario())
+    assert list(early) == ["FAST"]
+    assert sorted(late) == ["FAST", "SLOW"]
+
+def test_failed_symbols_are_left_out():
+    async def scenario():
+        prefetch = MarketDataPrefetch(make_fetch({"AAPL": 0.0, "BAD": 0.0}), ["AAPL", "BAD"])
+        return await prefetch.all()
+        
+    assert list(run(scenario())) == ["AAPL"]
+
+def test_duplicate_symbols_are_fetched_once():
+    calls = []
+    
+    async def scenario():
+        return await MarketDataPrefetch(make_fetch({"AAPL": 0.0}, calls), ["AAPL", "AAPL"]).all()
+        
+    run(scenario())
+    assert calls == ["AAPL"]
+
+def test_cancel_stops_pending_fetches():
+    async def scenario():
+        prefetch = MarketDataPrefetch(make_fetch({"SLOW": 10.0}), ["SLOW"])
+        await prefetch.collect(0.0)
+        prefetch.cancel()
+        await asyncio.sleep(0)
+        return prefetch
+        
+    prefetch = run(scenario())
+    assert prefetch.tasks["SLOW"].cancelled()
+    assert prefetch.ready() == {}
+
+def test_service_prefetch_fetches_through_alpha_vantage():
+    class FakeAlphaVantage:
+        def __init__(self):
+            self.priorities = []
+            
+        async def get_stock_data(self, symbol, priority):
+            self.priorities.append(priority)
+            return {"symbol": symbol, "current_price": 10.0, "change": -1.0}
+            
+    service = RealTimeDataService()
+    with pytest.raises(RuntimeError):
+        service.prefetch(["AAPL"])
+    service.alpha_vantage = FakeAlphaVantage()
+    
+    snapshot = run(service.get_market_snapshot(["AAPL", "MSFT"], priority=BACKFILL))
+    assert sorted(snapshot["market_data"]) == ["AAPL", "MSFT"]
+    assert snapshot["market_summary"]["losers"] == 2
+    assert service.alpha_vantage.priorities == [BACKFILL, BACKFILL]
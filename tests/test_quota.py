@@ -0,0 +1,123 @@
+"""
+API Quota Scheduler Tests
+Token buckets, priority ordering, rate-limit detection and retries
+"""
+
+import asyncio
+
+import pytest
+
+from src.services.quota import (
+    BACKFILL, INTERACTIVE, REFRESH, QuotaExceededError, QuotaScheduler, RateLimitedError,
+    rate_limit_message
+)
+
+from .conftest import run
+
+FREQUENCY_NOTE = {
+    "Note": "Thank you for using Alpha Vantage! Our standard API call frequency is "
+            "5 calls per minute."
+}
+
+@pytest.mark.parametrize("payload", [
+    FREQUENCY_NOTE,
+    {"Note": "Our standard API call frequency is 5 calls per minute and 500 calls per day."},
+    {"Information": "Our standard API rate limit is 25 requests per day."}
+])
+def test_rate_limit_notices_are_recognised(payload):
+    assert rate_limit_message(payload)
+
+@pytest.mark.parametrize("payload", [
+    {"Information": "Thank you for using Alpha Vantage! This is a premium endpoint."},
+    {"Information": "The **demo** API key is for demo purposes only."},
+    {"Note": "call frequency", "Meta Data": {}},
+    {}
+])
+def test_other_payloads_are_not_rate_limits(payload):
+    assert rate_limit_message(payload) is None
+
+def test_non_rate_limit_notice_is_returned_without_retry():
+    scheduler = QuotaScheduler(calls_per_minute=5)
+    premium = {"Information": "This is a premium endpoint."}
+    calls = []
+    
+    async def fetch():
+        calls.append(1)
+        return premium
+        
+    assert run(scheduler.call(fetch)) == premium
+    assert len(calls) == 1 and scheduler.rate_limited == 0
+
+def test_rate_limited_call_is_retried_after_backoff():
+    scheduler = QuotaScheduler(calls_per_minute=600, backoff=0.01, max_backoff=0.05)
+    responses = [FREQUENCY_NOTE, {"ok": True}]
+    
+    async def fetch():
+        return responses.pop(0)
+        
+    async def scenario():
+        # The rate limit drains the minute bucket; refill it for the retry
+        scheduler.minute.rate = 1000.0
+        return await scheduler.call(fetch)
+        
+    assert run(scenario()) == {"ok": True}
+    assert scheduler.rate_limited == 1 and scheduler.retries == 1
+
+def test_persistent_rate_limit_raises():
+    scheduler = QuotaScheduler(calls_per_minute=600, max_retries=1, backoff=0.01, max_backoff=0.01)
+    scheduler.minute.rate = 1000.0
+    
+    async def fetch():
+        return FREQUENCY_NOTE
+        
+    with pytest.raises(RateLimitedError):
+        run(scheduler.call(fetch))
+
+def test_waiters_are_served_by_priority():
+    scheduler = QuotaScheduler(calls_per_minute=1, max_wait={INTERACTIVE: None, REFRESH: None})
+    order = []
+    
+    async def waiter(priority):
+        await scheduler.acquire(priority)
+        order.append(priority)
+        
+    async def scenario():
+        await scheduler.acquire(INTERACTIVE)
+        tasks = [asyncio.ensure_future(waiter(p)) for p in (BACKFILL, REFRESH, INTERACTIVE)]
+        await asyncio.sleep(0.01)
+        # Refill fast enough for the queue to drain in the test
+        scheduler.minute.rate = 100.0
+        scheduler._dispatch()
+        await asyncio.gather(*tasks)
+        
+    run(scenario())
+    assert order == [INTERACTIVE, REFRESH, BACKFILL]
+
+def test_exhausted_quota_is_rejected_past_the_wait_limit():
+    scheduler = QuotaScheduler(calls_per_minute=5, calls_per_day=1, max_wait={INTERACTIVE: 1.0})
+    
+    async def scenario():
+        await scheduler.acquire(INTERACTIVE)
+        with pytest.raises(QuotaExceededError):
+            await scheduler.acquire(INTERACTIVE)
+            
+    run(scenario())
+    assert scheduler.rejected == 1
+
+def test_cancelled_waiter_does_not_lose_a_token():
+    scheduler = QuotaScheduler(calls_per_minute=1, calls_per_day=100, max_wait={INTERACTIVE: None})
+    
+    async def scenario():
+        await scheduler.acquire(INTERACTIVE)
+        waiter = asyncio.ensure_future(scheduler.acquire(INTERACTIVE))
+        await asyncio.sleep(0.01)
+        # Grant the queued waiter, then cancel it before it resumes
+        scheduler.minute.tokens = 1.0
+        scheduler._dispatch()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        
+    run(scenario())
+    # Every token taken from the day bucket belongs to a granted call
+    used = scheduler.day.capacity - scheduler.day.available()
+    assert round(used) == scheduler.granted[INTERACTIVE]
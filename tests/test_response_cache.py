@@ -0,0 +1,125 @@
+"""
+Response Cache Tests
+Canonical keys, LRU and TTL behaviour, disk persistence and session scoping
+"""
+
+import time
+
+from src.agents.financial_agent import AgentConfig, AgentOrchestrator, FinancialAgent
+from src.agents.response_cache import (
+    DiskCacheBackend,
+    MemoryCacheBackend,
+    ResponseCache,
+    canonicalize_query
+)
+
+from .conftest import run
+
+def test_canonical_query_ignores_case_whitespace_and_trailing_punctuation():
+    assert canonicalize_query("  What is   AAPL's P/E?? ") == canonicalize_query("what is aapl's p/e")
+
+def test_memory_backend_evicts_least_recently_used_by_bytes():
+    backend = MemoryCacheBackend(max_bytes=10)
+    backend.set("a", b"aaaa", 60)
+    backend.set("b", b"bbbb", 60)
+    backend.get("a")
+    backend.set("c", b"cccc", 60)
+    
+    assert backend.get("b") is None
+    assert backend.get("a") == b"aaaa"
+    assert backend.current_bytes == 8
+
+def test_memory_backend_expires_entries():
+    backend = MemoryCacheBackend()
+    backend.set("a", b"value", 0.01)
+    time.sleep(0.02)
+    assert backend.get("a") is None
+    assert backend.current_bytes == 0
+
+def test_disk_backend_survives_restart(tmp_path):
+    path = str(tmp_path / "cache" / "responses.sqlite")
+    cache = ResponseCache(backend=DiskCacheBackend(path))
+    key = cache.make_key("general", "model", "query")
+    cache.set(key, "general", {"success": True, "response": "answer"})
+    
+    reopened = ResponseCache(backend=DiskCacheBackend(path))
+    assert reopened.get(key)["response"] == "answer"
+
+def test_disk_backend_evicts_least_recently_used(tmp_path):
+    backend = DiskCacheBackend(str(tmp_path / "c.sqlite"), max_bytes=10)
+    backend.set("a", b"aaaa", 60)
+    time.sleep(0.01)
+    backend.set("b", b"bbbb", 60)
+    time.sleep(0.01)
+    backend.get("a")
+    backend.set("c", b"cccc", 60)
+    
+    assert backend.get("b") is None
+    assert backend.get("a") == b"aaaa"
+
+def test_failed_responses_are_not_cached():
+    cache = ResponseCache()
+    key = cache.make_key("general", "model", "query")
+    cache.set(key, "general", {"success": False, "error": "boom"})
+    assert cache.get(key) is None
+
+def test_session_is_part_of_the_key():
+    cache = ResponseCache()
+    assert cache.make_key("general", "m", "q", session_id="s1") != cache.make_key("general", "m", "q", session_id="s2")
+    assert cache.make_key("general", "m", "q") == cache.make_key("general", "m", "q")
+
+def _orchestrator(config: AgentConfig, **options) -> AgentOrchestrator:
+    orchestrator = AgentOrchestrator(**options)
+    orchestrator.register_agent("general", FinancialAgent(config))
+    return orchestrator
+
+def test_stateless_agent_answers_are_shared_between_sessions(fake_bedrock):
+    orchestrator = _orchestrator(AgentConfig(agent_id="agent"))
+    
+    async def scenario():
+        first = await orchestrator.route_query("Analyze AAPL earnings", "user-a")
+        other = await orchestrator.route_query("Analyze AAPL earnings", "user-b")
+        return first, other
+        
+    first, other = run(scenario())
+    assert first["route"]["path"] == "agent" and not first.get("cached")
+    assert other.get("cached") and other["session_id"] == "user-b"
+    assert fake_bedrock.calls == 1
+    assert orchestrator.response_cache.get_stats()["hits"] == 1
+
+def test_agent_answers_in_an_ongoing_session_are_not_shared(fake_bedrock):
+    orchestrator = _orchestrator(AgentConfig(agent_id="agent"))
+    orchestrator.record_exchange("user-a", "Hello", {"success": True, "response": "Hi"})
+    
+    async def scenario():
+        first = await orchestrator.route_query("Analyze AAPL earnings", "user-a")
+        repeat = await orchestrator.route_query("Analyze AAPL earnings", "user-a")
+        other = await orchestrator.route_query("Analyze AAPL earnings", "user-b")
+        return first, repeat, other
+        
+    first, repeat, other = run(scenario())
+    assert not first.get("cached")
+    assert repeat.get("cached")
+    assert not other.get("cached")
+    assert fake_bedrock.calls == 2
+
+def test_direct_answers_are_shared_between_sessions(fake_bedrock):
+    orchestrator = _orchestrator(AgentConfig(agent_id="agent", fast_model_id="fast"))
+    
+    async def scenario():
+        await orchestrator.route_query("What is a bond?", "user-a")
+        return await orchestrator.route_query("What is a bond?", "user-b")
+        
+    result = run(scenario())
+    assert result["route"]["path"] == "direct"
+    assert result.get("cached")
+    assert fake_bedrock.calls == 1
+
+def test_orchestrator_cache_path_persists_answers(fake_bedrock, tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    config = AgentConfig(agent_id="agent", fast_model_id="fast")
+    run(_orchestrator(config, cache_path=path).route_query("What is a bond?", "s"))
+    
+    restarted = _orchestrator(config, cache_path=path)
+    assert run(restarted.route_query("What is a bond?", "s")).get("cached")
+    assert fake_bedrock.calls == 1
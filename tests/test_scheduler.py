@@ -0,0 +1,86 @@
+"""
+Priority Scheduler Tests
+Weighted sharing, per-class caps, starvation protection and timeouts
+"""
+
+import asyncio
+
+import pytest
+
+from src.agents.adaptive_limiter import LoadShedError
+from src.agents.scheduler import ANALYSIS, BATCH, INTERACTIVE, PriorityClass, PriorityScheduler
+
+from .conftest import run
+
+def make_scheduler(capacity: int = 1, **max_wait) -> PriorityScheduler:
+    return PriorityScheduler(
+        classes=[
+            PriorityClass(INTERACTIVE, weight=8.0, max_wait=max_wait.get(INTERACTIVE, 30.0)),
+            PriorityClass(ANALYSIS, weight=3.0, max_concurrency=2, max_wait=max_wait.get(ANALYSIS, 30.0)),
+            PriorityClass(BATCH, weight=1.0, max_concurrency=1, max_wait=max_wait.get(BATCH, 30.0))
+        ],
+        capacity=lambda: capacity
+    )
+
+async def drain(scheduler, jobs):
+    """Queue ``jobs`` behind a held slot, release it and record service order"""
+    order = []
+    
+    async def job(priority, name):
+        async with scheduler.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0.001)
+            
+    async with scheduler.slot(INTERACTIVE):
+        tasks = [asyncio.ensure_future(job(p, name)) for p, name in jobs]
+        await asyncio.sleep(0.01)
+    await asyncio.gather(*tasks)
+    return order
+
+def test_classes_share_capacity_by_weight():
+    scheduler = make_scheduler()
+    jobs = [(BATCH, f"b{n}") for n in range(4)] + [(INTERACTIVE, f"i{n}") for n in range(16)]
+    order = run(drain(scheduler, jobs))
+    
+    # Interactive work (weight 8 vs 1) takes most of the early capacity
+    # although batch work queued first, but batch work is not starved
+    early = order[:10]
+    assert sum(name.startswith("i") for name in early) >= 8
+    assert any(name.startswith("b") for name in early)
+
+def test_overdue_waiters_are_promoted():
+    scheduler = make_scheduler(**{BATCH: 0.0})
+    order = run(drain(scheduler, [(INTERACTIVE, "i1"), (BATCH, "b1")]))
+    assert order[0] == "b1"
+    assert scheduler.get_metrics()["classes"][BATCH]["promoted"] == 1
+
+def test_class_concurrency_cap_is_enforced():
+    scheduler = make_scheduler(capacity=10)
+    peak = []
+    
+    async def job():
+        async with scheduler.slot(BATCH):
+            peak.append(scheduler.get_metrics()["classes"][BATCH]["in_flight"])
+            await asyncio.sleep(0.005)
+            
+    async def scenario():
+        await asyncio.gather(*(job() for _ in range(4)))
+        
+    run(scenario())
+    assert max(peak) == 1
+
+def test_timeout_sheds_the_waiter_and_frees_its_place():
+    scheduler = make_scheduler()
+    
+    async def scenario():
+        async with scheduler.slot(INTERACTIVE):
+            with pytest.raises(LoadShedError):
+                await scheduler.acquire(ANALYSIS, timeout=0.01)
+        assert scheduler.get_metrics()["classes"][ANALYSIS]["queued"] == 0
+        
+    run(scenario())
+    assert scheduler.in_flight == 0
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        run(make_scheduler().acquire("urgent"))
@@ -0,0 +1,88 @@
+"""
+Session Store Tests
+Idle expiry and LRU eviction for the in-process, SQLite and DynamoDB stores
+"""
+
+import time
+
+import pytest
+
+from src.agents.session_store import (
+    DynamoDBSessionStore,
+    LocalDynamoTable,
+    MemorySessionStore,
+    SessionRecord,
+    SQLiteSessionStore
+)
+
+def _record(session_id: str, last_access: float = None) -> SessionRecord:
+    now = time.time()
+    return SessionRecord(session_id=session_id, user_id="u", created_at=now, last_access=last_access or now)
+
+@pytest.fixture(params=["memory", "sqlite", "dynamodb"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore(max_sessions=2, idle_ttl=60)
+    if request.param == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.sqlite"), max_sessions=2, idle_ttl=60)
+    return DynamoDBSessionStore(LocalDynamoTable(), idle_ttl=60)
+
+def test_round_trip_keeps_context_history_and_summary(store):
+    record = _record("s1")
+    record.context["risk"] = "low"
+    record.history.append({"role": "user", "content": "hi", "seq": 1})
+    record.summary = "greeting"
+    store.put(record)
+    
+    loaded = store.get("s1")
+    assert loaded.context == {"risk": "low"}
+    assert loaded.history == [{"role": "user", "content": "hi", "seq": 1}]
+    assert loaded.summary == "greeting"
+
+def test_idle_sessions_expire(store):
+    if isinstance(store, DynamoDBSessionStore):
+        pytest.skip("DynamoDB expiry is whole seconds, set when the item is written")
+    store.put(_record("s1"))
+    store.idle_ttl = 0.01
+    time.sleep(0.02)
+    assert store.get("s1") is None
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemorySessionStore(max_sessions=2, idle_ttl=60)
+    store.put(_record("a"))
+    store.put(_record("b"))
+    store.get("a")
+    store.put(_record("c"))
+    
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.evicted == 1
+
+def test_memory_store_put_refreshes_last_access():
+    store = MemorySessionStore(max_sessions=10, idle_ttl=60)
+    stale = _record("a", last_access=time.time() - 50)
+    store.put(stale)
+    assert time.time() - stale.last_access < 1
+    
+    # A session written just now must not expire on its old access time
+    store.idle_ttl = 10
+    assert store.get("a") is not None
+
+def test_memory_store_put_keeps_eviction_and_expiry_in_step():
+    store = MemorySessionStore(max_sessions=10, idle_ttl=60)
+    store.put(_record("a"))
+    store.put(_record("b"))
+    # Re-writing an old record moves it to the back of both orders
+    store.put(store.get("a"))
+    store.max_sessions = 1
+    store.evict_expired()
+    
+    assert store.get("b") is None
+    assert store.get("a") is not None
+
+def test_sqlite_store_evicts_over_capacity(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "s.sqlite"), max_sessions=2, idle_ttl=60)
+    for i, session_id in enumerate("abc"):
+        store.put(_record(session_id, last_access=time.time() + i))
+    assert len(store) == 2
+    assert store.get("a") is None
@@ -0,0 +1,59 @@
+"""
+Response Streaming Tests
+Incremental agent and model streams, decoding and streamed caching
+"""
+
+import pytest
+
+from src.agents.financial_agent import AgentConfig, AgentOrchestrator, FinancialAgent
+from src.services.aws_clients import clear_clients
+from src.services.fake_bedrock import DEFAULT_RESPONSE, LatencyProfile, install_fake_bedrock
+
+from .conftest import run
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+def make_agent() -> FinancialAgent:
+    return FinancialAgent(AgentConfig(agent_id="agent", fast_model_id="fast"))
+
+def test_agent_stream_yields_chunks_as_they_arrive(fake_bedrock):
+    chunks = run(collect(make_agent().stream_agent("Analyze AAPL earnings", "s1")))
+    assert len(chunks) > 1
+    assert "".join(chunks) == DEFAULT_RESPONSE
+
+def test_model_stream_yields_the_direct_answer(fake_bedrock):
+    chunks = run(collect(make_agent().stream_model("What is a bond?", "s1")))
+    assert len(chunks) > 1
+    assert "".join(chunks) == DEFAULT_RESPONSE
+
+def test_multibyte_characters_split_across_chunks_are_decoded():
+    text = "Revenue grew 5% — strong ¥ and € results"
+    encoded = text.encode("utf-8")
+    split = encoded.index("—".encode("utf-8")) + 1
+    response = {"completion": [
+        {"chunk": {"bytes": encoded[:split]}},
+        {"chunk": {"bytes": encoded[split:]}}
+    ]}
+    agent = FinancialAgent.__new__(FinancialAgent)
+    assert "".join(agent._iter_completion_text(response)) == text
+
+def test_streamed_answer_is_cached_once_complete(fake_bedrock):
+    orchestrator = AgentOrchestrator()
+    orchestrator.register_agent("general", make_agent())
+    
+    first = run(collect(orchestrator.route_query_stream("What is a bond?", "s1")))
+    calls = fake_bedrock.calls
+    second = run(collect(orchestrator.route_query_stream("What is a bond?", "s2")))
+    
+    assert "".join(first) == DEFAULT_RESPONSE
+    assert second == [DEFAULT_RESPONSE]
+    assert fake_bedrock.calls == calls
+
+def test_stream_errors_reach_the_consumer():
+    install_fake_bedrock({"us-east-1": LatencyProfile(first_byte=0.0, error_rate=1.0)})
+    try:
+        with pytest.raises(Exception):
+            run(collect(make_agent().stream_agent("Analyze AAPL earnings", "s1")))
+    finally:
+        clear_clients()
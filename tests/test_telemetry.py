@@ -0,0 +1,97 @@
+"""
+Request Telemetry Tests
+Stage spans, token marks, hedged attempts and histogram exposition
+"""
+
+from src.agents.telemetry import (
+    Histogram, RequestMetrics, RequestTrace, add_span, current_trace, end_trace, span, start_trace
+)
+
+def test_spans_accumulate_by_name():
+    trace = RequestTrace()
+    trace.add_span("model_call", 0.25)
+    trace.add_span("model_call", 0.5)
+    trace.add_span("executor_wait", 0.1)
+    trace.add_span("scheduler_wait", 0.2)
+    
+    assert trace.spans["model_call"] == 0.75
+    assert abs(trace.queue_wait - 0.3) < 1e-9
+    assert trace.summary()["spans_ms"]["model_call"] == 750.0
+
+def test_module_helpers_only_record_inside_a_trace():
+    add_span("ignored", 1.0)
+    with span("ignored"):
+        pass
+    assert current_trace() is None
+    
+    trace, token = start_trace()
+    try:
+        add_span("tool", 0.5)
+        with span("model_call"):
+            pass
+        assert current_trace() is trace
+    finally:
+        end_trace(token)
+    assert current_trace() is None
+    assert set(trace.spans) == {"tool", "model_call"}
+
+def test_output_marks_ttft_and_estimates_tokens():
+    trace = RequestTrace()
+    assert trace.ttft is None and trace.tokens_per_second is None
+    
+    trace.record_output("a" * 40)
+    first = trace.ttft
+    trace.record_output("b" * 40)
+    
+    assert trace.ttft == first
+    assert trace.marks["last_token"] >= first
+    assert trace.tokens == 20
+    trace.output_tokens = 7
+    assert trace.tokens == 7
+
+def test_tokens_per_second_uses_the_span_after_the_first_token():
+    trace = RequestTrace()
+    trace.marks.update(first_token=1.0, last_token=3.0)
+    trace.output_tokens = 100
+    assert trace.tokens_per_second == 50.0
+    assert 'tps;desc="50.0"' in trace.server_timing()
+
+def test_only_the_winning_attempt_counts_output():
+    trace = RequestTrace()
+    winner, loser = trace.attempt(), trace.attempt()
+    winner.add_span("model_call", 0.2)
+    loser.add_span("model_call", 0.3)
+    winner.record_output("x" * 8)
+    winner.output_tokens = 3
+    loser.record_output("y" * 400)
+    
+    trace.merge_output(winner)
+    assert abs(trace.spans["model_call"] - 0.5) < 1e-9
+    assert trace.output_chars == 8
+    assert trace.tokens == 3
+    assert trace.ttft == winner.ttft
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency", "Latency", (0.1, 1.0), ("route",))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value, "agent")
+    lines = histogram.render()
+    
+    assert 'latency_bucket{route="agent",le="0.1"} 2' in lines
+    assert 'latency_bucket{route="agent",le="1"} 3' in lines
+    assert 'latency_bucket{route="agent",le="+Inf"} 4' in lines
+    assert 'latency_count{route="agent"} 4' in lines
+    assert 'latency_sum{route="agent"} 5.650000' in lines
+
+def test_request_metrics_skip_absent_measurements():
+    metrics = RequestMetrics(prefix="test")
+    trace = RequestTrace()
+    trace.add_span("tool", 0.01)
+    metrics.observe(trace, "direct")
+    text = metrics.render()
+    
+    assert 'test_request_seconds_count{route="direct"} 1' in text
+    assert 'test_span_seconds_count{span="tool"} 1' in text
+    assert "test_ttft_seconds_count" not in text
+    assert "test_queue_wait_seconds_count" not in text
+    assert "test_output_tokens_count" not in text
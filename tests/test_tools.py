@@ -0,0 +1,111 @@
+"""
+Agent Tool Tests
+Per-session tool execution, memoization and compact result encoding
+"""
+
+import pytest
+
+from src.agents.financial_agent import AgentConfig, AgentOrchestrator, FinancialAgent
+from src.agents.tools import build_financial_tools
+from src.services import analytics
+
+from .conftest import run
+
+PORTFOLIO = {
+    "holdings": [
+        {"symbol": "AAPL", "quantity": 10, "price": 150.0},
+        {"symbol": "MSFT", "value": 500.0}
+    ],
+    "prices": {
+        "AAPL": [100 + i + (i % 3) for i in range(60)],
+        "MSFT": [200 + 2 * i - (i % 4) for i in range(60)]
+    }
+}
+
+def test_portfolio_tools_run_on_session_data():
+    tools = build_financial_tools()
+    tools.session("s1", {"portfolio": PORTFOLIO})
+    
+    result = run(tools.execute("portfolio_performance", {}, "s1"))
+    assert result.error is None
+    assert result.output["weights"] == {"AAPL": 0.75, "MSFT": 0.25}
+    
+    risk = run(tools.execute("portfolio_risk", {"confidence": 0.9}, "s1"))
+    assert risk.error is None and "value_at_risk" in risk.output
+
+def test_repeated_calls_are_memoized_until_the_data_changes():
+    tools = build_financial_tools()
+    tools.session("s1", {"portfolio": PORTFOLIO})
+    
+    assert not run(tools.execute("portfolio_performance", {}, "s1")).cached
+    assert run(tools.execute("portfolio_performance", {}, "s1")).cached
+    
+    tools.session("s1", {"portfolio": {**PORTFOLIO, "holdings": PORTFOLIO["holdings"][:1]}})
+    result = run(tools.execute("portfolio_performance", {}, "s1"))
+    assert not result.cached
+    assert result.output["weights"] == {"AAPL": 1.0}
+
+def test_errors_are_reported_not_raised():
+    tools = build_financial_tools()
+    
+    assert run(tools.execute("no_such_tool", {}, "s1")).error == "Unknown tool: no_such_tool"
+    result = run(tools.execute("portfolio_risk", {}, "empty"))
+    assert result.error and tools.encode_result(result).startswith("error:")
+    assert tools.get_stats()["tools"]["portfolio_risk"]["errors"] == 1
+
+def test_execute_all_keeps_request_order():
+    tools = build_financial_tools()
+    tools.session("s1", {"prices": {"AAPL": [float(i) for i in range(1, 40)]}})
+    
+    results = run(tools.execute_all([
+        ("technical_indicators", {"symbol": "aapl"}),
+        ("portfolio_risk", {})
+    ], "s1"))
+    assert [r.name for r in results] == ["technical_indicators", "portfolio_risk"]
+    assert results[0].output["symbol"] == "AAPL"
+
+class _IntradayService:
+    """Data service stub serving newest-first 1-minute closes"""
+    
+    def __init__(self, closes):
+        self.alpha_vantage = self
+        self.closes = closes
+        self.intervals = []
+        
+    async def get_stock_data(self, symbol, interval="1min"):
+        self.intervals.append(interval)
+        return {"time_series": [{"4. close": close} for close in reversed(self.closes)]}
+
+def test_fetched_intraday_volatility_is_annualized_per_bar():
+    closes = [100 + (i % 5) * 0.1 for i in range(60)]
+    service = _IntradayService(closes)
+    tools = build_financial_tools(service)
+    output = run(tools.execute("technical_indicators", {"symbol": "AAPL"}, "s1")).output
+    
+    returns = analytics.simple_returns(analytics.to_array(closes))
+    assert service.intervals == ["1min"]
+    assert output["interval"] == "1min"
+    assert output["volatility"] == pytest.approx(analytics.volatility(returns, 252 * 390))
+
+def test_supplied_histories_are_annualized_as_daily():
+    closes = [100 + (i % 5) for i in range(60)]
+    tools = build_financial_tools()
+    tools.session("s1", {"prices": {"AAPL": closes}})
+    output = run(tools.execute("technical_indicators", {"symbol": "AAPL"}, "s1")).output
+    
+    returns = analytics.simple_returns(analytics.to_array(closes))
+    assert output["interval"] == "daily"
+    assert output["volatility"] == pytest.approx(analytics.volatility(returns, 252))
+
+def test_context_encoding_stats_cover_agents_and_tools():
+    orchestrator = AgentOrchestrator()
+    orchestrator.register_agent("general", FinancialAgent(AgentConfig(agent_id="agent")))
+    orchestrator.tools.session("s1", {"portfolio": PORTFOLIO})
+    
+    result = run(orchestrator.tools.execute("portfolio_risk", {}, "s1"))
+    orchestrator.tools.encode_result(result)
+    
+    stats = orchestrator.get_context_encoding_stats()
+    assert stats["agents"] == {"general": {"requests": 0, "total_tokens_saved": 0}}
+    assert stats["tools"]["requests"] == 1
+    assert stats["tools"]["total_tokens_saved"] > 0